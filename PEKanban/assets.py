@@ -0,0 +1,96 @@
+# assets.py - Risorse statiche con fingerprint per l'interfaccia web
+# Ogni file di static/ è servito anche come /assets/<nome>.<hash>.<ext>:
+# l'URL cambia con il contenuto, quindi il browser lo tiene in cache senza
+# mai riconvalidarlo (Cache-Control immutable). Le varianti gzip e, se il
+# modulo brotli è installato, brotli sono compresse una volta sola
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from typing import Callable, Dict, Optional, Tuple
+from config import Config
+
+try:
+    import brotli
+except ImportError:
+    # Opzionale: senza brotli si servono solo gzip e il file originale
+    brotli = None
+
+# Tipi che vale la pena comprimere (font e immagini sono già compressi)
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+
+class Asset:
+    """File statico con il suo fingerprint e le varianti compresse"""
+
+    def __init__(self, static_folder: str, filename: str):
+        self.filename = filename
+        self.path = os.path.join(static_folder, filename)
+        self.mtime = os.stat(self.path).st_mtime_ns
+        with open(self.path, 'rb') as file:
+            data = file.read()
+        self.digest = hashlib.sha256(data).hexdigest()[:Config.ASSETS_HASH_LENGTH]
+        root, ext = os.path.splitext(filename)
+        self.url_name = f"{root}.{self.digest}{ext}"
+        self.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+        # Content-Encoding -> contenuto, in ordine di preferenza (None: originale)
+        self.variants: Dict[Optional[str], bytes] = {}
+        if len(data) >= Config.ASSETS_COMPRESS_MIN_SIZE and self.mimetype.startswith(COMPRESSIBLE_TYPES):
+            if brotli is not None:
+                self.variants['br'] = brotli.compress(data, quality=11)
+            self.variants['gzip'] = gzip.compress(data, compresslevel=9, mtime=0)
+        # Una variante compressa più grande dell'originale non serve
+        self.variants = {encoding: content for encoding, content in self.variants.items()
+                         if len(content) < len(data)}
+        self.variants[None] = data
+
+    def select(self, accepts: Callable[[str], bool]) -> Tuple[Optional[str], bytes]:
+        """Prima variante accettata dal client: (Content-Encoding o None, contenuto)"""
+        for encoding, content in self.variants.items():
+            if encoding is None or accepts(encoding):
+                return encoding, content
+        return None, self.variants[None]
+
+
+class AssetManifest:
+    """
+    Elenco delle risorse di static/ per nome e per nome con fingerprint
+    Tutti i file vengono letti all'avvio, così anche gli URL delle pagine
+    generate da un processo precedente restano validi; un file modificato
+    viene riletto (e cambia URL) al primo uso successivo.
+    """
+
+    def __init__(self, static_folder: str):
+        self.static_folder = static_folder
+        self._by_filename: Dict[str, Asset] = {}
+        self._by_url_name: Dict[str, Asset] = {}
+        self._lock = threading.Lock()
+        for directory, _, files in os.walk(static_folder):
+            for name in files:
+                filename = os.path.relpath(os.path.join(directory, name), static_folder)
+                self._load(filename.replace(os.sep, '/'))
+
+    def _load(self, filename: str) -> Asset:
+        """Legge (o rilegge) un file e aggiorna i due indici"""
+        asset = Asset(self.static_folder, filename)
+        with self._lock:
+            old = self._by_filename.get(filename)
+            if old is not None:
+                self._by_url_name.pop(old.url_name, None)
+            self._by_filename[filename] = asset
+            self._by_url_name[asset.url_name] = asset
+        return asset
+
+    def get(self, filename: str) -> Asset:
+        """Risorsa aggiornata di un file di static/; FileNotFoundError se manca"""
+        asset = self._by_filename.get(filename)
+        if asset is not None and os.stat(asset.path).st_mtime_ns == asset.mtime:
+            return asset
+        return self._load(filename)
+
+    def find(self, url_name: str) -> Optional[Asset]:
+        """Risorsa dal nome con fingerprint (None se sconosciuto o superato)"""
+        return self._by_url_name.get(url_name)
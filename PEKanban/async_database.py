@@ -0,0 +1,162 @@
+# async_database.py - Facciata asyncio per DatabaseManager
+# Espone gli stessi metodi di DatabaseManager come coroutine: le scritture
+# passano da un unico thread writer, le letture da un piccolo pool di thread
+
+import asyncio
+import functools
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from config import Config
+from database import DatabaseManager
+
+# Metodi di DatabaseManager eseguiti dal pool di lettori
+READ_METHODS = (
+    'get_schema_version',
+    'get_user_by_id',
+    'get_user_by_username',
+    'get_user_by_email',
+    'get_all_users',
+    'get_all_users_page',
+    'user_exists',
+    'is_first_user',
+    'authenticate_user',
+    'get_task_by_id',
+    'get_user_tasks',
+    'get_all_tasks',
+    'get_all_tasks_with_users',
+    'get_tasks_by_status',
+    'get_user_tasks_page',
+    'get_all_tasks_page',
+    'get_all_tasks_with_users_page',
+    'search_tasks',
+    'get_change_version',
+    'get_user_data_version',
+    'get_users_version',
+    'get_changes_since',
+    'get_task_events_since',
+    'get_archived_tasks_page',
+    'resolve_task_prefix',
+    'resolve_user_prefix',
+    'get_password_recovery_by_token',
+    'get_database_stats',
+    'get_task_count_by_status',
+    'get_backup_files',
+    'backup_database',
+    'create_backup',
+)
+
+# Metodi di DatabaseManager serializzati nel thread writer
+WRITE_METHODS = (
+    'create_user',
+    'update_user',
+    'set_user_role',
+    'delete_user',
+    'create_task',
+    'update_task',
+    'delete_task',
+    'delete_user_tasks',
+    'delete_user_and_tasks',
+    'delete_users',
+    'create_tasks_bulk',
+    'update_tasks_bulk',
+    'move_tasks_bulk',
+    'delete_tasks_bulk',
+    'create_password_recovery',
+    'update_password_recovery',
+    'cleanup_old_recovery_tokens',
+    'rebuild_counters',
+    'rebuild_search_index',
+    'compact_task_changes',
+    'archive_done_tasks',
+    'restore_archived_task',
+    'update_task_fields',
+    'queue_task_update',
+    'flush_writes',
+)
+
+
+class AsyncDatabaseManager:
+    """
+    Versione asincrona di DatabaseManager
+    Tutte le scritture vengono eseguite in ordine da un solo thread, quindi
+    non competono tra loro per il lock di scrittura di SQLite; le letture
+    girano in parallelo su un pool di thread. Una lettura avviata dopo che
+    una scrittura è stata attesa ne vede sempre il risultato.
+    """
+
+    def __init__(self, db_name: str = "database.db", readers: int = None):
+        self.readers = readers or Config.ASYNC_READER_THREADS
+        # Una connessione in sola lettura per ogni lettore
+        self.db = DatabaseManager(db_name, pool_size=self.readers)
+        self._closed = False
+
+        self._write_queue = queue.Queue()
+        self._writer = threading.Thread(target=self._writer_loop, name="db-writer", daemon=True)
+        self._writer.start()
+        self._reader_pool = ThreadPoolExecutor(max_workers=self.readers, thread_name_prefix="db-reader")
+
+    def _writer_loop(self):
+        """Esegue le scritture in coda una alla volta, nell'ordine di arrivo"""
+        while True:
+            job = self._write_queue.get()
+            if job is None:
+                break
+            future, method, args, kwargs = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(method(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+        self.db.release_connection()
+
+    def _check_open(self):
+        if self._closed:
+            raise RuntimeError("AsyncDatabaseManager è stato chiuso")
+
+    async def _read(self, name: str, args: tuple, kwargs: dict):
+        """Esegue un metodo di lettura nel pool di lettori"""
+        self._check_open()
+        method = functools.partial(getattr(self.db, name), *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._reader_pool, method)
+
+    async def _write(self, name: str, args: tuple, kwargs: dict):
+        """Accoda un metodo di scrittura al thread writer e ne attende il risultato"""
+        self._check_open()
+        future = Future()
+        self._write_queue.put((future, getattr(self.db, name), args, kwargs))
+        return await asyncio.wrap_future(future)
+
+    def _shutdown(self):
+        self._reader_pool.shutdown(wait=True)
+        self._write_queue.put(None)
+        self._writer.join()
+        self.db.close()
+
+    async def close(self):
+        """Completa le operazioni in corso e chiude le connessioni"""
+        if self._closed:
+            return
+        self._closed = True
+        await asyncio.get_running_loop().run_in_executor(None, self._shutdown)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+def _async_method(name: str, runner: str):
+    """Crea la coroutine che inoltra la chiamata al metodo omonimo di DatabaseManager"""
+    async def method(self, *args, **kwargs):
+        return await getattr(self, runner)(name, args, kwargs)
+    return functools.wraps(getattr(DatabaseManager, name))(method)
+
+
+for _name in READ_METHODS:
+    setattr(AsyncDatabaseManager, _name, _async_method(_name, '_read'))
+for _name in WRITE_METHODS:
+    setattr(AsyncDatabaseManager, _name, _async_method(_name, '_write'))
+del _name
@@ -0,0 +1,185 @@
+# backup.py - Backup a caldo del database con l'API di backup di SQLite
+# La copia avanza a blocchi di pagine con una pausa tra un blocco e l'altro,
+# così gli scrittori non restano bloccati; i backup possono essere compressi
+# con gzip, vengono ruotati e possono essere eseguiti periodicamente
+
+import glob
+import gzip
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Optional
+from config import Config
+
+# Livello di compressione gzip: su un database da 1 GB il livello 6 è 4 volte
+# più lento e riduce il file solo di un altro 10%
+GZIP_LEVEL = 1
+
+# Attesa prima di riprovare un backup periodico fallito (secondi)
+RETRY_DELAY = 300.0
+
+
+class BackupCancelled(Exception):
+    """Backup interrotto su richiesta (es. chiusura dell'applicazione)"""
+
+
+class _TooManyRestarts(Exception):
+    """La sorgente cambia troppo spesso per completare la copia a blocchi"""
+
+
+def _copy_pages(source: sqlite3.Connection, target_path: str, pages: int, pause: float,
+                max_restarts: int, should_stop: Optional[Callable[[], bool]]):
+    """
+    Copia source in target_path con Connection.backup
+    In modalità WAL la sorgente resta in una transazione di lettura per tutta
+    la copia: lo snapshot è coerente e gli scrittori non vengono mai bloccati.
+    Altrimenti il lock in lettura viene rilasciato alla fine di ogni passo e
+    la pausa tra i passi lascia spazio agli scrittori, ma ogni scrittura da
+    un'altra connessione fa ripartire la copia da capo: dopo max_restarts
+    ripartenze la copia viene fatta in un solo passo.
+    """
+    wal = source.execute("PRAGMA journal_mode").fetchone()[0].lower() == 'wal'
+    if wal:
+        source.execute("BEGIN")
+        source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+    state = {'remaining': None, 'restarts': 0}
+
+    def progress(status, remaining, total):
+        if should_stop is not None and should_stop():
+            raise BackupCancelled()
+        # remaining che risale: la copia è ripartita dalla prima pagina
+        if state['remaining'] is not None and remaining > state['remaining']:
+            state['restarts'] += 1
+            if state['restarts'] > max_restarts:
+                raise _TooManyRestarts()
+        state['remaining'] = remaining
+        if remaining and pause:
+            time.sleep(pause)
+
+    target = sqlite3.connect(target_path)
+    try:
+        try:
+            source.backup(target, pages=pages, progress=progress)
+        except _TooManyRestarts:
+            source.backup(target)
+    finally:
+        target.close()
+        if wal:
+            source.rollback()
+
+
+def _compress(source_path: str, target_path: str):
+    """Comprime source_path in target_path con gzip, a blocchi"""
+    with open(source_path, 'rb') as src, gzip.open(target_path, 'wb', compresslevel=GZIP_LEVEL) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def backup_to_file(db_name: str, dest_path: str, compress: bool = False, pages: int = None,
+                   pause: float = None, max_restarts: int = None,
+                   should_stop: Optional[Callable[[], bool]] = None):
+    """
+    Crea in dest_path una copia coerente del database db_name, anche mentre è in uso
+    Con compress il file è un database SQLite compresso con gzip. dest_path
+    compare solo a copia completata; solleva sqlite3.Error, OSError o
+    BackupCancelled (se should_stop() diventa vero durante la copia).
+    """
+    pages = pages or Config.BACKUP_PAGES_PER_STEP
+    pause = Config.BACKUP_STEP_PAUSE if pause is None else pause
+    max_restarts = Config.BACKUP_MAX_RESTARTS if max_restarts is None else max_restarts
+
+    partial_path = dest_path + '.part'
+    snapshot_path = dest_path + '.snapshot.part' if compress else partial_path
+    source = sqlite3.connect(db_name, timeout=Config.DATABASE_TIMEOUT)
+    try:
+        _remove_quietly(snapshot_path)
+        _copy_pages(source, snapshot_path, pages, pause, max_restarts, should_stop)
+        if compress:
+            _compress(snapshot_path, partial_path)
+            os.remove(snapshot_path)
+        os.replace(partial_path, dest_path)
+    except BaseException:
+        _remove_quietly(snapshot_path)
+        _remove_quietly(partial_path)
+        raise
+    finally:
+        source.close()
+
+
+def list_backups(directory: str, base_name: str) -> List[str]:
+    """Backup di base_name in directory (compressi e non), dal più vecchio al più recente"""
+    pattern = os.path.join(glob.escape(directory), glob.escape(base_name) + '_backup_*.db')
+    files = glob.glob(pattern) + glob.glob(pattern + '.gz')
+    # Il timestamp nel nome (create_backup_filename) ordina cronologicamente
+    return sorted(files, key=lambda path: os.path.basename(path).split('_backup_')[-1])
+
+
+def rotate_backups(directory: str, base_name: str, keep: int = None) -> List[str]:
+    """Elimina i backup più vecchi lasciandone keep; restituisce i file eliminati"""
+    keep = Config.MAX_BACKUP_FILES if keep is None else keep
+    files = list_backups(directory, base_name)
+    removed = []
+    for path in files[:max(0, len(files) - keep)]:
+        try:
+            os.remove(path)
+            removed.append(path)
+        except OSError:
+            pass
+    return removed
+
+
+class BackupScheduler:
+    """
+    Esegue db.create_backup() in un thread quando l'ultimo backup è più vecchio
+    di interval secondi. La scadenza è calcolata dai file già presenti, quindi
+    un'applicazione riavviata spesso non crea un backup a ogni avvio.
+    """
+
+    def __init__(self, db, interval: float = None):
+        self.db = db
+        self.interval = interval if interval is not None else Config.BACKUP_INTERVAL_HOURS * 3600
+        self._last_attempt = None
+        self._condition = threading.Condition()
+        self._stopped = False
+
+        self._thread = threading.Thread(target=self._run, name="db-backup", daemon=True)
+        self._thread.start()
+
+    def _seconds_until_due(self) -> float:
+        """Secondi che mancano al prossimo backup (<= 0: da fare subito)"""
+        backups = self.db.get_backup_files()
+        due = os.path.getmtime(backups[-1]) + self.interval if backups else 0.0
+        if self._last_attempt is not None:
+            due = max(due, self._last_attempt + min(self.interval, RETRY_DELAY))
+        return due - time.time()
+
+    def _run(self):
+        """Thread dei backup periodici"""
+        while True:
+            with self._condition:
+                delay = self._seconds_until_due()
+                while not self._stopped and delay > 0:
+                    self._condition.wait(delay)
+                    delay = self._seconds_until_due()
+                if self._stopped:
+                    break
+            self._last_attempt = time.time()
+            self.db.create_backup(should_stop=lambda: self._stopped)
+        self.db.release_connection()
+
+    def stop(self):
+        """Ferma il thread, interrompendo un backup in corso"""
+        with self._condition:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join()
@@ -0,0 +1,42 @@
+# bench_drag_drop.py - Throughput di uno spostamento di task (get + update)
+# Ogni operazione è quella del drag-and-drop della board: get_task_by_id,
+# cambio di stato e update_task con il proprio commit, su task casuali
+#   python benchmarks/bench_drag_drop.py --tasks 1000
+#   python benchmarks/bench_drag_drop.py --tasks 100000
+
+import random
+import sqlite3
+import time
+from dataset import argument_parser, generate, dataset_path, use_source, working_copy
+
+
+def main():
+    parser = argument_parser("Operazioni di drag-and-drop al secondo su un database su file")
+    parser.add_argument("--tasks", type=int, default=100000, help="task nel database (default: %(default)s)")
+    parser.add_argument("--ops", type=int, default=3000, help="operazioni misurate (default: %(default)s)")
+    args = parser.parse_args()
+
+    use_source(args.src)
+    from database import DatabaseManager
+
+    path = working_copy(generate(dataset_path(args, args.tasks, 1), args.tasks, 1, args.seed, args.fresh))
+    conn = sqlite3.connect(path)
+    task_ids = [row[0] for row in conn.execute("SELECT task_id FROM tasks")]
+    conn.close()
+    rng = random.Random(args.seed)
+    sample = [rng.choice(task_ids) for _ in range(args.ops)]
+
+    db = DatabaseManager(path)
+    start = time.perf_counter()
+    for task_id in sample:
+        task = db.get_task_by_id(task_id)
+        task.update_status("Doing" if task.status == "To Do" else "To Do")
+        db.update_task(task)
+    elapsed = time.perf_counter() - start
+    db.close()
+
+    print(f"{args.tasks} task, {args.ops} operazioni: {args.ops / elapsed:.0f} op/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# bench_login.py - Login al secondo con e senza la cache degli utenti
+# Ogni thread chiama authenticate_user su utenti scelti a caso; --no-cache
+# imposta USER_CACHE_SIZE = 0 (sulle versioni senza cache non cambia nulla)
+#   python benchmarks/bench_login.py --threads 1 8
+#   python benchmarks/bench_login.py --threads 1 8 --no-cache
+
+import random
+import threading
+import time
+from dataset import PASSWORD, argument_parser, generate, dataset_path, use_source
+
+
+def main():
+    parser = argument_parser("Chiamate ad authenticate_user al secondo")
+    parser.add_argument("--users", type=int, default=200, help="utenti nel database (default: %(default)s)")
+    parser.add_argument("--logins", type=int, default=20000, help="login per misura (default: %(default)s)")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8],
+                        help="numero di thread, una misura per valore (default: 1 8)")
+    parser.add_argument("--no-cache", action="store_true", help="disattiva la cache degli utenti")
+    args = parser.parse_args()
+
+    use_source(args.src)
+    from config import Config
+    from database import DatabaseManager
+    if args.no_cache:
+        Config.USER_CACHE_SIZE = 0
+
+    path = generate(dataset_path(args, 0, args.users), 0, args.users, args.seed, args.fresh)
+    db = DatabaseManager(path)
+
+    for threads in args.threads:
+        per_thread = args.logins // threads
+        failures = []
+
+        def login(index: int):
+            rng = random.Random(args.seed + index)
+            failed = 0
+            for _ in range(per_thread):
+                if db.authenticate_user(f"user{rng.randrange(args.users)}", PASSWORD) is None:
+                    failed += 1
+            failures.append(failed)
+            if hasattr(db, "release_connection"):
+                db.release_connection()
+
+        workers = [threading.Thread(target=login, args=(i,)) for i in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        line = f"{threads} thread: {per_thread * threads / elapsed:,.0f} login/s"
+        if sum(failures):
+            line += f", {sum(failures)} falliti"
+        print(line)
+
+    cache = getattr(db, "user_cache", None)
+    if cache is not None and cache.enabled:
+        print(f"hit rate della cache: {cache.stats()['hit_rate']:.0%}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# bench_model_memory.py - Memoria trattenuta dagli oggetti Task di get_all_tasks
+# Misura con tracemalloc la memoria ancora allocata dopo get_all_tasks
+# (cioè quella della lista di Task restituita) e, in un'esecuzione separata
+# senza tracemalloc, il tempo della chiamata
+#   python benchmarks/bench_model_memory.py --tasks 1000000
+
+import gc
+import sys
+import time
+import tracemalloc
+from dataset import argument_parser, generate, dataset_path, use_source
+
+
+def main():
+    parser = argument_parser("Memoria per task trattenuta da get_all_tasks")
+    parser.add_argument("--tasks", type=int, default=1000000, help="task nel database (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="ripetizioni per il tempo (default: %(default)s)")
+    args = parser.parse_args()
+
+    use_source(args.src)
+    from database import DatabaseManager
+
+    path = generate(dataset_path(args, args.tasks, 1), args.tasks, 1, args.seed, args.fresh)
+    db = DatabaseManager(path)
+
+    timings = []
+    for _ in range(args.repeat):
+        gc.collect()
+        start = time.perf_counter()
+        tasks = db.get_all_tasks()
+        timings.append(time.perf_counter() - start)
+        del tasks
+
+    gc.collect()
+    tracemalloc.start()
+    tasks = db.get_all_tasks()
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    task = tasks[0]
+    object_size = sys.getsizeof(task)
+    if hasattr(task, "__dict__"):
+        object_size += sys.getsizeof(task.__dict__)
+
+    print(f"get_all_tasks, {len(tasks)} task: {min(timings):.2f} s (minimo di {args.repeat})")
+    print(f"memoria trattenuta: {retained / 1e6:.0f} MB, {retained / len(tasks):.0f} B/task "
+          f"(picco {peak / 1e6:.0f} MB)")
+    print(f"oggetto Task senza attributi: {object_size} B")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# bench_read_write.py - Letture e scritture concorrenti sullo stesso database
+# I lettori chiamano get_user_tasks e la prima pagina admin dei task; gli
+# scrittori alternano create_task e update_task_fields. Ogni esecuzione parte
+# da una copia del database generato, in modalità WAL
+#   python benchmarks/bench_read_write.py --readers 8 --writers 2
+#   python benchmarks/bench_read_write.py --readers 0 --writers 8
+
+import random
+import sqlite3
+import threading
+import time
+from dataset import argument_parser, generate, dataset_path, use_source, working_copy
+
+
+def main():
+    parser = argument_parser("Throughput e latenza delle scritture con lettori concorrenti")
+    parser.add_argument("--tasks", type=int, default=200000, help="task nel database (default: %(default)s)")
+    parser.add_argument("--users", type=int, default=100, help="utenti nel database (default: %(default)s)")
+    parser.add_argument("--readers", type=int, default=4, help="thread lettori (default: %(default)s)")
+    parser.add_argument("--writers", type=int, default=4, help="thread scrittori (default: %(default)s)")
+    parser.add_argument("--duration", type=float, default=10.0, help="secondi di misura (default: %(default)s)")
+    parser.add_argument("--pool-size", type=int, help="dimensione del pool (default: Config.DATABASE_POOL_SIZE)")
+    args = parser.parse_args()
+
+    use_source(args.src)
+    from database import DatabaseManager
+    from model import Task
+
+    path = working_copy(generate(dataset_path(args, args.tasks, args.users),
+                                 args.tasks, args.users, args.seed, args.fresh))
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    user_ids = [row[0] for row in conn.execute("SELECT user_id FROM principals")]
+    task_ids = [row[0] for row in conn.execute("SELECT task_id FROM tasks")]
+    conn.close()
+
+    options = {"pool_size": args.pool_size} if args.pool_size else {}
+    db = DatabaseManager(path, **options)
+    stop = threading.Event()
+    reads, writes, failures, latencies = [], [], [], []
+
+    def reader(index: int):
+        rng = random.Random(args.seed + index)
+        count = 0
+        while not stop.is_set():
+            db.get_user_tasks(rng.choice(user_ids))
+            db.get_all_tasks_with_users_page()
+            count += 2
+        reads.append(count)
+        db.release_connection()
+
+    def writer(index: int):
+        rng = random.Random(args.seed + 1000 + index)
+        count = failed = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            if count % 2:
+                ok = db.create_task(Task("Nuovo task", "Scritto dal benchmark", rng.choice(user_ids)))
+            else:
+                ok = db.update_task_fields(rng.choice(task_ids), status=rng.choice(Task.VALID_STATUSES))
+            latencies.append(time.perf_counter() - start)
+            count += 1
+            failed += not ok
+        writes.append(count)
+        failures.append(failed)
+        db.release_connection()
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    db.close()
+
+    line = (f"{args.readers} lettori / {args.writers} scrittori: letture {sum(reads) / args.duration:.0f}/s, "
+            f"scritture {sum(writes) / args.duration:.0f}/s, fallite {sum(failures)}")
+    if latencies:
+        latencies.sort()
+        line += (f", latenza scrittura p50 {latencies[len(latencies) // 2] * 1e3:.2f} ms"
+                 f" p99 {latencies[int(len(latencies) * 0.99)] * 1e3:.1f} ms"
+                 f" max {latencies[-1] * 1e3:.0f} ms")
+    print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# bench_timestamps.py - Costo della lettura dei task e delle loro date
+# Separa il tempo di SQLite (fetchall), la conversione delle righe in Task
+# con e senza accesso a created_at, get_all_tasks completo, una scansione
+# per intervallo di created_at senza indice e la dimensione del file
+#   python benchmarks/bench_timestamps.py --tasks 100000
+
+import gc
+import os
+import sqlite3
+import time
+from dataset import argument_parser, generate, dataset_path, use_source
+
+
+def best_of(function, repeat: int) -> float:
+    """Tempo minimo in millisecondi su repeat esecuzioni, con il GC fermo"""
+    gc.collect()
+    gc.disable()
+    try:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return min(timings) * 1000
+
+
+def main():
+    parser = argument_parser("Lettura e decodifica dei task e delle loro date")
+    parser.add_argument("--tasks", type=int, default=100000, help="task nel database (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=12, help="ripetizioni per misura (default: %(default)s)")
+    args = parser.parse_args()
+
+    use_source(args.src)
+    from database import DatabaseManager
+    from model import Task
+
+    path = generate(dataset_path(args, args.tasks, 1), args.tasks, 1, args.seed, args.fresh)
+    db = DatabaseManager(path)
+    # Il mapper dipende dalla versione: from_row o il vecchio _row_to_task
+    to_task = Task.from_row if hasattr(Task, "from_row") else db._row_to_task
+
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    query = "SELECT * FROM tasks ORDER BY created_at DESC"
+    rows = conn.execute(query).fetchall()
+    middle = sorted(row["created_at"] for row in rows)[len(rows) // 2]
+
+    print(f"fetchall {len(rows)} righe       {best_of(lambda: conn.execute(query).fetchall(), args.repeat):7.0f} ms")
+    print(f"righe -> Task              {best_of(lambda: [to_task(row) for row in rows], args.repeat):7.0f} ms")
+    print(f"righe -> Task + created_at {best_of(lambda: [to_task(row).created_at for row in rows], args.repeat):7.0f} ms")
+    print(f"get_all_tasks              {best_of(db.get_all_tasks, args.repeat):7.0f} ms")
+    range_scan = lambda: conn.execute(
+        "SELECT COUNT(*) FROM tasks NOT INDEXED WHERE created_at >= ?", (middle,)).fetchone()
+    print(f"intervallo senza indice    {best_of(range_scan, args.repeat):7.1f} ms")
+    print(f"dimensione del database    {os.path.getsize(path) / 1e6:7.1f} MB")
+    conn.close()
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
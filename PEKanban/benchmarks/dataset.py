@@ -0,0 +1,118 @@
+# dataset.py - Database di prova e opzioni comuni dei benchmark
+# Ogni benchmark importa il codice da misurare dalla cartella indicata con
+# --src (default: questa copia di PEKanban). Per confrontare due versioni si
+# esegue lo stesso script sulla versione precedente, ad esempio:
+#   git worktree add /tmp/prima <commit>~
+#   python benchmarks/bench_drag_drop.py --src /tmp/prima/PEKanban
+#   python benchmarks/bench_drag_drop.py
+
+import argparse
+import hashlib
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SOURCE = os.path.dirname(BENCHMARKS_DIR)
+
+# Password di tutti gli utenti generati (usata dai benchmark di login)
+PASSWORD = "password1"
+STATUSES = ["To Do", "Doing", "Done"]
+
+# Task inseriti per transazione quando il codice misurato ha create_tasks_bulk
+BULK_CHUNK = 5000
+
+
+def argument_parser(description: str) -> argparse.ArgumentParser:
+    """Parser con le opzioni comuni: codice da misurare, cartella dei dati, seme"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--src", default=DEFAULT_SOURCE,
+                        help="cartella PEKanban da misurare (default: %(default)s)")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "pekanban-bench"),
+                        help="cartella dei database generati (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=1,
+                        help="seme del generatore casuale (default: %(default)s)")
+    parser.add_argument("--fresh", action="store_true",
+                        help="rigenera il database anche se esiste già")
+    return parser
+
+
+def use_source(src: str):
+    """
+    Rende importabili config, database e model della cartella src
+    I job in background (backup, archiviazione, pulizia token) vengono
+    disattivati prima di creare il DatabaseManager: falserebbero le misure
+    """
+    src = os.path.abspath(src)
+    if not os.path.exists(os.path.join(src, "database.py")):
+        raise SystemExit(f"{src} non contiene database.py")
+    sys.path.insert(0, src)
+    from config import Config
+    Config.AUTO_BACKUP_ENABLED = False
+    Config.AUTO_ARCHIVE_ENABLED = False
+    Config.TOKEN_CLEANUP_ENABLED = False
+
+
+def dataset_path(args, tasks: int, users: int) -> str:
+    """
+    Percorso del database generato per il codice in args.src
+    Versioni diverse del codice hanno schemi diversi, quindi ognuna ha il suo file
+    """
+    source_id = hashlib.sha1(os.path.abspath(args.src).encode()).hexdigest()[:8]
+    os.makedirs(args.data_dir, exist_ok=True)
+    return os.path.join(args.data_dir, f"{source_id}_{users}u_{tasks}t_s{args.seed}.db")
+
+
+def remove_database(path: str):
+    """Elimina un database con gli eventuali file -wal e -shm"""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def generate(path: str, tasks: int, users: int = 1, seed: int = 1, fresh: bool = False) -> str:
+    """
+    Crea con il DatabaseManager del codice misurato un database con `users`
+    utenti (user0, user1, ... con password PASSWORD) e `tasks` task
+    distribuiti a turno tra gli utenti, con stato casuale ma riproducibile
+    Un database già generato viene riusato, salvo fresh=True
+    """
+    if os.path.exists(path) and not fresh:
+        return path
+    remove_database(path)
+
+    from database import DatabaseManager
+    from model import Task, User
+
+    rng = random.Random(seed)
+    db = DatabaseManager(path)
+    user_ids = []
+    for i in range(users):
+        user = User(f"user{i}", f"user{i}@example.com", PASSWORD)
+        if not db.create_user(user):
+            raise RuntimeError(f"Creazione dell'utente user{i} fallita")
+        user_ids.append(user.user_id)
+
+    def make_task(i: int) -> Task:
+        return Task(f"Task numero {i}", f"Descrizione del task di prova numero {i}",
+                    user_ids[i % users], status=rng.choice(STATUSES))
+
+    # Le versioni senza create_tasks_bulk inseriscono un task per transazione
+    if hasattr(db, "create_tasks_bulk"):
+        for start in range(0, tasks, BULK_CHUNK):
+            db.create_tasks_bulk([make_task(i) for i in range(start, min(start + BULK_CHUNK, tasks))])
+    else:
+        for i in range(tasks):
+            db.create_task(make_task(i))
+    db.close()
+    return path
+
+
+def working_copy(path: str) -> str:
+    """Copia di un database generato, per i benchmark che lo modificano"""
+    copy = path[:-3] + "_run.db"
+    remove_database(copy)
+    shutil.copyfile(path, copy)
+    return copy
@@ -10,11 +10,27 @@ class Config:
     # Database
     DATABASE_NAME = "database.db"
     DATABASE_BACKUP_DIR = "backups"
+    DATABASE_POOL_SIZE = 8         # connessioni in sola lettura (le scritture ne usano una sola)
+    DATABASE_WAL = True            # journal WAL: letture e scrittura non si bloccano a vicenda
+    DATABASE_TIMEOUT = 30.0
+    ASYNC_READER_THREADS = 4
+    
+    # Write-behind: aggiornamenti dei task scritti in blocco (group commit)
+    WRITE_BEHIND_ENABLED = False
+    WRITE_BEHIND_INTERVAL = 0.005  # secondi massimi di attesa prima del flush
+    WRITE_BEHIND_MAX_OPS = 100     # operazioni in coda che forzano un flush
+    
+    # Cache dei principal (ricerche per id, username ed email)
+    USER_CACHE_SIZE = 1024         # voci massime (0 = cache disattivata)
+    USER_CACHE_TTL = 60.0          # secondi di validità di una voce
     
     # Sicurezza
     MIN_PASSWORD_LENGTH = 6
     RECOMMENDED_PASSWORD_LENGTH = 8
     TOKEN_EXPIRY_HOURS = 1
+    TOKEN_CLEANUP_ENABLED = True
+    TOKEN_CLEANUP_INTERVAL_MINUTES = 15
+    TOKEN_CLEANUP_BATCH_SIZE = 500   # token eliminati per transazione
     
     # Interfaccia utente
     MENU_WIDTH = 60
@@ -26,6 +42,42 @@ class Config:
     VALID_TASK_STATUSES = ["To Do", "Doing", "Done"]
     DEFAULT_TASK_STATUS = "To Do"
     
+    # Paginazione (cursore)
+    DEFAULT_PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 500
+    
+    # ID abbreviati (prefissi degli UUID)
+    SHORT_ID_LENGTH = 8            # lunghezza minima mostrata nelle tabelle
+    ID_PREFIX_MIN_LENGTH = 4       # caratteri minimi accettati in input
+    ID_PREFIX_MAX_MATCHES = 5      # corrispondenze elencate per un prefisso ambiguo
+    
+    # Archivio dei task completati
+    AUTO_ARCHIVE_ENABLED = False   # sposta i task degli utenti: va attivata esplicitamente
+    ARCHIVE_AFTER_DAYS = 30        # giorni senza modifiche prima di archiviare un task Done
+    ARCHIVE_BATCH_SIZE = 500       # task spostati per transazione
+    ARCHIVE_BATCH_PAUSE = 0.1      # secondi di pausa tra le transazioni (gli scrittori procedono)
+    ARCHIVE_INTERVAL_HOURS = 6
+    
+    # Registro delle modifiche ai task (sincronizzazione incrementale)
+    CHANGES_PAGE_SIZE = 200
+    CHANGES_RETENTION_DAYS = 7     # oltre, i client fermi devono ricaricare tutto
+    
+    # Eventi in tempo reale dell'interfaccia web (Server-Sent Events)
+    EVENTS_POLL_INTERVAL = 0.5     # secondi tra due letture del registro delle modifiche
+    EVENTS_QUEUE_SIZE = 256        # eventi in attesa per client prima di chiedergli di ricaricare
+    EVENTS_KEEPALIVE = 15.0        # secondi di silenzio prima di un commento keepalive
+    EVENTS_MAX_CATCHUP = 1000      # modifiche recuperate per un client che si ricollega
+    
+    # Risorse statiche dell'interfaccia web (URL con fingerprint)
+    ASSETS_MAX_AGE = 31536000      # secondi di cache nel browser (un anno, immutabile)
+    ASSETS_HASH_LENGTH = 12        # caratteri dell'hash SHA-256 nel nome del file
+    ASSETS_COMPRESS_MIN_SIZE = 512 # byte minimi per le varianti gzip e brotli
+    
+    # Ricerca full-text
+    SEARCH_PAGE_SIZE = 20
+    SEARCH_MAX_CANDIDATES = 300    # corrispondenze più recenti ordinate per rilevanza
+    SEARCH_SNIPPET_TOKENS = 12     # token per frammento di testo nei risultati
+    
     # Utenti - Nessun admin predefinito, il primo utente registrato diventa admin
     
     # Logging
@@ -35,6 +87,11 @@ class Config:
     # Backup
     AUTO_BACKUP_ENABLED = True
     MAX_BACKUP_FILES = 5
+    BACKUP_INTERVAL_HOURS = 24
+    BACKUP_COMPRESS = False        # backup .db.gz invece di .db
+    BACKUP_PAGES_PER_STEP = 256    # pagine copiate per passo dell'API di backup
+    BACKUP_STEP_PAUSE = 0.005      # secondi di pausa tra i passi (gli scrittori procedono)
+    BACKUP_MAX_RESTARTS = 3        # ripartenze per scritture concorrenti prima di copiare in un passo
     
     # Validazione
     USERNAME_MIN_LENGTH = 3
@@ -153,6 +210,8 @@ class TestConfig(Config):
     DATABASE_NAME = "database_test.db"
     ENABLE_DEBUG_LOGGING = True
     AUTO_BACKUP_ENABLED = False
+    AUTO_ARCHIVE_ENABLED = False
+    TOKEN_CLEANUP_ENABLED = False
 
 # Configurazione attiva (può essere cambiata in base all'ambiente)
 ACTIVE_CONFIG = Config
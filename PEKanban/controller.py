@@ -24,6 +24,8 @@ class TaskboardController:
                 self._handle_main_menu()
             else:
                 self._handle_user_menu()
+        
+        self.db.close()
     
     def _handle_main_menu(self):
         """Gestisce il menu principale (non autenticato)"""
@@ -193,6 +195,35 @@ class TaskboardController:
             self.is_running = False
             self.view.show_success_message("Arrivederci!")
     
+    def _resolve_task(self, task_id: str, user_id: str = None) -> Optional[Task]:
+        """
+        Risolve un ID task completo o abbreviato (tra i task di user_id se indicato)
+        Mostra un errore se il task non esiste o se il prefisso è ambiguo
+        """
+        if not task_id:
+            return None
+        matches = self.db.resolve_task_prefix(task_id, user_id=user_id)
+        if len(matches) > 1:
+            self.view.show_ambiguous_id(task_id, matches)
+            return None
+        task = self.db.get_task_by_id(matches[0]) if matches else None
+        if not task:
+            self.view.show_error_message("Task non trovato o non autorizzato.")
+        return task
+    
+    def _resolve_user(self, user_id: str) -> Optional[User]:
+        """Risolve un ID utente completo o abbreviato; mostra un errore se non trovato o ambiguo"""
+        if not user_id:
+            return None
+        matches = self.db.resolve_user_prefix(user_id)
+        if len(matches) > 1:
+            self.view.show_ambiguous_id(user_id, matches)
+            return None
+        user = self.db.get_user_by_id(matches[0]) if matches else None
+        if not user:
+            self.view.show_error_message("Utente non trovato.")
+        return user
+    
     def _show_user_tasks(self):
         """Mostra i task dell'utente corrente"""
         tasks = self.db.get_user_tasks(self.current_user.user_id)
@@ -228,9 +259,8 @@ class TaskboardController:
         self.view.display_tasks(tasks, "SELEZIONA TASK DA MODIFICARE")
         task_id = self.view.get_task_id("Inserisci l'ID del task da modificare")
         
-        task = self.db.get_task_by_id(task_id)
-        if not task or task.user_id != self.current_user.user_id:
-            self.view.show_error_message("Task non trovato o non autorizzato.")
+        task = self._resolve_task(task_id, self.current_user.user_id)
+        if not task:
             self.view.wait_for_input()
             return
         
@@ -259,9 +289,8 @@ class TaskboardController:
         self.view.display_tasks(tasks, "SELEZIONA TASK PER CAMBIARE STATO")
         task_id = self.view.get_task_id("Inserisci l'ID del task")
         
-        task = self.db.get_task_by_id(task_id)
-        if not task or task.user_id != self.current_user.user_id:
-            self.view.show_error_message("Task non trovato o non autorizzato.")
+        task = self._resolve_task(task_id, self.current_user.user_id)
+        if not task:
             self.view.wait_for_input()
             return
         
@@ -299,15 +328,14 @@ class TaskboardController:
         self.view.display_tasks(tasks, "SELEZIONA TASK DA ELIMINARE")
         task_id = self.view.get_task_id("Inserisci l'ID del task da eliminare")
         
-        task = self.db.get_task_by_id(task_id)
-        if not task or task.user_id != self.current_user.user_id:
-            self.view.show_error_message("Task non trovato o non autorizzato.")
+        task = self._resolve_task(task_id, self.current_user.user_id)
+        if not task:
             self.view.wait_for_input()
             return
         
         self.view.display_task_details(task)
         if self.view.confirm_action("Sei sicuro di voler eliminare questo task?"):
-            if self.db.delete_task(task_id):
+            if self.db.delete_task(task.task_id):
                 self.view.show_success_message("Task eliminato con successo!")
             else:
                 self.view.show_error_message("Errore durante l'eliminazione.")
@@ -357,10 +385,9 @@ class TaskboardController:
         self.view.display_users(users)
         
         user_id = self.view.get_user_id("Inserisci l'ID dell'utente da gestire")
-        user = self.db.get_user_by_id(user_id)
+        user = self._resolve_user(user_id)
         
         if not user:
-            self.view.show_error_message("Utente non trovato.")
             self.view.wait_for_input()
             return
         
@@ -403,10 +430,9 @@ class TaskboardController:
         self.view.display_users(users)
         
         user_id = self.view.get_user_id("Inserisci l'ID dell'utente da eliminare")
-        user = self.db.get_user_by_id(user_id)
+        user = self._resolve_user(user_id)
         
         if not user:
-            self.view.show_error_message("Utente non trovato.")
             self.view.wait_for_input()
             return
         
@@ -415,11 +441,11 @@ class TaskboardController:
             self.view.wait_for_input()
             return
         
-        user_tasks = self.db.get_user_tasks(user_id)
-        message = f"Eliminare {user.username} e tutti i suoi {len(user_tasks)} task?"
+        task_count = sum(self.db.get_task_count_by_status(user.user_id).values())
+        message = f"Eliminare {user.username} e tutti i suoi {task_count} task?"
         
         if self.view.confirm_action(message):
-            if self.db.delete_user_and_tasks(user_id):
+            if self.db.delete_user_and_tasks(user.user_id):
                 self.view.show_success_message(f"Utente {user.username} eliminato!")
             else:
                 self.view.show_error_message("Errore durante l'eliminazione.")
@@ -434,14 +460,13 @@ class TaskboardController:
         self.view.display_users(users)
         
         user_id = self.view.get_user_id("Inserisci l'ID dell'utente")
-        user = self.db.get_user_by_id(user_id)
+        user = self._resolve_user(user_id)
         
         if not user:
-            self.view.show_error_message("Utente non trovato.")
             self.view.wait_for_input()
             return
         
-        tasks = self.db.get_user_tasks(user_id)
+        tasks = self.db.get_user_tasks(user.user_id)
         if not tasks:
             self.view.show_error_message(f"{user.username} non ha task.")
             self.view.wait_for_input()
@@ -458,9 +483,9 @@ class TaskboardController:
         
         if choice == "1":
             task_id = self.view.get_task_id("Inserisci l'ID del task da modificare")
-            task = self.db.get_task_by_id(task_id)
+            task = self._resolve_task(task_id, user.user_id)
             
-            if task and task.user_id == user_id:
+            if task:
                 self.view.display_task_details(task)
                 title, description = self.view.get_task_update_data()
                 
@@ -472,14 +497,12 @@ class TaskboardController:
                         self.view.show_error_message("Errore durante l'aggiornamento.")
                 else:
                     self.view.show_info_message("Nessuna modifica effettuata.")
-            else:
-                self.view.show_error_message("Task non trovato.")
         
         elif choice == "2":
             task_id = self.view.get_task_id("Inserisci l'ID del task")
-            task = self.db.get_task_by_id(task_id)
+            task = self._resolve_task(task_id, user.user_id)
             
-            if task and task.user_id == user_id:
+            if task:
                 status_choice = self.view.show_task_statuses()
                 status_map = {"1": Task.STATUS_TODO, "2": Task.STATUS_DOING, "3": Task.STATUS_DONE}
                 
@@ -491,21 +514,17 @@ class TaskboardController:
                         self.view.show_error_message("Errore durante l'aggiornamento.")
                 else:
                     self.view.show_error_message("Scelta non valida.")
-            else:
-                self.view.show_error_message("Task non trovato.")
         
         elif choice == "3":
             task_id = self.view.get_task_id("Inserisci l'ID del task da eliminare")
-            task = self.db.get_task_by_id(task_id)
+            task = self._resolve_task(task_id, user.user_id)
             
-            if task and task.user_id == user_id:
+            if task:
                 if self.view.confirm_action("Eliminare questo task?"):
-                    if self.db.delete_task(task_id):
+                    if self.db.delete_task(task.task_id):
                         self.view.show_success_message("Task eliminato!")
                     else:
                         self.view.show_error_message("Errore durante l'eliminazione.")
-            else:
-                self.view.show_error_message("Task non trovato.")
         
         self.view.wait_for_input()
     
@@ -582,10 +601,9 @@ class TaskboardController:
         
         # Seleziona utente
         user_id = self.view.get_user_id("Inserisci l'ID dell'utente a cui assegnare il task")
-        user = self.db.get_user_by_id(user_id)
+        user = self._resolve_user(user_id)
         
         if not user:
-            self.view.show_error_message("Utente non trovato.")
             self.view.wait_for_input()
             return
         
@@ -602,7 +620,7 @@ class TaskboardController:
             return
         
         # Crea task assegnato all'utente specificato
-        task = Task(title, description or "", user_id)
+        task = Task(title, description or "", user.user_id)
         
         if self.db.create_task(task):
             self.view.show_success_message(f"Task '{title}' assegnato a {user.username} con successo!")
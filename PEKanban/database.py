@@ -3,332 +3,626 @@
 
 import sqlite3
 import os
-from typing import List, Optional
-from datetime import datetime
-from model import User, Task, Admin, PasswordRecovery
+import base64
+import json
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from urllib.parse import quote
+from typing import List, Optional, Tuple
+from datetime import datetime, timedelta
+from model import User, Task, PasswordRecovery, datetime_to_epoch, epoch_to_datetime
+from config import Config
+from migrations import (apply_migrations, get_schema_version, rebuild_counters, rebuild_search_index,
+                        compact_task_changes, ARCHIVE_COLUMNS)
+from search import SearchQuery, page_after
+from write_behind import WriteBehindQueue
+from user_cache import UserCache
+from backup import BackupCancelled, BackupScheduler, backup_to_file, list_backups, rotate_backups
+from maintenance import MaintenanceScheduler
+from utils import create_backup_filename
 
-class DatabaseManager:
-    """Classe per gestire tutte le operazioni del database SQLite3"""
+
+def encode_cursor(created_at, row_id: str) -> str:
+    """Codifica la chiave (created_at, id) dell'ultima riga in un cursore opaco"""
+    payload = json.dumps([created_at, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Decodifica un cursore; solleva ValueError se non è valido"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        # Solo valori confrontabili con le colonne (bool è una sottoclasse di int)
+        for value in (created_at, row_id):
+            if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+                raise ValueError(value)
+        return created_at, row_id
+    except (ValueError, TypeError) as e:
+        raise ValueError("Cursore di paginazione non valido") from e
+
+
+def open_connection(db_name: str, timeout: float = None, read_only: bool = False) -> sqlite3.Connection:
+    """
+    Apre una connessione configurata (righe accessibili per nome colonna)
+    In sola lettura il file è aperto con mode=ro e query_only, quindi una
+    scrittura per errore fallisce invece di prendere il lock di scrittura
+    """
+    timeout = timeout if timeout is not None else Config.DATABASE_TIMEOUT
+    if read_only:
+        uri = f"file:{quote(os.path.abspath(db_name))}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, timeout=timeout, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+    else:
+        conn = sqlite3.connect(db_name, timeout=timeout, check_same_thread=False)
+        # Le chiavi esterne (ON DELETE CASCADE) sono attive solo se richieste
+        conn.execute("PRAGMA foreign_keys = ON")
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+class ConnectionPool:
+    """
+    Pool di connessioni SQLite3 con riuso per thread
+    Ogni thread riceve sempre la stessa connessione; le connessioni dei
+    thread terminati vengono riassegnate, così il numero di connessioni
+    aperte non supera mai max_size
+    """
     
-    def __init__(self, db_name: str = "database.db"):
+    def __init__(self, db_name: str, max_size: int = None, timeout: float = None,
+                 read_only: bool = False):
         self.db_name = db_name
-        self.init_database()
+        self.max_size = max_size or Config.DATABASE_POOL_SIZE
+        self.timeout = timeout if timeout is not None else Config.DATABASE_TIMEOUT
+        self.read_only = read_only
+        self._lock = threading.Condition()
+        self._owners = {}  # ident del thread -> (thread, connessione)
+        self._idle = []
     
-    def get_connection(self) -> sqlite3.Connection:
-        """Crea e restituisce una connessione al database"""
-        conn = sqlite3.connect(self.db_name)
-        conn.row_factory = sqlite3.Row  # Permette accesso per nome colonna
-        return conn
+    def _connect(self) -> sqlite3.Connection:
+        """Apre una nuova connessione configurata"""
+        # check_same_thread=False: la connessione può passare a un altro
+        # thread, ma solo dopo che il proprietario precedente è terminato
+        return open_connection(self.db_name, self.timeout, self.read_only)
     
-    def init_database(self):
-        """Inizializza il database creando le tabelle necessarie"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Tabella Users (utenti standard)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id TEXT PRIMARY KEY,
-                    username TEXT UNIQUE NOT NULL,
-                    email TEXT UNIQUE NOT NULL,
-                    password_hash TEXT NOT NULL,
-                    token TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Tabella Admin (amministratori)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS admin (
-                    admin_id TEXT PRIMARY KEY,
-                    username TEXT UNIQUE NOT NULL,
-                    email TEXT UNIQUE NOT NULL,
-                    password_hash TEXT NOT NULL,
-                    token TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    permissions TEXT DEFAULT 'full'
-                )
-            ''')
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        """Verifica che una connessione sia ancora utilizzabile"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def _recycle(self, conn: sqlite3.Connection) -> sqlite3.Connection:
+        """Restituisce conn se sana, altrimenti la sostituisce"""
+        if self._is_healthy(conn):
+            return conn
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        return self._connect()
+    
+    def _reap_dead_threads(self):
+        """Sposta tra le idle le connessioni dei thread terminati"""
+        for ident, (thread, conn) in list(self._owners.items()):
+            if not thread.is_alive():
+                del self._owners[ident]
+                self._idle.append(conn)
+    
+    def acquire(self) -> sqlite3.Connection:
+        """Restituisce la connessione del thread corrente, creandola se serve"""
+        current = threading.current_thread()
+        ident = threading.get_ident()
+        
+        with self._lock:
+            owned = self._owners.get(ident)
+            if owned and owned[0] is current:
+                return owned[1]
             
-            # Tabella Tasks
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS tasks (
-                    task_id TEXT PRIMARY KEY,
-                    title TEXT NOT NULL,
-                    description TEXT,
-                    status TEXT NOT NULL DEFAULT 'To Do',
-                    user_id TEXT NOT NULL,
-                    user_type TEXT NOT NULL DEFAULT 'user',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+            deadline = time.monotonic() + self.timeout
+            while True:
+                self._reap_dead_threads()
+                
+                if self._idle:
+                    conn = self._recycle(self._idle.pop())
+                    break
+                if len(self._owners) < self.max_size:
+                    conn = self._connect()
+                    break
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise sqlite3.OperationalError(
+                        f"Pool di connessioni esaurito ({self.max_size} connessioni in uso)"
+                    )
+                # I thread terminati non notificano: ricontrolla periodicamente
+                self._lock.wait(min(remaining, 0.05))
             
-            # Tabella Password Recovery
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS password_recovery (
-                    recovery_id TEXT PRIMARY KEY,
-                    user_id TEXT NOT NULL,
-                    email TEXT NOT NULL,
-                    token TEXT NOT NULL,
-                    is_used INTEGER DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+            self._owners[ident] = (current, conn)
+            return conn
+    
+    def release(self):
+        """Rilascia esplicitamente la connessione del thread corrente"""
+        with self._lock:
+            owned = self._owners.pop(threading.get_ident(), None)
+            if owned:
+                self._idle.append(owned[1])
+                self._lock.notify()
+    
+    def close_all(self):
+        """Chiude tutte le connessioni del pool"""
+        with self._lock:
+            connections = [conn for _, conn in self._owners.values()] + self._idle
+            self._owners.clear()
+            self._idle.clear()
+            for conn in connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._lock.notify_all()
+    
+    def stats(self) -> dict:
+        """Restituisce lo stato corrente del pool"""
+        with self._lock:
+            return {
+                'max_size': self.max_size,
+                'in_use': len(self._owners),
+                'idle': len(self._idle)
+            }
+
+
+def _is_begin(sql: str) -> bool:
+    """Vero per un'istruzione BEGIN (apertura esplicita di una transazione)"""
+    return sql.lstrip()[:5].upper() == "BEGIN"
+
+
+class UnitCursor:
+    """Cursore di una UnitConnection: ignora BEGIN, il resto è invariato"""
+    
+    def __init__(self, cursor: sqlite3.Cursor):
+        self._cursor = cursor
+    
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+    
+    def __iter__(self):
+        return iter(self._cursor)
+    
+    def execute(self, sql: str, *args):
+        if not _is_begin(sql):
+            self._cursor.execute(sql, *args)
+        return self
+
+
+class UnitConnection:
+    """
+    Connessione di scrittura vista dalle letture dentro un'unità di lavoro
+    BEGIN, commit(), rollback() e il blocco with non toccano la transazione
+    dell'unità, che si chiude solo con end_unit
+    """
+    
+    def __init__(self, connection: sqlite3.Connection):
+        self._connection = connection
+    
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+    
+    def execute(self, sql: str, *args):
+        if _is_begin(sql):
+            return self._connection.cursor()
+        return self._connection.execute(sql, *args)
+    
+    def cursor(self) -> UnitCursor:
+        return UnitCursor(self._connection.cursor())
+    
+    def commit(self):
+        pass
+    
+    def rollback(self):
+        pass
+
+
+class SavepointConnection(UnitConnection):
+    """
+    Connessione di scrittura vista dai metodi dentro un'unità di lavoro
+    Ogni writer() è un savepoint della transazione dell'unità: commit()
+    conferma il savepoint e rollback() annulla solo le scritture del
+    metodo. Il commit vero avviene alla chiusura dell'unità
+    """
+    
+    def __init__(self, connection: sqlite3.Connection, name: str):
+        super().__init__(connection)
+        self._name = name
+    
+    def commit(self):
+        self._connection.execute(f"RELEASE {self._name}")
+        self._connection.execute(f"SAVEPOINT {self._name}")
+    
+    def rollback(self):
+        self._connection.execute(f"ROLLBACK TO {self._name}")
+
+
+class SerializedWriter:
+    """
+    Connessione unica per tutte le scritture, usata da un thread alla volta
+    Gli scrittori si mettono in coda su un lock invece di contendersi il
+    lock di scrittura di SQLite (attese del busy timeout ed errori
+    "database is locked"); il lock è rientrante. Un thread può aprire
+    un'unità di lavoro (begin_unit): fino a end_unit tiene la connessione
+    e tutte le sue scritture formano una sola transazione
+    """
+    
+    def __init__(self, db_name: str, timeout: float = None):
+        self.connection = open_connection(db_name, timeout)
+        self._lock = threading.RLock()
+        # Thread dell'unità di lavoro aperta e savepoint annidati
+        self._unit_owner = None
+        self._savepoints = 0
+    
+    def in_unit(self) -> bool:
+        """Vero se il thread corrente ha un'unità di lavoro aperta"""
+        return self._unit_owner == threading.get_ident()
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Riserva la connessione al thread corrente: commit all'uscita, rollback su eccezione
+        Dentro un'unità di lavoro la transazione è un savepoint (SavepointConnection)
+        """
+        with self._lock:
+            if not self.in_unit():
+                with self.connection:
+                    yield self.connection
+                return
             
-            conn.commit()
+            self._savepoints += 1
+            name = f"unit_{self._savepoints}"
+            self.connection.execute(f"SAVEPOINT {name}")
+            try:
+                yield SavepointConnection(self.connection, name)
+            except BaseException:
+                self._end_savepoint(name, rollback=True)
+                raise
+            else:
+                self._end_savepoint(name)
+            finally:
+                self._savepoints -= 1
     
+    def _end_savepoint(self, name: str, rollback: bool = False):
+        """Chiude un savepoint; se SQLite ha già annullato la transazione non c'è più"""
+        try:
+            if rollback:
+                self.connection.execute(f"ROLLBACK TO {name}")
+            self.connection.execute(f"RELEASE {name}")
+        except sqlite3.OperationalError:
+            if not rollback:
+                raise
     
-    def _row_to_user(self, row, is_admin=False) -> User:
-        """Converte una riga del database in oggetto User o Admin"""
-        if is_admin:
-            user = Admin.__new__(Admin)
-            user.user_id = row['admin_id']
-        else:
-            user = User.__new__(User)
-            user.user_id = row['user_id']
+    def begin_unit(self):
+        """Apre un'unità di lavoro del thread corrente (transazione unica fino a end_unit)"""
+        self._lock.acquire()
+        try:
+            if self._unit_owner is not None:
+                raise RuntimeError("Unità di lavoro già aperta in questo thread")
+            self.connection.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self._lock.release()
+            raise
+        self._unit_owner = threading.get_ident()
+    
+    def end_unit(self, commit: bool = True):
+        """Chiude l'unità di lavoro del thread corrente con commit o rollback"""
+        if not self.in_unit():
+            return
+        try:
+            if commit:
+                self.connection.commit()
+            else:
+                self.connection.rollback()
+        except sqlite3.Error:
+            self.connection.rollback()
+            raise
+        finally:
+            self._unit_owner = None
+            self._lock.release()
+    
+    def close(self):
+        """Chiude la connessione, dopo l'eventuale scrittura in corso"""
+        with self._lock:
+            self.connection.close()
+
+
+class DatabaseManager:
+    """Classe per gestire tutte le operazioni del database SQLite3"""
+    
+    # Numero massimo di parametri per singola query IN (...)
+    BULK_CHUNK_SIZE = 500
+    
+    def __init__(self, db_name: str = "database.db", pool_size: int = None):
+        self.db_name = db_name
+        # Scritture da un'unica connessione serializzata; letture da un pool
+        # di connessioni in sola lettura, una per thread. Un database
+        # :memory: esiste solo nella connessione che lo crea, quindi anche
+        # le letture usano la connessione di scrittura
+        self.writer_connection = SerializedWriter(db_name)
+        self.pool = None
+        if db_name != ":memory:":
+            self.pool = ConnectionPool(db_name, max_size=pool_size, read_only=True)
+        self.init_database()
         
-        user.username = row['username']
-        user.email = row['email']
-        user.password_hash = row['password_hash']
-        user.is_admin = is_admin
-        user.token = row['token']
-        user.created_at = datetime.fromisoformat(row['created_at']) if row['created_at'] else datetime.now()
+        # Cache dei principal per login e ricerche ripetute (0 = disattivata)
+        self.user_cache = UserCache()
+        # Utenti modificati nell'unità di lavoro aperta: vanno tolti dalla
+        # cache solo dopo il commit, altrimenti un altro thread potrebbe
+        # rimettervi la riga precedente
+        self._unit_invalidations = set()
         
-        return user
-    
-    def _row_to_task(self, row) -> Task:
-        """Converte una riga del database in oggetto Task"""
-        task = Task.__new__(Task)
-        task.task_id = row['task_id']
-        task.title = row['title']
-        task.description = row['description']
-        task.status = row['status']
-        task.user_id = row['user_id']
-        task.created_at = datetime.fromisoformat(row['created_at']) if row['created_at'] else datetime.now()
-        task.updated_at = datetime.fromisoformat(row['updated_at']) if row['updated_at'] else datetime.now()
+        # Coda write-behind per queue_task_update (disattivata di default)
+        self.write_behind = None
+        if Config.WRITE_BEHIND_ENABLED:
+            self.enable_write_behind()
         
-        return task
-    
-    def _row_to_password_recovery(self, row) -> PasswordRecovery:
-        """Converte una riga del database in oggetto PasswordRecovery"""
-        recovery = PasswordRecovery.__new__(PasswordRecovery)
-        recovery.recovery_id = row['recovery_id']
-        recovery.user_id = row['user_id']
-        recovery.email = row['email']
-        recovery.token = row['token']
-        recovery.is_used = bool(row['is_used'])
-        recovery.created_at = datetime.fromisoformat(row['created_at']) if row['created_at'] else datetime.now()
+        # Backup periodici in un thread (Config.AUTO_BACKUP_ENABLED)
+        self.backup_scheduler = None
+        if Config.AUTO_BACKUP_ENABLED and db_name != ":memory:":
+            self.start_backup_scheduler()
         
-        return recovery
+        # Lavori periodici in un thread (archiviazione, pulizia dei token)
+        self.maintenance = None
+        if Config.AUTO_ARCHIVE_ENABLED or Config.TOKEN_CLEANUP_ENABLED:
+            self.start_maintenance()
+    
+    def get_read_connection(self) -> sqlite3.Connection:
+        """Restituisce la connessione in sola lettura del thread corrente dal pool"""
+        # Dentro un'unità di lavoro si legge dalla connessione di scrittura:
+        # le letture vedono le scritture dell'unità e nessuno scrive nel mezzo
+        if self.writer_connection.in_unit():
+            return UnitConnection(self.writer_connection.connection)
+        if self.pool is None:
+            return self.writer_connection.connection
+        return self.pool.acquire()
+    
+    def writer(self):
+        """Context manager con la connessione di scrittura, riservata al thread corrente"""
+        return self.writer_connection.transaction()
+    
+    def begin_unit_of_work(self):
+        """
+        Apre un'unità di lavoro per il thread corrente (ad esempio una
+        richiesta web): fino a end_unit_of_work letture e scritture usano la
+        connessione di scrittura in una sola transazione, quindi un controllo
+        seguito da una scrittura non può essere superato da un altro thread.
+        Gli altri scrittori attendono la chiusura dell'unità.
+        """
+        # Il thread di flush della coda write-behind attende la connessione
+        # di scrittura: la coda va svuotata prima di prenderla
+        self._drain_write_behind()
+        self.writer_connection.begin_unit()
+        self._unit_invalidations = set()
+    
+    def end_unit_of_work(self, commit: bool = True):
+        """Chiude l'unità di lavoro del thread corrente con commit (o rollback)"""
+        if not self.writer_connection.in_unit():
+            return
+        invalidations, self._unit_invalidations = self._unit_invalidations, set()
+        committed = False
+        try:
+            self.writer_connection.end_unit(commit)
+            committed = commit
+        finally:
+            if committed:
+                for user_id in invalidations:
+                    self.user_cache.invalidate(user_id)
+            elif commit and invalidations:
+                # Commit fallito con esito incerto: meglio svuotare la cache
+                self.user_cache.clear()
+    
+    @contextmanager
+    def unit_of_work(self):
+        """Context manager per begin_unit_of_work/end_unit_of_work (rollback su eccezione)"""
+        self.begin_unit_of_work()
+        try:
+            yield
+        except BaseException:
+            self.end_unit_of_work(commit=False)
+            raise
+        self.end_unit_of_work()
+    
+    def release_connection(self):
+        """Restituisce al pool la connessione di lettura del thread corrente"""
+        if self.pool is not None:
+            self.pool.release()
+    
+    def init_database(self):
+        """Porta lo schema del database all'ultima versione (migrazioni) e attiva il WAL"""
+        with self.writer() as conn:
+            apply_migrations(conn)
+            # Con il WAL i lettori non bloccano lo scrittore e viceversa
+            if Config.DATABASE_WAL and self.db_name != ":memory:":
+                conn.execute("PRAGMA journal_mode = WAL")
+    
+    def get_schema_version(self) -> int:
+        """Restituisce la versione corrente dello schema"""
+        return get_schema_version(self.get_read_connection())
+    
     
     # CRUD Operations per Users
     def create_user(self, user: User) -> bool:
         """Crea un nuovo utente nel database"""
         try:
-            with self.get_connection() as conn:
+            with self.writer() as conn:
                 cursor = conn.cursor()
-                
-                if user.is_admin:
-                    # Inserisci nella tabella admin
-                    cursor.execute('''
-                        INSERT INTO admin (admin_id, username, email, password_hash, token, created_at, permissions)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        user.user_id,
-                        user.username,
-                        user.email,
-                        user.password_hash,
-                        user.token,
-                        user.created_at.isoformat(),
-                        'full'
-                    ))
-                else:
-                    # Inserisci nella tabella users
-                    cursor.execute('''
-                        INSERT INTO users (user_id, username, email, password_hash, token, created_at)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (
-                        user.user_id,
-                        user.username,
-                        user.email,
-                        user.password_hash,
-                        user.token,
-                        user.created_at.isoformat()
-                    ))
+                cursor.execute('''
+                    INSERT INTO principals (user_id, username, email, password_hash, token, created_at, role, permissions)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    user.user_id,
+                    user.username,
+                    user.email,
+                    user.password_hash,
+                    user.token,
+                    datetime_to_epoch(user.created_at),
+                    user.role,
+                    'full' if user.is_admin else None
+                ))
                 conn.commit()
                 return True
         except sqlite3.Error:
             return False
     
+    def _invalidate_user(self, user_id: str):
+        """Toglie un utente dalla cache, al commit se c'è un'unità di lavoro aperta"""
+        if self.writer_connection.in_unit():
+            self._unit_invalidations.add(user_id)
+        else:
+            self.user_cache.invalidate(user_id)
+    
+    def _get_user_by(self, field: str, value: str) -> Optional[User]:
+        """Cerca un principal per user_id, username o email passando dalla cache"""
+        if self.writer_connection.in_unit():
+            # Nell'unità si leggono anche righe non ancora confermate: non
+            # devono finire in cache, né essere nascoste da righe in cache
+            with self.get_read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"SELECT * FROM principals WHERE {field} = ?", (value,))
+                row = cursor.fetchone()
+            return User.from_row(row) if row is not None else None
+        row = self.user_cache.get(field, value)
+        if row is None:
+            generation = self.user_cache.generation
+            with self.get_read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"SELECT * FROM principals WHERE {field} = ?", (value,))
+                row = cursor.fetchone()
+            if row is None:
+                return None
+            self.user_cache.put(row, generation)
+        return User.from_row(row)
+    
     def get_user_by_id(self, user_id: str) -> Optional[User]:
-        """Recupera un utente per ID (cerca in entrambe le tabelle)"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Cerca prima nella tabella users
-            cursor.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
-            row = cursor.fetchone()
-            if row:
-                return self._row_to_user(row, is_admin=False)
-            
-            # Cerca nella tabella admin
-            cursor.execute("SELECT * FROM admin WHERE admin_id = ?", (user_id,))
-            row = cursor.fetchone()
-            if row:
-                return self._row_to_user(row, is_admin=True)
-            
-            return None
+        """Recupera un utente per ID"""
+        return self._get_user_by('user_id', user_id)
     
     def get_user_by_username(self, username: str) -> Optional[User]:
-        """Recupera un utente per username (cerca in entrambe le tabelle)"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Cerca prima nella tabella users
-            cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
-            row = cursor.fetchone()
-            if row:
-                return self._row_to_user(row, is_admin=False)
-            
-            # Cerca nella tabella admin
-            cursor.execute("SELECT * FROM admin WHERE username = ?", (username,))
-            row = cursor.fetchone()
-            if row:
-                return self._row_to_user(row, is_admin=True)
-            
-            return None
+        """Recupera un utente per username"""
+        return self._get_user_by('username', username)
     
     def get_user_by_email(self, email: str) -> Optional[User]:
-        """Recupera un utente per email (cerca in entrambe le tabelle)"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Cerca prima nella tabella users
-            cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
-            row = cursor.fetchone()
-            if row:
-                return self._row_to_user(row, is_admin=False)
-            
-            # Cerca nella tabella admin
-            cursor.execute("SELECT * FROM admin WHERE email = ?", (email,))
-            row = cursor.fetchone()
-            if row:
-                return self._row_to_user(row, is_admin=True)
-            
-            return None
+        """Recupera un utente per email"""
+        return self._get_user_by('email', email)
     
     def get_all_users(self) -> List[User]:
-        """Recupera tutti gli utenti (da entrambe le tabelle)"""
-        users = []
-        with self.get_connection() as conn:
+        """Recupera tutti gli utenti (standard e admin)"""
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute("SELECT * FROM principals ORDER BY created_at DESC")
+            rows = cursor.fetchall()
             
-            # Recupera utenti standard
-            cursor.execute("SELECT * FROM users ORDER BY created_at DESC")
-            user_rows = cursor.fetchall()
-            for row in user_rows:
-                users.append(self._row_to_user(row, is_admin=False))
-            
-            # Recupera admin
-            cursor.execute("SELECT * FROM admin ORDER BY created_at DESC")
-            admin_rows = cursor.fetchall()
-            for row in admin_rows:
-                users.append(self._row_to_user(row, is_admin=True))
-            
-            return users
+            return [User.from_row(row) for row in rows]
+    
+    def get_all_users_page(self, cursor: str = None, page_size: int = None, role: str = None,
+                           sort: str = 'created_at', descending: bool = True) -> Tuple[List[User], Optional[str]]:
+        """
+        Recupera una pagina di utenti (standard e admin), di default dal più recente
+        sort è 'created_at' o 'username' (entrambi indicizzati); role filtra
+        per ruolo. Restituisce (utenti, cursore della pagina successiva o None)
+        """
+        if sort not in ('created_at', 'username'):
+            raise ValueError(f"Ordinamento non valido: {sort}")
+        conditions, params = [], []
+        if role:
+            conditions.append("role = ?")
+            params.append(role)
+        rows, next_cursor = self._fetch_page(
+            "SELECT * FROM principals", conditions, params, (sort, 'user_id'), cursor, page_size,
+            descending=descending
+        )
+        return [User.from_row(row) for row in rows], next_cursor
     
     def update_user(self, user: User) -> bool:
-        """Aggiorna un utente esistente"""
+        """Aggiorna un utente esistente (incluso il ruolo)"""
         try:
-            with self.get_connection() as conn:
+            with self.writer() as conn:
                 cursor = conn.cursor()
-                
-                if user.is_admin:
-                    # Aggiorna nella tabella admin
-                    cursor.execute('''
-                        UPDATE admin
-                        SET username = ?, email = ?, password_hash = ?, token = ?
-                        WHERE admin_id = ?
-                    ''', (
-                        user.username,
-                        user.email,
-                        user.password_hash,
-                        user.token,
-                        user.user_id
-                    ))
-                else:
-                    # Aggiorna nella tabella users
-                    cursor.execute('''
-                        UPDATE users
-                        SET username = ?, email = ?, password_hash = ?, token = ?
-                        WHERE user_id = ?
-                    ''', (
-                        user.username,
-                        user.email,
-                        user.password_hash,
-                        user.token,
-                        user.user_id
-                    ))
+                cursor.execute('''
+                    UPDATE principals
+                    SET username = ?, email = ?, password_hash = ?, token = ?, role = ?,
+                        permissions = CASE WHEN ? = 'admin' THEN COALESCE(permissions, 'full') END
+                    WHERE user_id = ?
+                ''', (
+                    user.username,
+                    user.email,
+                    user.password_hash,
+                    user.token,
+                    user.role,
+                    user.role,
+                    user.user_id
+                ))
+                conn.commit()
+                self._invalidate_user(user.user_id)
+                return cursor.rowcount > 0
+        except sqlite3.Error:
+            return False
+    
+    def set_user_role(self, user_id: str, role: str) -> bool:
+        """Cambia il ruolo di un utente ('user' o 'admin') con un solo UPDATE"""
+        if role not in (User.ROLE_USER, User.ROLE_ADMIN):
+            return False
+        try:
+            with self.writer() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    UPDATE principals
+                    SET role = ?,
+                        permissions = CASE WHEN ? = 'admin' THEN COALESCE(permissions, 'full') END
+                    WHERE user_id = ?
+                ''', (role, role, user_id))
                 conn.commit()
+                self._invalidate_user(user_id)
                 return cursor.rowcount > 0
         except sqlite3.Error:
             return False
     
     def delete_user(self, user_id: str) -> bool:
-        """Elimina un utente (cerca in entrambe le tabelle)"""
+        """Elimina un utente (i suoi task vengono eliminati a cascata)"""
         try:
-            with self.get_connection() as conn:
+            with self.writer() as conn:
                 cursor = conn.cursor()
-                
-                # Prova a eliminare dalla tabella users
-                cursor.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
-                rows_affected = cursor.rowcount
-                
-                # Se non trovato, prova nella tabella admin
-                if rows_affected == 0:
-                    cursor.execute("DELETE FROM admin WHERE admin_id = ?", (user_id,))
-                    rows_affected = cursor.rowcount
-                
+                cursor.execute("DELETE FROM principals WHERE user_id = ?", (user_id,))
                 conn.commit()
-                return rows_affected > 0
+                self._invalidate_user(user_id)
+                return cursor.rowcount > 0
         except sqlite3.Error:
             return False
     
     def user_exists(self, username: str, email: str) -> bool:
-        """Verifica se un utente esiste già (username o email) in entrambe le tabelle"""
-        with self.get_connection() as conn:
+        """Verifica se un utente esiste già (username o email)"""
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
-            
-            # Controlla nella tabella users
-            cursor.execute(
-                "SELECT COUNT(*) FROM users WHERE username = ? OR email = ?",
-                (username, email)
-            )
-            user_count = cursor.fetchone()[0]
-            
-            # Controlla nella tabella admin
             cursor.execute(
-                "SELECT COUNT(*) FROM admin WHERE username = ? OR email = ?",
+                "SELECT EXISTS (SELECT 1 FROM principals WHERE username = ? OR email = ?)",
                 (username, email)
             )
-            admin_count = cursor.fetchone()[0]
-            
-            return (user_count + admin_count) > 0
+            return bool(cursor.fetchone()[0])
     
     def is_first_user(self) -> bool:
         """Verifica se questo è il primo utente che si registra"""
-        with self.get_connection() as conn:
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
-            
-            # Conta utenti in entrambe le tabelle
-            cursor.execute("SELECT COUNT(*) FROM users")
-            user_count = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM admin")
-            admin_count = cursor.fetchone()[0]
-            
-            return (user_count + admin_count) == 0
+            cursor.execute("SELECT NOT EXISTS (SELECT 1 FROM principals)")
+            return bool(cursor.fetchone()[0])
     
     def authenticate_user(self, username: str, password: str) -> Optional[User]:
         """Autentica un utente con username e password"""
@@ -341,7 +635,7 @@ class DatabaseManager:
     def create_task(self, task: Task) -> bool:
         """Crea un nuovo task nel database"""
         try:
-            with self.get_connection() as conn:
+            with self.writer() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT INTO tasks (task_id, title, description, status, user_id, created_at, updated_at)
@@ -352,65 +646,74 @@ class DatabaseManager:
                     task.description,
                     task.status,
                     task.user_id,
-                    task.created_at.isoformat(),
-                    task.updated_at.isoformat()
+                    datetime_to_epoch(task.created_at),
+                    datetime_to_epoch(task.updated_at)
                 ))
                 conn.commit()
                 return True
         except sqlite3.Error:
             return False
     
-    def get_task_by_id(self, task_id: str) -> Optional[Task]:
-        """Recupera un task per ID"""
-        with self.get_connection() as conn:
+    def _tasks_source(self, include_archived: bool) -> str:
+        """Tabella (o vista) da cui leggere i task"""
+        return "tasks_with_archive" if include_archived else "tasks"
+    
+    def _tasks_page_sources(self, include_archived: bool) -> list:
+        """Sorgenti dei task per _fetch_page, con le stesse colonne"""
+        if include_archived:
+            return [f"(SELECT {ARCHIVE_COLUMNS} FROM {table})" for table in ("tasks", "tasks_archive")]
+        return ["tasks"]
+    
+    def get_task_by_id(self, task_id: str, include_archived: bool = False) -> Optional[Task]:
+        """Recupera un task per ID (anche tra quelli archiviati con include_archived)"""
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,))
+            cursor.execute(f"SELECT * FROM {self._tasks_source(include_archived)} WHERE task_id = ?", (task_id,))
             row = cursor.fetchone()
             
             if row:
-                return self._row_to_task(row)
+                return Task.from_row(row)
             return None
     
-    def get_user_tasks(self, user_id: str) -> List[Task]:
+    def get_user_tasks(self, user_id: str, include_archived: bool = False) -> List[Task]:
         """Recupera tutti i task di un utente"""
-        with self.get_connection() as conn:
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                "SELECT * FROM tasks WHERE user_id = ? ORDER BY created_at DESC",
+                f"SELECT * FROM {self._tasks_source(include_archived)} WHERE user_id = ? ORDER BY created_at DESC",
                 (user_id,)
             )
             rows = cursor.fetchall()
             
-            return [self._row_to_task(row) for row in rows]
+            return [Task.from_row(row) for row in rows]
     
-    def get_all_tasks(self) -> List[Task]:
+    def get_all_tasks(self, include_archived: bool = False) -> List[Task]:
         """Recupera tutti i task"""
-        with self.get_connection() as conn:
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM tasks ORDER BY created_at DESC")
+            cursor.execute(f"SELECT * FROM {self._tasks_source(include_archived)} ORDER BY created_at DESC")
             rows = cursor.fetchall()
             
-            return [self._row_to_task(row) for row in rows]
+            return [Task.from_row(row) for row in rows]
     
-    def get_all_tasks_with_users(self) -> List[dict]:
+    def get_all_tasks_with_users(self, include_archived: bool = False) -> List[dict]:
         """Recupera tutti i task con informazioni sui proprietari"""
-        with self.get_connection() as conn:
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
+            cursor.execute(f'''
                 SELECT t.*,
-                       COALESCE(u.username, a.username) as owner_username,
-                       COALESCE(u.email, a.email) as owner_email,
-                       CASE WHEN a.admin_id IS NOT NULL THEN 1 ELSE 0 END as owner_is_admin
-                FROM tasks t
-                LEFT JOIN users u ON t.user_id = u.user_id
-                LEFT JOIN admin a ON t.user_id = a.admin_id
+                       p.username as owner_username,
+                       p.email as owner_email,
+                       CASE WHEN p.role = 'admin' THEN 1 ELSE 0 END as owner_is_admin
+                FROM {self._tasks_source(include_archived)} t
+                LEFT JOIN principals p ON t.user_id = p.user_id
                 ORDER BY t.created_at DESC
             ''')
             rows = cursor.fetchall()
             
             tasks_with_users = []
             for row in rows:
-                task = self._row_to_task(row)
+                task = Task.from_row(row)
                 task_dict = {
                     'task': task,
                     'owner_username': row['owner_username'],
@@ -421,29 +724,617 @@ class DatabaseManager:
             
             return tasks_with_users
     
-    def get_tasks_by_status(self, status: str, user_id: str = None) -> List[Task]:
+    def get_tasks_by_status(self, status: str, user_id: str = None,
+                            include_archived: bool = False) -> List[Task]:
         """Recupera task per stato, opzionalmente filtrati per utente"""
-        with self.get_connection() as conn:
+        source = self._tasks_source(include_archived)
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
             
             if user_id:
                 cursor.execute(
-                    "SELECT * FROM tasks WHERE status = ? AND user_id = ? ORDER BY created_at DESC",
+                    f"SELECT * FROM {source} WHERE status = ? AND user_id = ? ORDER BY created_at DESC",
                     (status, user_id)
                 )
             else:
                 cursor.execute(
-                    "SELECT * FROM tasks WHERE status = ? ORDER BY created_at DESC",
+                    f"SELECT * FROM {source} WHERE status = ? ORDER BY created_at DESC",
                     (status,)
                 )
             
             rows = cursor.fetchall()
-            return [self._row_to_task(row) for row in rows]
+            return [Task.from_row(row) for row in rows]
+    
+    # Paginazione a cursore (keyset) sui task
+    def _fetch_page(self, select_sql: str, conditions: list, params: list,
+                    order_columns: tuple, cursor: str = None, page_size: int = None,
+                    sources: list = None, descending: bool = True) -> tuple:
+        """
+        Esegue select_sql filtrato da conditions e ordinato per order_columns
+        (es. created_at, id), decrescente o crescente, partendo dalla chiave nel cursore
+        Con sources, select_sql contiene {source} e la pagina unisce le
+        pagine lette da ciascuna sorgente
+        Restituisce (righe, cursore successivo o None)
+        """
+        page_size = max(1, min(page_size or Config.DEFAULT_PAGE_SIZE, Config.MAX_PAGE_SIZE))
+        created_column, id_column = order_columns
+        conditions = list(conditions)
+        params = list(params)
+        
+        if cursor:
+            conditions.append(f"({created_column}, {id_column}) {'<' if descending else '>'} (?, ?)")
+            params.extend(decode_cursor(cursor))
+        
+        direction = "DESC" if descending else "ASC"
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        order = f"ORDER BY {created_column} {direction}, {id_column} {direction} LIMIT ?"
+        # Una riga in più indica se esiste una pagina successiva
+        params.append(page_size + 1)
+        if sources and len(sources) > 1:
+            # Ogni sorgente contribuisce al più una pagina letta dal proprio
+            # indice: l'unione ordina quelle righe e non tutte le corrispondenze
+            arms = [f"SELECT * FROM ({select_sql.format(source=source)} {where} {order})" for source in sources]
+            sql = " UNION ALL ".join(arms) + (
+                f" ORDER BY {created_column.split('.')[-1]} {direction}, {id_column.split('.')[-1]} {direction} LIMIT ?"
+            )
+            params = params * len(sources) + [page_size + 1]
+        else:
+            if sources:
+                select_sql = select_sql.format(source=sources[0])
+            sql = f"{select_sql} {where} {order}"
+        
+        with self.get_read_connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            next_cursor = encode_cursor(
+                last[created_column.split('.')[-1]], last[id_column.split('.')[-1]]
+            )
+        return rows, next_cursor
+    
+    def _task_filters(self, user_id: str = None, status: str = None, created_from: datetime = None,
+                      created_to: datetime = None, alias: str = "") -> Tuple[list, list]:
+        """
+        Condizioni e parametri dei filtri sui task (created_to escluso)
+        Ogni combinazione è coperta da un indice che termina con (created_at, task_id)
+        """
+        conditions, params = [], []
+        for column, operator, value in (("user_id", "=", user_id), ("status", "=", status),
+                                         ("created_at", ">=", created_from), ("created_at", "<", created_to)):
+            if value:
+                conditions.append(f"{alias}{column} {operator} ?")
+                params.append(datetime_to_epoch(value) if isinstance(value, datetime) else value)
+        return conditions, params
+    
+    def get_user_tasks_page(self, user_id: str, cursor: str = None, page_size: int = None,
+                            status: str = None, include_archived: bool = False,
+                            created_from: datetime = None, created_to: datetime = None,
+                            descending: bool = True) -> Tuple[List[Task], Optional[str]]:
+        """
+        Recupera una pagina dei task di un utente, dal più recente (o dal più
+        vecchio), con filtri facoltativi su stato e data di creazione
+        Restituisce (task, cursore della pagina successiva o None)
+        """
+        conditions, params = self._task_filters(user_id, status, created_from, created_to)
+        rows, next_cursor = self._fetch_page(
+            "SELECT * FROM {source}", conditions, params,
+            ('created_at', 'task_id'), cursor, page_size, self._tasks_page_sources(include_archived),
+            descending
+        )
+        return [Task.from_row(row) for row in rows], next_cursor
+    
+    def get_all_tasks_page(self, cursor: str = None, page_size: int = None,
+                           status: str = None, include_archived: bool = False,
+                           created_from: datetime = None, created_to: datetime = None,
+                           descending: bool = True) -> Tuple[List[Task], Optional[str]]:
+        """
+        Recupera una pagina di tutti i task, dal più recente (o dal più
+        vecchio), con filtri facoltativi su stato e data di creazione
+        Restituisce (task, cursore della pagina successiva o None)
+        """
+        conditions, params = self._task_filters(None, status, created_from, created_to)
+        rows, next_cursor = self._fetch_page(
+            "SELECT * FROM {source}", conditions, params,
+            ('created_at', 'task_id'), cursor, page_size, self._tasks_page_sources(include_archived),
+            descending
+        )
+        return [Task.from_row(row) for row in rows], next_cursor
+    
+    def get_all_tasks_with_users_page(self, cursor: str = None, page_size: int = None,
+                                      include_archived: bool = False, user_id: str = None,
+                                      status: str = None, created_from: datetime = None,
+                                      created_to: datetime = None,
+                                      descending: bool = True) -> Tuple[List[dict], Optional[str]]:
+        """
+        Recupera una pagina di task con le informazioni sui proprietari, con
+        filtri facoltativi su proprietario, stato e data di creazione
+        Restituisce (task con proprietari, cursore successivo o None)
+        """
+        select_sql = '''
+            SELECT t.*,
+                   p.username as owner_username,
+                   p.email as owner_email,
+                   CASE WHEN p.role = 'admin' THEN 1 ELSE 0 END as owner_is_admin
+            FROM {source} t
+            LEFT JOIN principals p ON t.user_id = p.user_id
+        '''
+        conditions, params = self._task_filters(user_id, status, created_from, created_to, alias="t.")
+        rows, next_cursor = self._fetch_page(
+            select_sql, conditions, params, ('t.created_at', 't.task_id'), cursor, page_size,
+            self._tasks_page_sources(include_archived), descending
+        )
+        tasks_with_users = [{
+            'task': Task.from_row(row),
+            'owner_username': row['owner_username'],
+            'owner_email': row['owner_email'],
+            'owner_is_admin': bool(row['owner_is_admin'])
+        } for row in rows]
+        return tasks_with_users, next_cursor
+    
+    # Risoluzione di ID abbreviati
+    def _resolve_id_prefix(self, table: str, id_column: str, prefix: str,
+                           conditions: list, params: list, limit: int = None) -> List[str]:
+        """
+        Cerca gli ID che iniziano con prefix tramite una scansione a intervallo
+        sulla chiave primaria: [prefix, prefix con l'ultimo carattere incrementato)
+        """
+        prefix = (prefix or '').strip().lower()
+        if not prefix:
+            return []
+        limit = limit or Config.ID_PREFIX_MAX_MATCHES
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        where = ' AND '.join([f"{id_column} >= ?", f"{id_column} < ?"] + list(conditions))
+        try:
+            with self.get_read_connection() as conn:
+                rows = conn.execute(
+                    f"SELECT {id_column} FROM {table} WHERE {where} ORDER BY {id_column} LIMIT ?",
+                    [prefix, upper] + list(params) + [limit]
+                ).fetchall()
+            return [row[0] for row in rows]
+        except sqlite3.Error:
+            return []
+    
+    def resolve_task_prefix(self, prefix: str, user_id: str = None, limit: int = None,
+                            archived: bool = False) -> List[str]:
+        """
+        Restituisce gli ID dei task che iniziano con prefix (al massimo limit)
+        Nessun ID: task non trovato; più di uno: prefisso ambiguo.
+        Con user_id la ricerca è limitata ai task di quell'utente, con
+        archived cerca tra i task archiviati
+        """
+        conditions, params = [], []
+        if user_id is not None:
+            # '+' esclude idx_tasks_user_created: l'intervallo sulla chiave primaria
+            # è molto più selettivo di tutti i task dell'utente
+            conditions.append("+user_id = ?")
+            params.append(user_id)
+        table = "tasks_archive" if archived else "tasks"
+        return self._resolve_id_prefix(table, "task_id", prefix, conditions, params, limit)
+    
+    def resolve_user_prefix(self, prefix: str, limit: int = None) -> List[str]:
+        """
+        Restituisce gli ID degli utenti che iniziano con prefix (al massimo limit)
+        Nessun ID: utente non trovato; più di uno: prefisso ambiguo
+        """
+        return self._resolve_id_prefix("principals", "user_id", prefix, [], [], limit)
+    
+    # Ricerca full-text
+    def search_tasks(self, query: str, user_id: str = None, limit: int = None,
+                     cursor: str = None) -> Tuple[List[dict], Optional[str]]:
+        """
+        Cerca i task per titolo e descrizione, ordinati per rilevanza
+        Vengono valutate solo le Config.SEARCH_MAX_CANDIDATES corrispondenze
+        più recenti: il costo resta costante anche per termini presenti in
+        quasi tutti i task. Ogni risultato è un dict con 'task', 'score' e
+        'snippet' (i termini trovati sono racchiusi tra search.MARK_START e
+        search.MARK_END). Restituisce (risultati, cursore successivo o None);
+        solleva ValueError se il cursore non è valido
+        """
+        limit = max(1, min(limit or Config.SEARCH_PAGE_SIZE, Config.MAX_PAGE_SIZE))
+        after = decode_cursor(cursor) if cursor else None
+        if after is not None and not all(isinstance(value, (int, float)) for value in after):
+            raise ValueError("Cursore di ricerca non valido")
+        search_query = SearchQuery(query or '')
+        if not search_query:
+            return [], None
+        match = search_query.match_expression(user_id)
+        
+        try:
+            with self.get_read_connection() as conn:
+                candidates = conn.execute('''
+                    SELECT t.rowid, t.title, t.description
+                    FROM tasks t
+                    JOIN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?
+                          ORDER BY rowid DESC LIMIT ?) f ON t.rowid = f.rowid
+                ''', (match, Config.SEARCH_MAX_CANDIDATES)).fetchall()
+                
+                scored = page_after(search_query.rank([tuple(row) for row in candidates]), after)
+                page = scored[:limit]
+                if not page:
+                    return [], None
+                
+                # Righe complete solo per la pagina richiesta
+                placeholders = ','.join('?' * len(page))
+                rows = conn.execute(
+                    f"SELECT rowid AS fts_rowid, * FROM tasks WHERE rowid IN ({placeholders})",
+                    [rowid for _, rowid in page]
+                ).fetchall()
+        except sqlite3.Error:
+            return [], None
+        
+        # Gli snippet sono calcolati dal testo già letto: snippet() di FTS5
+        # rivaluterebbe la MATCH per ogni riga
+        by_rowid = {row['fts_rowid']: row for row in rows}
+        results = [{
+            'task': Task.from_row(by_rowid[rowid]),
+            'score': score,
+            'snippet': search_query.snippet(by_rowid[rowid]['title'], by_rowid[rowid]['description'],
+                                            Config.SEARCH_SNIPPET_TOKENS)
+        } for score, rowid in page if rowid in by_rowid]
+        
+        next_cursor = None
+        if len(scored) > limit:
+            next_cursor = encode_cursor(*page[-1])
+        return results, next_cursor
+    
+    def rebuild_search_index(self) -> bool:
+        """Ricostruisce l'indice full-text dei task (riparazione o dopo un VACUUM)"""
+        with self.writer() as conn:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                rebuild_search_index(conn.cursor())
+                conn.commit()
+                return True
+            except sqlite3.Error:
+                conn.rollback()
+                return False
+    
+    # Archivio dei task completati
+    def archive_done_tasks(self, older_than_days: float = None, batch_size: int = None,
+                           should_stop=None) -> int:
+        """
+        Sposta in tasks_archive i task Done non modificati da older_than_days
+        giorni (default Config.ARCHIVE_AFTER_DAYS), batch_size alla volta
+        Ogni blocco è una transazione separata seguita da una pausa di
+        Config.ARCHIVE_BATCH_PAUSE secondi, così gli altri scrittori (e gli
+        altri processi) ottengono il lock tra un blocco e l'altro.
+        Restituisce i task archiviati
+        """
+        if older_than_days is None:
+            older_than_days = Config.ARCHIVE_AFTER_DAYS
+        batch_size = batch_size or Config.ARCHIVE_BATCH_SIZE
+        cutoff = datetime_to_epoch(datetime.now() - timedelta(days=older_than_days))
+        self._drain_write_behind()
+        
+        archived = 0
+        while should_stop is None or not should_stop():
+            with self.writer() as conn:
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    task_ids = [row[0] for row in conn.execute(
+                        "SELECT task_id FROM tasks WHERE status = ? AND updated_at < ? LIMIT ?",
+                        (Task.STATUS_DONE, cutoff, batch_size)
+                    )]
+                    if task_ids:
+                        placeholders = ','.join('?' * len(task_ids))
+                        conn.execute(f'''
+                            INSERT INTO tasks_archive ({ARCHIVE_COLUMNS}, archived_at)
+                            SELECT {ARCHIVE_COLUMNS}, ? FROM tasks WHERE task_id IN ({placeholders})
+                        ''', [datetime_to_epoch(datetime.now())] + task_ids)
+                        conn.execute(f"DELETE FROM tasks WHERE task_id IN ({placeholders})", task_ids)
+                    conn.commit()
+                except sqlite3.Error:
+                    conn.rollback()
+                    break
+            archived += len(task_ids)
+            if len(task_ids) < batch_size:
+                break
+            time.sleep(Config.ARCHIVE_BATCH_PAUSE)
+        return archived
+    
+    def get_archived_tasks_page(self, user_id: str = None, cursor: str = None, page_size: int = None,
+                                descending: bool = True) -> Tuple[List[dict], Optional[str]]:
+        """
+        Recupera una pagina dei task archiviati, dal più recente (di tutti o di un utente)
+        Ogni elemento contiene 'task', 'archived_at' e 'owner_username';
+        restituisce (elementi, cursore successivo o None)
+        """
+        conditions, params = [], []
+        if user_id:
+            conditions.append("a.user_id = ?")
+            params.append(user_id)
+        rows, next_cursor = self._fetch_page(
+            '''
+            SELECT a.*, p.username as owner_username
+            FROM tasks_archive a
+            LEFT JOIN principals p ON a.user_id = p.user_id
+            ''', conditions, params, ('a.archived_at', 'a.task_id'), cursor, page_size,
+            descending=descending
+        )
+        archived_tasks = [{
+            'task': Task.from_row(row),
+            'archived_at': epoch_to_datetime(row['archived_at']),
+            'owner_username': row['owner_username']
+        } for row in rows]
+        return archived_tasks, next_cursor
+    
+    def restore_archived_task(self, task_id: str) -> bool:
+        """
+        Riporta un task archiviato tra i task attivi
+        updated_at diventa l'istante del ripristino, altrimenti il task
+        tornerebbe in archivio alla prossima esecuzione del job
+        """
+        with self.writer() as conn:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(f'''
+                    INSERT INTO tasks ({ARCHIVE_COLUMNS})
+                    SELECT task_id, title, description, status, user_id, created_at, ?
+                    FROM tasks_archive WHERE task_id = ?
+                ''', (datetime_to_epoch(datetime.now()), task_id))
+                restored = conn.execute("DELETE FROM tasks_archive WHERE task_id = ?", (task_id,)).rowcount
+                conn.commit()
+                return restored > 0
+            except sqlite3.Error:
+                conn.rollback()
+                return False
+    
+    def start_maintenance(self):
+        """
+        Avvia il thread dei lavori periodici: archiviazione dei task completati
+        (Config.AUTO_ARCHIVE_ENABLED) e pulizia dei token di recupero scaduti
+        (Config.TOKEN_CLEANUP_ENABLED)
+        """
+        if self.maintenance is None:
+            self.maintenance = MaintenanceScheduler(self)
+            if Config.AUTO_ARCHIVE_ENABLED:
+                self.maintenance.add_job(
+                    "archive", Config.ARCHIVE_INTERVAL_HOURS * 3600,
+                    lambda should_stop: self.archive_done_tasks(should_stop=should_stop)
+                )
+            if Config.TOKEN_CLEANUP_ENABLED:
+                self.maintenance.add_job(
+                    "recovery_tokens", Config.TOKEN_CLEANUP_INTERVAL_MINUTES * 60,
+                    lambda should_stop: self.cleanup_old_recovery_tokens(should_stop=should_stop)
+                )
+    
+    def stop_maintenance(self):
+        """Ferma il thread dei lavori periodici"""
+        if self.maintenance is not None:
+            self.maintenance.stop()
+            self.maintenance = None
+    
+    # Registro delle modifiche (sincronizzazione incrementale)
+    def get_change_version(self) -> int:
+        """
+        Versione più recente del registro delle modifiche ai task (0 se vuoto)
+        Un client la legge prima di caricare tutti i task, poi chiede solo
+        le modifiche successive con get_changes_since
+        """
+        try:
+            with self.get_read_connection() as conn:
+                row = conn.execute(
+                    "SELECT seq FROM sqlite_sequence WHERE name = 'task_changes'"
+                ).fetchone()
+            return row[0] if row else 0
+        except sqlite3.Error:
+            return 0
+    
+    def get_user_data_version(self, user_id: str) -> Optional[int]:
+        """
+        Versione dei task di un utente (ETag delle liste), None in caso di errore
+        È l'ultima versione del registro delle modifiche per user_id, letta
+        dall'indice senza toccare i task: cambia solo quando cambiano i task
+        dell'utente, archiviazione e ripristino compresi
+        """
+        try:
+            with self.get_read_connection() as conn:
+                # La compattazione può eliminare tutte le modifiche di un
+                # utente: l'orizzonte è maggiore di ogni versione eliminata,
+                # così la versione non torna mai indietro
+                row = conn.execute('''
+                    SELECT MAX(
+                        COALESCE((SELECT MAX(version) FROM task_changes WHERE user_id = ?), 0),
+                        COALESCE((SELECT value FROM sync_state WHERE key = 'task_changes_horizon'), 0)
+                    )
+                ''', (user_id,)).fetchone()
+            return row[0]
+        except sqlite3.Error:
+            return None
+    
+    def get_users_version(self) -> Optional[int]:
+        """Versione dell'elenco utenti (ETag delle liste), None in caso di errore"""
+        try:
+            with self.get_read_connection() as conn:
+                row = conn.execute(
+                    "SELECT value FROM sync_state WHERE key = 'principals_version'"
+                ).fetchone()
+            return row[0] if row else 0
+        except sqlite3.Error:
+            return None
+    
+    def get_changes_since(self, version: int, user_id: str = None, limit: int = None) -> Optional[dict]:
+        """
+        Modifiche ai task successive a version, dalla più vecchia
+        Più modifiche dello stesso task nella pagina diventano una sola, con
+        il task nello stato attuale: 'operation' è 'insert', 'update' o
+        'delete' e 'task' è None per i task eliminati (o non più di user_id).
+        Restituisce {'changes', 'version', 'has_more', 'full_reload'}: la
+        prossima chiamata riparte da 'version'. Con full_reload il registro
+        è stato compattato oltre version e il client deve ricaricare tutti i
+        task, poi proseguire da 'version'. None in caso di errore.
+        """
+        limit = max(1, min(limit or Config.CHANGES_PAGE_SIZE, Config.MAX_PAGE_SIZE))
+        conditions, params = ["version > ?"], [version]
+        if user_id is not None:
+            conditions.append("user_id = ?")
+            params.append(user_id)
+        
+        try:
+            with self.get_read_connection() as conn:
+                horizon = conn.execute(
+                    "SELECT value FROM sync_state WHERE key = 'task_changes_horizon'"
+                ).fetchone()
+                if horizon is not None and version < horizon[0]:
+                    return {'changes': [], 'version': self.get_change_version(),
+                            'has_more': False, 'full_reload': True}
+                
+                rows = conn.execute(
+                    f"SELECT version, task_id, operation FROM task_changes "
+                    f"WHERE {' AND '.join(conditions)} ORDER BY version LIMIT ?",
+                    params + [limit]
+                ).fetchall()
+                
+                # Ultima modifica di ogni task, nell'ordine in cui è avvenuta
+                latest = {}
+                for row in rows:
+                    latest.pop(row['task_id'], None)
+                    latest[row['task_id']] = (row['version'], row['operation'])
+                
+                live_ids = [task_id for task_id, (_, operation) in latest.items() if operation != 'delete']
+                tasks = {}
+                if live_ids:
+                    placeholders = ','.join('?' * len(live_ids))
+                    tasks = {row['task_id']: Task.from_row(row) for row in conn.execute(
+                        f"SELECT * FROM tasks WHERE task_id IN ({placeholders})", live_ids
+                    )}
+        except sqlite3.Error:
+            return None
+        
+        changes = []
+        for task_id, (change_version, operation) in latest.items():
+            task = tasks.get(task_id)
+            if task is not None and user_id is not None and task.user_id != user_id:
+                task = None
+            changes.append({
+                'version': change_version,
+                'task_id': task_id,
+                'operation': operation if task is not None else 'delete',
+                'task': task
+            })
+        
+        return {
+            'changes': changes,
+            'version': rows[-1]['version'] if rows else version,
+            'has_more': len(rows) == limit,
+            'full_reload': False
+        }
+    
+    def get_task_events_since(self, version: int, user_id: str = None, limit: int = None) -> Optional[dict]:
+        """
+        Modifiche ai task successive a version, per proprietario (eventi in tempo reale)
+        A differenza di get_changes_since, un task che cambia proprietario
+        produce una voce per ciascun utente coinvolto. Ogni voce contiene
+        'version', 'task_id', 'user_id' e 'operation': 'upsert' con 'task'
+        (e owner_username, owner_email, owner_is_admin) se il task è ora di
+        user_id, 'archive' con anche 'archived_at' se è stato archiviato,
+        'delete' altrimenti. Con user_id solo le voci di quell'utente (lette
+        dal suo indice). Restituisce {'events', 'version', 'has_more',
+        'full_reload'} come get_changes_since, None in caso di errore.
+        """
+        limit = max(1, min(limit or Config.CHANGES_PAGE_SIZE, Config.MAX_PAGE_SIZE))
+        conditions, params = ["version > ?"], [version]
+        if user_id is not None:
+            conditions.append("user_id = ?")
+            params.append(user_id)
+        owner_columns = '''
+            p.username AS owner_username,
+            p.email AS owner_email,
+            CASE WHEN p.role = 'admin' THEN 1 ELSE 0 END AS owner_is_admin
+        '''
+        try:
+            with self.get_read_connection() as conn:
+                horizon = conn.execute(
+                    "SELECT value FROM sync_state WHERE key = 'task_changes_horizon'"
+                ).fetchone()
+                if horizon is not None and version < horizon[0]:
+                    return {'events': [], 'version': self.get_change_version(),
+                            'has_more': False, 'full_reload': True}
+                
+                rows = conn.execute(
+                    f"SELECT version, task_id, user_id FROM task_changes "
+                    f"WHERE {' AND '.join(conditions)} ORDER BY version LIMIT ?",
+                    params + [limit]
+                ).fetchall()
+                
+                # Ultima modifica di ogni (task, proprietario), nell'ordine in cui è avvenuta
+                latest = {}
+                for row in rows:
+                    key = (row['task_id'], row['user_id'])
+                    latest.pop(key, None)
+                    latest[key] = row['version']
+                
+                task_ids = list({task_id for task_id, _ in latest})
+                live, archived = {}, {}
+                if task_ids:
+                    placeholders = ','.join('?' * len(task_ids))
+                    live = {row['task_id']: row for row in conn.execute(f'''
+                        SELECT t.*, {owner_columns} FROM tasks t
+                        LEFT JOIN principals p ON t.user_id = p.user_id
+                        WHERE t.task_id IN ({placeholders})
+                    ''', task_ids)}
+                    missing = [task_id for task_id in task_ids if task_id not in live]
+                    if missing:
+                        placeholders = ','.join('?' * len(missing))
+                        archived = {row['task_id']: row for row in conn.execute(f'''
+                            SELECT a.*, {owner_columns} FROM tasks_archive a
+                            LEFT JOIN principals p ON a.user_id = p.user_id
+                            WHERE a.task_id IN ({placeholders})
+                        ''', missing)}
+        except sqlite3.Error:
+            return None
+        
+        events = []
+        for (task_id, owner), change_version in latest.items():
+            event = {'version': change_version, 'task_id': task_id, 'user_id': owner, 'operation': 'delete'}
+            row = live.get(task_id) or archived.get(task_id)
+            if row is not None and row['user_id'] == owner:
+                event.update({
+                    'operation': 'upsert' if task_id in live else 'archive',
+                    'task': Task.from_row(row),
+                    'owner_username': row['owner_username'],
+                    'owner_email': row['owner_email'],
+                    'owner_is_admin': bool(row['owner_is_admin'])
+                })
+                if task_id in archived:
+                    event['archived_at'] = epoch_to_datetime(row['archived_at'])
+            events.append(event)
+        
+        return {
+            'events': events,
+            'version': rows[-1]['version'] if rows else version,
+            'has_more': len(rows) == limit,
+            'full_reload': False
+        }
+    
+    def compact_task_changes(self, retention_days: float = None) -> int:
+        """
+        Compatta il registro delle modifiche ai task
+        Tiene solo l'ultima modifica di ogni task ed elimina quelle più vecchie
+        di retention_days (default Config.CHANGES_RETENTION_DAYS); restituisce
+        le righe eliminate, -1 in caso di errore
+        """
+        if retention_days is None:
+            retention_days = Config.CHANGES_RETENTION_DAYS
+        older_than = datetime_to_epoch(datetime.now() - timedelta(days=retention_days))
+        with self.writer() as conn:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                removed = compact_task_changes(conn.cursor(), older_than)
+                conn.commit()
+                return removed
+            except sqlite3.Error:
+                conn.rollback()
+                return -1
     
     def update_task(self, task: Task) -> bool:
         """Aggiorna un task esistente"""
+        self._drain_write_behind()
         try:
-            with self.get_connection() as conn:
+            with self.writer() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     UPDATE tasks 
@@ -453,7 +1344,7 @@ class DatabaseManager:
                     task.title,
                     task.description,
                     task.status,
-                    task.updated_at.isoformat(),
+                    datetime_to_epoch(task.updated_at),
                     task.task_id
                 ))
                 conn.commit()
@@ -463,8 +1354,9 @@ class DatabaseManager:
     
     def delete_task(self, task_id: str) -> bool:
         """Elimina un task"""
+        self._drain_write_behind()
         try:
-            with self.get_connection() as conn:
+            with self.writer() as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
                 conn.commit()
@@ -474,10 +1366,12 @@ class DatabaseManager:
     
     def delete_user_tasks(self, user_id: str) -> bool:
         """Elimina tutti i task di un utente"""
+        self._drain_write_behind()
         try:
-            with self.get_connection() as conn:
+            with self.writer() as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM tasks WHERE user_id = ?", (user_id,))
+                cursor.execute("DELETE FROM tasks_archive WHERE user_id = ?", (user_id,))
                 conn.commit()
                 return True
         except sqlite3.Error:
@@ -485,42 +1379,291 @@ class DatabaseManager:
     
     def delete_user_and_tasks(self, user_id: str) -> bool:
         """Elimina un utente e tutti i suoi task"""
+        return bool(self.delete_users([user_id]))
+    
+    def delete_users(self, user_ids: List[str]) -> Optional[dict]:
+        """
+        Elimina più utenti con tutti i loro task in un'unica transazione
+        Restituisce {user_id: task eliminati} per gli utenti che esistevano
+        (None in caso di errore). Task archiviati e token di recupero
+        vengono eliminati dalle chiavi esterne ON DELETE CASCADE
+        """
+        unique_ids = list(dict.fromkeys(user_ids))
+        if not unique_ids:
+            return {}
+        self._drain_write_behind()
+        task_counts = Counter()
+        deleted = []
         try:
-            with self.get_connection() as conn:
+            with self.writer() as conn:
                 cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                for i in range(0, len(unique_ids), self.BULK_CHUNK_SIZE):
+                    chunk = unique_ids[i:i + self.BULK_CHUNK_SIZE]
+                    placeholders = ','.join('?' * len(chunk))
+                    # I task attivi sono eliminati qui e non dalla cascata solo
+                    # per contarli con RETURNING: una sottoquery nel RETURNING
+                    # su principals vedrebbe i task già eliminati
+                    cursor.execute(
+                        f"DELETE FROM tasks WHERE user_id IN ({placeholders}) RETURNING user_id", chunk
+                    )
+                    task_counts.update(row[0] for row in cursor.fetchall())
+                    cursor.execute(
+                        f"DELETE FROM principals WHERE user_id IN ({placeholders}) RETURNING user_id", chunk
+                    )
+                    deleted.extend(row[0] for row in cursor.fetchall())
+                conn.commit()
+        except sqlite3.Error:
+            return None
+        for user_id in unique_ids:
+            self._invalidate_user(user_id)
+        return {user_id: task_counts[user_id] for user_id in deleted}
+    
+    # Operazioni massive sui task (una transazione, un solo commit)
+    def _existing_ids(self, cursor: sqlite3.Cursor, table: str, column: str, ids: List[str]) -> set:
+        """Restituisce gli ID (tra quelli dati) presenti nella colonna chiave di una tabella"""
+        existing = set()
+        unique_ids = list(dict.fromkeys(ids))
+        for i in range(0, len(unique_ids), self.BULK_CHUNK_SIZE):
+            chunk = unique_ids[i:i + self.BULK_CHUNK_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(f"SELECT {column} FROM {table} WHERE {column} IN ({placeholders})", chunk)
+            existing.update(row[0] for row in cursor.fetchall())
+        return existing
+    
+    def _existing_task_ids(self, cursor: sqlite3.Cursor, task_ids: List[str]) -> set:
+        """Restituisce gli ID (tra quelli dati) presenti nella tabella tasks"""
+        return self._existing_ids(cursor, 'tasks', 'task_id', task_ids)
+    
+    def _existing_user_ids(self, cursor: sqlite3.Cursor, user_ids: List[str]) -> set:
+        """
+        Restituisce gli ID (tra quelli dati) presenti in principals
+        Con le chiavi esterne attive un task con proprietario inesistente
+        farebbe fallire l'intera executemany: va scartato prima
+        """
+        return self._existing_ids(cursor, 'principals', 'user_id', user_ids)
+    
+    def create_tasks_bulk(self, tasks: List[Task]) -> List[bool]:
+        """
+        Crea più task in un'unica transazione
+        Restituisce un esito per ogni task (False se l'ID esiste già,
+        è duplicato nella lista, il titolo manca o l'utente non esiste)
+        """
+        if not tasks:
+            return []
+        try:
+            with self.writer() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                existing = self._existing_task_ids(cursor, [t.task_id for t in tasks])
+                owners = self._existing_user_ids(cursor, [t.user_id for t in tasks])
                 
-                # Elimina prima i task (per evitare problemi di foreign key)
-                cursor.execute("DELETE FROM tasks WHERE user_id = ?", (user_id,))
+                results = []
+                rows = []
+                for task in tasks:
+                    ok = bool(task.title) and task.task_id not in existing and task.user_id in owners
+                    results.append(ok)
+                    if ok:
+                        existing.add(task.task_id)
+                        rows.append((
+                            task.task_id,
+                            task.title,
+                            task.description,
+                            task.status,
+                            task.user_id,
+                            datetime_to_epoch(task.created_at),
+                            datetime_to_epoch(task.updated_at)
+                        ))
                 
-                # Poi elimina l'utente (cerca in entrambe le tabelle)
-                cursor.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
-                rows_affected = cursor.rowcount
+                cursor.executemany('''
+                    INSERT INTO tasks (task_id, title, description, status, user_id, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
+                conn.commit()
+                return results
+        except sqlite3.Error:
+            return [False] * len(tasks)
+    
+    def update_tasks_bulk(self, tasks: List[Task]) -> List[bool]:
+        """
+        Aggiorna più task in un'unica transazione
+        Oltre ai campi di update_task salva anche user_id, così lo stesso
+        metodo copre le riassegnazioni massive fatte dall'admin
+        (False per i task inesistenti o assegnati a un utente inesistente)
+        """
+        if not tasks:
+            return []
+        self._drain_write_behind()
+        try:
+            with self.writer() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                existing = self._existing_task_ids(cursor, [t.task_id for t in tasks])
+                owners = self._existing_user_ids(cursor, [t.user_id for t in tasks])
+                results = [task.task_id in existing and task.user_id in owners for task in tasks]
                 
-                # Se non trovato nella tabella users, prova in admin
-                if rows_affected == 0:
-                    cursor.execute("DELETE FROM admin WHERE admin_id = ?", (user_id,))
+                cursor.executemany('''
+                    UPDATE tasks
+                    SET title = ?, description = ?, status = ?, user_id = ?, updated_at = ?
+                    WHERE task_id = ?
+                ''', [(
+                    task.title,
+                    task.description,
+                    task.status,
+                    task.user_id,
+                    datetime_to_epoch(task.updated_at),
+                    task.task_id
+                ) for task, ok in zip(tasks, results) if ok])
+                conn.commit()
+                return results
+        except sqlite3.Error:
+            return [False] * len(tasks)
+    
+    def move_tasks_bulk(self, task_ids: List[str], new_status: str) -> List[bool]:
+        """Sposta più task nello stesso stato in un'unica transazione"""
+        if not task_ids:
+            return []
+        if new_status not in Task.VALID_STATUSES:
+            return [False] * len(task_ids)
+        self._drain_write_behind()
+        try:
+            with self.writer() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                existing = self._existing_task_ids(cursor, task_ids)
                 
+                updated_at = datetime_to_epoch(datetime.now())
+                cursor.executemany(
+                    "UPDATE tasks SET status = ?, updated_at = ? WHERE task_id = ?",
+                    [(new_status, updated_at, task_id) for task_id in existing]
+                )
                 conn.commit()
-                return True
+                return [task_id in existing for task_id in task_ids]
+        except sqlite3.Error:
+            return [False] * len(task_ids)
+    
+    def delete_tasks_bulk(self, task_ids: List[str]) -> List[bool]:
+        """Elimina più task in un'unica transazione"""
+        if not task_ids:
+            return []
+        self._drain_write_behind()
+        try:
+            with self.writer() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                existing = set()
+                unique_ids = list(dict.fromkeys(task_ids))
+                for i in range(0, len(unique_ids), self.BULK_CHUNK_SIZE):
+                    chunk = unique_ids[i:i + self.BULK_CHUNK_SIZE]
+                    placeholders = ','.join('?' * len(chunk))
+                    cursor.execute(
+                        f"DELETE FROM tasks WHERE task_id IN ({placeholders}) RETURNING task_id", chunk
+                    )
+                    existing.update(row[0] for row in cursor.fetchall())
+                conn.commit()
+                # Un ID ripetuto conta come eliminato solo la prima volta
+                results = []
+                for task_id in task_ids:
+                    results.append(task_id in existing)
+                    existing.discard(task_id)
+                return results
         except sqlite3.Error:
+            return [False] * len(task_ids)
+    
+    # Aggiornamenti differiti (write-behind con group commit)
+    TASK_UPDATE_FIELDS = ('title', 'description', 'status', 'user_id')
+    
+    def enable_write_behind(self, interval: float = None, max_ops: int = None):
+        """Attiva la coda write-behind per queue_task_update"""
+        if self.write_behind is None:
+            self.write_behind = WriteBehindQueue(self, interval, max_ops)
+    
+    def flush_writes(self) -> int:
+        """Scrive subito gli aggiornamenti differiti in attesa"""
+        return self.write_behind.flush() if self.write_behind else 0
+    
+    def _apply_task_field_updates(self, cursor: sqlite3.Cursor, updates: dict) -> set:
+        """
+        Applica {task_id: {campo: valore}} nella transazione corrente
+        Le righe con gli stessi campi vengono scritte con un solo executemany;
+        restituisce gli ID dei task esistenti (quindi aggiornati)
+        """
+        existing = self._existing_task_ids(cursor, list(updates))
+        updated_at = datetime_to_epoch(datetime.now())
+        groups = {}
+        for task_id, fields in updates.items():
+            if task_id in existing:
+                columns = tuple(sorted(fields))
+                groups.setdefault(columns, []).append(
+                    tuple(fields[column] for column in columns) + (updated_at, task_id)
+                )
+        for columns, params in groups.items():
+            assignments = ', '.join(f"{column} = ?" for column in columns)
+            cursor.executemany(
+                f"UPDATE tasks SET {assignments}, updated_at = ? WHERE task_id = ?", params
+            )
+        return existing
+    
+    def _validate_task_fields(self, fields: dict) -> bool:
+        unknown = set(fields) - set(self.TASK_UPDATE_FIELDS)
+        if unknown or not fields:
+            raise ValueError(f"Campi del task non aggiornabili: {sorted(unknown) or 'nessun campo'}")
+        return 'status' not in fields or fields['status'] in Task.VALID_STATUSES
+    
+    def update_task_fields(self, task_id: str, **fields) -> bool:
+        """Aggiorna solo i campi indicati di un task (title, description, status, user_id)"""
+        if not self._validate_task_fields(fields):
+            return False
+        self._drain_write_behind()
+        try:
+            with self.writer() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                updated = self._apply_task_field_updates(cursor, {task_id: fields})
+                conn.commit()
+                return task_id in updated
+        except sqlite3.Error:
+            return False
+    
+    def queue_task_update(self, task_id: str, durable: bool = False, **fields) -> bool:
+        """
+        Come update_task_fields, ma passando dalla coda write-behind se attiva
+        Con durable=False ritorna subito (True = aggiornamento accodato);
+        con durable=True attende il commit del flush e ne restituisce l'esito
+        """
+        # Dentro un'unità di lavoro la scrittura fa parte della sua transazione
+        if self.write_behind is None or self.writer_connection.in_unit():
+            return self.update_task_fields(task_id, **fields)
+        if not self._validate_task_fields(fields):
             return False
+        future = self.write_behind.submit(task_id, fields)
+        return future.result() if durable else True
+    
+    def _drain_write_behind(self):
+        """Scrive gli aggiornamenti differiti prima di una scrittura diretta sui task"""
+        # Un'unità di lavoro ha svuotato la coda all'apertura; il thread di
+        # flush attende la connessione di scrittura che l'unità tiene
+        if self.write_behind is not None and not self.writer_connection.in_unit():
+            self.write_behind.flush()
     
     # CRUD Operations per Password Recovery
     def create_password_recovery(self, recovery: PasswordRecovery) -> bool:
         """Crea un nuovo record di recupero password"""
         try:
-            with self.get_connection() as conn:
+            with self.writer() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
-                    INSERT INTO password_recovery (recovery_id, user_id, email, token, is_used, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
+                    INSERT INTO password_recovery (recovery_id, user_id, email, token, is_used,
+                                                   created_at, expires_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
                 ''', (
                     recovery.recovery_id,
                     recovery.user_id,
                     recovery.email,
                     recovery.token,
                     recovery.is_used,
-                    recovery.created_at.isoformat()
+                    datetime_to_epoch(recovery.created_at),
+                    datetime_to_epoch(recovery.expires_at)
                 ))
                 conn.commit()
                 return True
@@ -528,27 +1671,31 @@ class DatabaseManager:
             return False
     
     def get_password_recovery_by_token(self, token: str) -> Optional[PasswordRecovery]:
-        """Recupera un record di recupero password per token"""
-        with self.get_connection() as conn:
+        """Recupera un token di recupero valido (non usato e non scaduto); None altrimenti"""
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM password_recovery WHERE token = ?", (token,))
+            cursor.execute(
+                "SELECT * FROM password_recovery WHERE token = ? AND is_used = 0 AND expires_at > ?",
+                (token, datetime_to_epoch(datetime.now()))
+            )
             row = cursor.fetchone()
             
             if row:
-                return self._row_to_password_recovery(row)
+                return PasswordRecovery.from_row(row)
             return None
     
     def update_password_recovery(self, recovery: PasswordRecovery) -> bool:
         """Aggiorna un record di recupero password"""
         try:
-            with self.get_connection() as conn:
+            with self.writer() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     UPDATE password_recovery 
-                    SET is_used = ?
+                    SET is_used = ?, expires_at = ?
                     WHERE recovery_id = ?
                 ''', (
                     recovery.is_used,
+                    datetime_to_epoch(recovery.expires_at),
                     recovery.recovery_id
                 ))
                 conn.commit()
@@ -556,69 +1703,138 @@ class DatabaseManager:
         except sqlite3.Error:
             return False
     
-    def cleanup_old_recovery_tokens(self):
-        """Elimina i token di recupero vecchi (più di 24 ore)"""
-        try:
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    DELETE FROM password_recovery 
-                    WHERE datetime(created_at) < datetime('now', '-1 day')
-                ''')
-                conn.commit()
-        except sqlite3.Error:
-            pass
+    def cleanup_old_recovery_tokens(self, batch_size: int = None, should_stop=None) -> int:
+        """
+        Elimina i token di recupero scaduti (i token usati scadono subito),
+        batch_size alla volta (default Config.TOKEN_CLEANUP_BATCH_SIZE)
+        Restituisce il numero di token eliminati
+        """
+        batch_size = batch_size or Config.TOKEN_CLEANUP_BATCH_SIZE
+        now = datetime_to_epoch(datetime.now())
+        
+        removed = 0
+        while should_stop is None or not should_stop():
+            with self.writer() as conn:
+                try:
+                    cursor = conn.execute('''
+                        DELETE FROM password_recovery WHERE recovery_id IN (
+                            SELECT recovery_id FROM password_recovery WHERE expires_at <= ? LIMIT ?
+                        )
+                    ''', (now, batch_size))
+                    conn.commit()
+                except sqlite3.Error:
+                    conn.rollback()
+                    break
+            removed += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                break
+        return removed
     
     # Metodi di utilità
     def get_database_stats(self) -> dict:
-        """Restituisce statistiche del database"""
-        with self.get_connection() as conn:
+        """Restituisce statistiche del database (lette dalla tabella counters)"""
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute('''
+                SELECT scope, key, value FROM counters
+                WHERE scope IN ('tasks', 'status', 'role', 'archived')
+            ''')
+            counters = {(row['scope'], row['key']): row['value'] for row in cursor.fetchall()}
             
-            # Conta utenti standard
-            cursor.execute("SELECT COUNT(*) FROM users")
-            regular_users = cursor.fetchone()[0]
-            
-            # Conta admin
-            cursor.execute("SELECT COUNT(*) FROM admin")
-            admin_users = cursor.fetchone()[0]
-            
-            total_users = regular_users + admin_users
-            
-            # Conta task
-            cursor.execute("SELECT COUNT(*) FROM tasks")
-            total_tasks = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM tasks WHERE status = 'To Do'")
-            todo_tasks = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM tasks WHERE status = 'Doing'")
-            doing_tasks = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM tasks WHERE status = 'Done'")
-            done_tasks = cursor.fetchone()[0]
+            regular_users = counters.get(('role', User.ROLE_USER), 0)
+            admin_users = counters.get(('role', User.ROLE_ADMIN), 0)
             
             return {
-                'total_users': total_users,
+                'total_users': regular_users + admin_users,
                 'admin_users': admin_users,
                 'regular_users': regular_users,
-                'total_tasks': total_tasks,
-                'todo_tasks': todo_tasks,
-                'doing_tasks': doing_tasks,
-                'done_tasks': done_tasks
+                'total_tasks': counters.get(('tasks', ''), 0),
+                'todo_tasks': counters.get(('status', Task.STATUS_TODO), 0),
+                'doing_tasks': counters.get(('status', Task.STATUS_DOING), 0),
+                'done_tasks': counters.get(('status', Task.STATUS_DONE), 0),
+                'archived_tasks': counters.get(('archived', ''), 0)
             }
     
+    def get_task_count_by_status(self, user_id: str) -> dict:
+        """Restituisce il conteggio dei task di un utente per ogni stato"""
+        counts = {status: 0 for status in Task.VALID_STATUSES}
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT key, value FROM counters
+                WHERE scope = 'user_status' AND key >= ? AND key < ?
+            ''', (user_id + '/', user_id + '0'))
+            for row in cursor.fetchall():
+                status = row['key'][len(user_id) + 1:]
+                counts[status] = row['value']
+        return counts
+    
+    def rebuild_counters(self) -> bool:
+        """Ricalcola i contatori da tasks e principals (riparazione)"""
+        with self.writer() as conn:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                rebuild_counters(conn.cursor())
+                conn.commit()
+                return True
+            except sqlite3.Error:
+                conn.rollback()
+                return False
+    
     def backup_database(self, backup_path: str) -> bool:
-        """Crea un backup del database"""
+        """
+        Crea un backup coerente del database in backup_path, anche mentre è in uso
+        Se il percorso termina con .gz il backup viene compresso con gzip
+        """
+        self.flush_writes()
         try:
-            import shutil
-            shutil.copy2(self.db_name, backup_path)
+            backup_to_file(self.db_name, backup_path, compress=backup_path.endswith(".gz"))
             return True
-        except Exception:
+        except (sqlite3.Error, OSError, BackupCancelled):
             return False
     
+    def _backup_base_name(self) -> str:
+        return os.path.splitext(os.path.basename(self.db_name))[0]
+    
+    def get_backup_files(self) -> List[str]:
+        """Backup presenti nella directory dei backup, dal più vecchio al più recente"""
+        return list_backups(Config.get_backup_dir(), self._backup_base_name())
+    
+    def create_backup(self, compress: bool = None, should_stop=None) -> Optional[str]:
+        """
+        Crea un backup con timestamp in Config.get_backup_dir() e tiene solo
+        gli ultimi Config.MAX_BACKUP_FILES; restituisce il percorso o None
+        """
+        compress = Config.BACKUP_COMPRESS if compress is None else compress
+        self.flush_writes()
+        try:
+            backup_dir = Config.get_backup_dir()
+            filename = create_backup_filename(self._backup_base_name()) + (".gz" if compress else "")
+            backup_path = os.path.join(backup_dir, filename)
+            backup_to_file(self.db_name, backup_path, compress=compress, should_stop=should_stop)
+        except (sqlite3.Error, OSError, BackupCancelled):
+            return None
+        rotate_backups(backup_dir, self._backup_base_name())
+        return backup_path
+    
+    def start_backup_scheduler(self, interval: float = None):
+        """Avvia i backup periodici (default ogni Config.BACKUP_INTERVAL_HOURS ore)"""
+        if self.backup_scheduler is None:
+            self.backup_scheduler = BackupScheduler(self, interval)
+    
+    def stop_backup_scheduler(self):
+        """Ferma i backup periodici, interrompendo un backup in corso"""
+        if self.backup_scheduler is not None:
+            self.backup_scheduler.stop()
+            self.backup_scheduler = None
+    
     def close(self):
-        """Chiude la connessione al database (cleanup)"""
-        # SQLite gestisce automaticamente le connessioni
-        # Questo metodo è qui per compatibilità futura
-        pass
\ No newline at end of file
+        """Scrive gli aggiornamenti differiti e chiude tutte le connessioni del pool (cleanup)"""
+        self.stop_maintenance()
+        self.stop_backup_scheduler()
+        if self.write_behind is not None:
+            self.write_behind.stop()
+            self.write_behind = None
+        self.writer_connection.close()
+        if self.pool is not None:
+            self.pool.close_all()
\ No newline at end of file
@@ -0,0 +1,252 @@
+# events.py - Eventi in tempo reale per l'interfaccia web (Server-Sent Events)
+# Un solo thread legge il registro delle modifiche ai task e la versione
+# degli utenti e distribuisce gli eventi ai client collegati, ciascuno con
+# una coda limitata: un client lento non rallenta gli altri
+
+import json
+import queue
+import threading
+from typing import List, Optional
+from config import Config
+
+# Evento finale per un client che ha perso eventi (coda piena o troppo
+# indietro): la pagina deve ricaricare i dati
+RESYNC = {'type': 'resync'}
+
+
+def format_event(event: dict) -> str:
+    """Serializza un evento nel formato text/event-stream"""
+    lines = []
+    # L'id degli eventi sui task è la versione del registro: alla
+    # riconnessione il browser la rimanda in Last-Event-ID
+    if event['type'] == 'task':
+        lines.append(f"id: {event['version']}")
+    lines.append(f"event: {event['type']}")
+    data = {key: value for key, value in event.items() if key != 'type'}
+    lines.append(f"data: {json.dumps(data)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def _task_event(event: dict) -> dict:
+    """Evento JSON da una voce di get_task_events_since"""
+    payload = {
+        'type': 'task',
+        'version': event['version'],
+        'task_id': event['task_id'],
+        'user_id': event['user_id'],
+        'operation': event['operation']
+    }
+    if 'task' in event:
+        task = event['task'].to_dict()
+        task['owner_username'] = event['owner_username']
+        task['owner_email'] = event['owner_email']
+        task['owner_is_admin'] = event['owner_is_admin']
+        payload['task'] = task
+    if 'archived_at' in event:
+        payload['archived_at'] = event['archived_at'].isoformat()
+    return payload
+
+
+class Subscriber:
+    """Client collegato: riceve in una coda limitata gli eventi che lo riguardano"""
+
+    def __init__(self, broker: 'EventBroker', user_id: str, is_admin: bool, since: Optional[int]):
+        self.broker = broker
+        self.user_id = user_id
+        self.is_admin = is_admin
+        # Versione dei dati già mostrati dalla pagina (None: solo eventi nuovi)
+        self.since = since
+        self._queue = queue.Queue(maxsize=Config.EVENTS_QUEUE_SIZE)
+        self._finished = False
+
+    def wants(self, event: dict) -> bool:
+        """Un admin riceve tutto, un utente solo gli eventi sui propri task"""
+        if self.is_admin:
+            return True
+        return event['type'] == 'task' and event['user_id'] == self.user_id
+
+    def push(self, event: dict):
+        """Accoda un evento; con la coda piena il client riceve RESYNC"""
+        if self._finished:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.finish(RESYNC)
+
+    def finish(self, last_event: Optional[dict] = None):
+        """
+        Scarta gli eventi in attesa e chiude lo stream dopo last_event
+        (None: chiusura senza evento, il browser si ricollega da solo)
+        Chiamato solo dal thread del broker, l'unico che accoda.
+        """
+        self._finished = True
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+        self._queue.put_nowait(last_event)
+
+    def unsubscribe(self):
+        """Scollega il client dal broker"""
+        self.broker.unsubscribe(self)
+
+    def stream(self):
+        """Generatore text/event-stream, fino a RESYNC o alla chiusura del broker"""
+        while True:
+            try:
+                event = self._queue.get(timeout=Config.EVENTS_KEEPALIVE)
+            except queue.Empty:
+                # Commento ignorato dal browser: tiene aperta la connessione e
+                # fa emergere i client scollegati alla prima scrittura fallita
+                yield ": keepalive\n\n"
+                continue
+            if event is None:
+                break
+            yield format_event(event)
+            if event is RESYNC:
+                break
+
+
+class EventBroker:
+    """
+    Distribuisce ai client collegati gli eventi sui task e sugli utenti
+    Il thread parte al primo client e legge il registro delle modifiche
+    ogni interval secondi solo finché c'è qualcuno collegato: una query per
+    giro, non una per client. Un client che si collega con since (la
+    versione dei dati della pagina) riceve prima le modifiche successive;
+    se è indietro di più di Config.EVENTS_MAX_CATCHUP modifiche riceve RESYNC.
+    """
+
+    def __init__(self, db, interval: float = None):
+        self.db = db
+        self.interval = interval if interval is not None else Config.EVENTS_POLL_INTERVAL
+        self._subscribers = set()
+        # Client appena collegati, in attesa del recupero delle modifiche perse
+        self._pending: List[Subscriber] = []
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+        # Versioni già distribuite (None: nessun client, da rileggere)
+        self.version = None
+        self.users_version = None
+
+    def subscribe(self, user_id: str, is_admin: bool, since: int = None) -> Subscriber:
+        """Collega un client; gli eventi arrivano da Subscriber.stream()"""
+        subscriber = Subscriber(self, user_id, is_admin, since)
+        with self._condition:
+            if self._stopped:
+                subscriber.finish()
+                return subscriber
+            self._pending.append(subscriber)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sse-events", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        """Scollega un client (connessione chiusa)"""
+        with self._condition:
+            self._subscribers.discard(subscriber)
+            if subscriber in self._pending:
+                self._pending.remove(subscriber)
+
+    def subscriber_count(self) -> int:
+        """Client collegati"""
+        with self._condition:
+            return len(self._subscribers) + len(self._pending)
+
+    def _run(self):
+        """Thread di distribuzione degli eventi"""
+        while True:
+            with self._condition:
+                while not self._stopped and not (self._subscribers or self._pending):
+                    # Senza client non si legge nulla: alla ripresa si
+                    # riparte dalle versioni attuali
+                    self.version = None
+                    self._condition.wait()
+                if self._stopped:
+                    break
+                pending, self._pending = self._pending, []
+                self._subscribers.update(pending)
+                subscribers = list(self._subscribers)
+            try:
+                self._poll(pending, subscribers)
+            except Exception:
+                pass
+            with self._condition:
+                if not self._stopped and not self._pending:
+                    self._condition.wait(self.interval)
+        self.db.release_connection()
+
+    def _poll(self, pending: List[Subscriber], subscribers: List[Subscriber]):
+        """Un giro: recupero per i client nuovi, poi modifiche nuove a tutti"""
+        if self.version is None:
+            self.version = self.db.get_change_version()
+            self.users_version = self.db.get_users_version()
+        for subscriber in pending:
+            self._catch_up(subscriber)
+
+        while True:
+            page = self.db.get_task_events_since(self.version)
+            if page is None:
+                return
+            if page['full_reload']:
+                for subscriber in subscribers:
+                    subscriber.finish(RESYNC)
+                self.version = page['version']
+                break
+            for event in page['events']:
+                payload = _task_event(event)
+                for subscriber in subscribers:
+                    if subscriber.wants(payload) and payload['version'] > (subscriber.since or 0):
+                        subscriber.push(payload)
+            self.version = page['version']
+            if not page['has_more']:
+                break
+
+        users_version = self.db.get_users_version()
+        if users_version is not None and users_version != self.users_version:
+            self.users_version = users_version
+            payload = {'type': 'users', 'version': users_version}
+            for subscriber in subscribers:
+                if subscriber.wants(payload):
+                    subscriber.push(payload)
+
+    def _catch_up(self, subscriber: Subscriber):
+        """Invia a un client nuovo le modifiche tra subscriber.since e self.version"""
+        if subscriber.since is None or subscriber.since >= self.version:
+            return
+        # Per un utente il registro si legge dal suo indice: il costo dipende
+        # solo dalle modifiche ai suoi task
+        user_id = None if subscriber.is_admin else subscriber.user_id
+        version, read = subscriber.since, 0
+        while version < self.version:
+            page = self.db.get_task_events_since(version, user_id=user_id)
+            if page is not None:
+                read += len(page['events'])
+            if page is None or page['full_reload'] or read > Config.EVENTS_MAX_CATCHUP:
+                subscriber.finish(RESYNC)
+                return
+            for event in page['events']:
+                # Le modifiche successive arrivano con il giro normale
+                if event['version'] <= self.version:
+                    subscriber.push(_task_event(event))
+            version = page['version']
+            if not page['has_more']:
+                break
+
+    def stop(self):
+        """Ferma il thread e chiude gli stream aperti"""
+        with self._condition:
+            if self._stopped:
+                return
+            self._stopped = True
+            subscribers = list(self._subscribers) + self._pending
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+        for subscriber in subscribers:
+            subscriber.finish()
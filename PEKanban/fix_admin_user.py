@@ -1,9 +1,8 @@
 #!/usr/bin/env python3
 # fix_admin_user.py - Script per correggere la situazione admin nel database
 
-import sqlite3
 from database import DatabaseManager
-from model import User, Admin
+from model import User
 
 def fix_admin_user():
     """Promuove RubenNovello ad admin e rimuove admin fittizi"""
@@ -37,34 +36,10 @@ def fix_admin_user():
     if not ruben_user.is_admin:
         print("3. Promuovendo RubenNovello ad admin...")
         
-        # Crea nuovo oggetto Admin con gli stessi dati
-        admin_ruben = Admin(ruben_user.username, ruben_user.email, "")
-        admin_ruben.user_id = ruben_user.user_id
-        admin_ruben.password_hash = ruben_user.password_hash
-        admin_ruben.token = ruben_user.token
-        admin_ruben.created_at = ruben_user.created_at
-        
-        with db.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Rimuovi dalla tabella users
-            cursor.execute("DELETE FROM users WHERE user_id = ?", (ruben_user.user_id,))
-            
-            # Aggiungi alla tabella admin
-            cursor.execute('''
-                INSERT INTO admin (admin_id, username, email, password_hash, token, created_at, permissions)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                admin_ruben.user_id,
-                admin_ruben.username,
-                admin_ruben.email,
-                admin_ruben.password_hash,
-                admin_ruben.token,
-                admin_ruben.created_at.isoformat(),
-                'full'
-            ))
-            
-            conn.commit()
+        # Il ruolo è una colonna di principals: basta aggiornare una riga
+        if not db.set_user_role(ruben_user.user_id, User.ROLE_ADMIN):
+            print("[ERROR] Promozione non riuscita!")
+            return False
         
         print("   [OK] RubenNovello promosso ad admin!")
     else:
@@ -74,19 +49,8 @@ def fix_admin_user():
     if admin_fittizio:
         print("4. Rimuovendo admin fittizio...")
         
-        with db.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Rimuovi tutti i task dell'admin fittizio
-            cursor.execute("DELETE FROM tasks WHERE user_id = ?", (admin_fittizio.user_id,))
-            
-            # Rimuovi l'admin fittizio
-            if admin_fittizio.is_admin:
-                cursor.execute("DELETE FROM admin WHERE admin_id = ?", (admin_fittizio.user_id,))
-            else:
-                cursor.execute("DELETE FROM users WHERE user_id = ?", (admin_fittizio.user_id,))
-            
-            conn.commit()
+        # Rimuovi l'admin fittizio insieme a tutti i suoi task
+        db.delete_user_and_tasks(admin_fittizio.user_id)
         
         print("   [OK] Admin fittizio rimosso!")
     else:
@@ -526,30 +526,46 @@ class DashboardScreen(Screen):
             self.refresh_users()
     
     def refresh_tasks(self, instance=None):
-        """Aggiorna la lista dei task"""
+        """Aggiorna la lista dei task (prima pagina)"""
         app = App.get_running_app()
         if not app.current_user:
             return
         
+        # Pulisci layout
+        self.tasks_layout.clear_widgets()
+        self.tasks_cursor = None
+        self.load_more_btn = None
+        self.load_tasks_page()
+    
+    def load_tasks_page(self, instance=None):
+        """Carica la pagina successiva di task in coda alla lista"""
+        app = App.get_running_app()
+        if not app.current_user:
+            return
+        
+        # Filtra per stato direttamente nella query
+        status = None
+        if hasattr(self, 'status_filter') and self.status_filter.text != 'Tutti':
+            status = self.status_filter.text
+        
         # Ottieni task dell'utente
         if app.current_user.is_admin:
-            tasks = app.db.get_all_tasks()
+            tasks, self.tasks_cursor = app.db.get_all_tasks_page(self.tasks_cursor, status=status)
         else:
-            tasks = app.db.get_user_tasks(app.current_user.user_id)
-        
-        # Filtra per stato se necessario
-        if hasattr(self, 'status_filter') and self.status_filter.text != 'Tutti':
-            tasks = [t for t in tasks if t.status == self.status_filter.text]
+            tasks, self.tasks_cursor = app.db.get_user_tasks_page(
+                app.current_user.user_id, self.tasks_cursor, status=status
+            )
         
-        # Pulisci layout
-        self.tasks_layout.clear_widgets()
+        if self.load_more_btn is not None:
+            self.tasks_layout.remove_widget(self.load_more_btn)
+            self.load_more_btn = None
         
         # Aggiungi task
         for task in tasks:
             task_widget = self.create_task_widget(task)
             self.tasks_layout.add_widget(task_widget)
         
-        if not tasks:
+        if not tasks and not self.tasks_layout.children:
             no_tasks_label = Label(
                 text='Nessun task trovato',
                 size_hint_y=None,
@@ -557,6 +573,11 @@ class DashboardScreen(Screen):
                 color=(0.6, 0.6, 0.6, 1)
             )
             self.tasks_layout.add_widget(no_tasks_label)
+        
+        if self.tasks_cursor:
+            self.load_more_btn = Button(text='Carica altri', size_hint_y=None, height=dp(40))
+            self.load_more_btn.bind(on_press=self.load_tasks_page)
+            self.tasks_layout.add_widget(self.load_more_btn)
     
     def create_task_widget(self, task):
         """Crea widget per un singolo task"""
@@ -1544,6 +1565,10 @@ class TaskboardKivyApp(App):
         # Bind eventi tastiera globali
         Window.bind(on_key_down=self.on_key_down)
     
+    def on_stop(self):
+        """Chiamato alla chiusura dell'app"""
+        self.db.close()
+    
     def on_key_down(self, window, key, scancode, codepoint, modifier):
         """Gestisce eventi tastiera globali"""
         # F11 per fullscreen
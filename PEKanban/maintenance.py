@@ -0,0 +1,67 @@
+# maintenance.py - Lavori periodici di manutenzione del database
+# Un thread esegue a intervalli regolari i lavori registrati (es.
+# archiviazione dei task completati), uno alla volta
+
+import threading
+import time
+from typing import Callable, Dict
+
+
+class MaintenanceScheduler:
+    """
+    Esegue ogni lavoro registrato al più ogni interval secondi
+    Il primo giro parte subito dopo l'avvio; un lavoro che solleva
+    un'eccezione viene riprovato al giro successivo. Ogni lavoro riceve
+    una funzione should_stop() che diventa vera quando il thread viene
+    fermato, così i lavori lunghi possono interrompersi tra un blocco e l'altro.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        # nome -> [intervallo, funzione, prossima esecuzione]
+        self._jobs: Dict[str, list] = {}
+        self._condition = threading.Condition()
+        self._stopped = False
+
+        self._thread = threading.Thread(target=self._run, name="db-maintenance", daemon=True)
+        self._thread.start()
+
+    def add_job(self, name: str, interval: float, job: Callable[[Callable[[], bool]], object]):
+        """Registra (o sostituisce) un lavoro periodico"""
+        with self._condition:
+            self._jobs[name] = [interval, job, time.monotonic()]
+            self._condition.notify()
+
+    def _next_due(self):
+        """Lavoro da eseguire per primo e secondi che mancano (None se non ce ne sono)"""
+        if not self._jobs:
+            return None, None
+        name = min(self._jobs, key=lambda job_name: self._jobs[job_name][2])
+        return name, self._jobs[name][2] - time.monotonic()
+
+    def _run(self):
+        """Thread di manutenzione"""
+        while True:
+            with self._condition:
+                name, delay = self._next_due()
+                while not self._stopped and (name is None or delay > 0):
+                    self._condition.wait(delay)
+                    name, delay = self._next_due()
+                if self._stopped:
+                    break
+                interval, job, _ = self._jobs[name]
+                self._jobs[name][2] = time.monotonic() + interval
+            try:
+                job(lambda: self._stopped)
+            except Exception:
+                pass
+        self.db.release_connection()
+
+    def stop(self):
+        """Ferma il thread; attende che il lavoro in corso si interrompa"""
+        with self._condition:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join()
@@ -0,0 +1,728 @@
+# migrations.py - Migrazioni versionate dello schema del database
+# Ogni migrazione porta lo schema alla versione successiva; la versione
+# corrente è memorizzata in PRAGMA user_version
+
+import sqlite3
+from datetime import datetime
+from typing import Callable, List, Tuple
+from model import datetime_to_epoch
+
+
+def _create_base_schema(cursor: sqlite3.Cursor):
+    """Versione 1: tabelle di base (già presenti nei database esistenti)"""
+    # Tabella Users (utenti standard)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            user_id TEXT PRIMARY KEY,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            token TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Tabella Admin (amministratori)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS admin (
+            admin_id TEXT PRIMARY KEY,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            token TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            permissions TEXT DEFAULT 'full'
+        )
+    ''')
+
+    # Tabella Tasks
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tasks (
+            task_id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            description TEXT,
+            status TEXT NOT NULL DEFAULT 'To Do',
+            user_id TEXT NOT NULL,
+            user_type TEXT NOT NULL DEFAULT 'user',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Tabella Password Recovery
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS password_recovery (
+            recovery_id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            email TEXT NOT NULL,
+            token TEXT NOT NULL,
+            is_used INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _add_task_and_token_indexes(cursor: sqlite3.Cursor):
+    """Versione 2: indici per le query su task e token di recupero"""
+    # get_user_tasks / get_tasks_by_status con utente (filtro + ordinamento)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tasks_user_status_created
+        ON tasks (user_id, status, created_at)
+    ''')
+    # get_user_tasks ordina per created_at senza filtrare sullo stato
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tasks_user_created
+        ON tasks (user_id, created_at)
+    ''')
+    # get_tasks_by_status senza utente
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tasks_status_created
+        ON tasks (status, created_at)
+    ''')
+    # get_all_tasks / get_all_tasks_with_users
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tasks_created
+        ON tasks (created_at)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_password_recovery_token
+        ON password_recovery (token)
+    ''')
+
+
+def _add_keyset_pagination_indexes(cursor: sqlite3.Cursor):
+    """Versione 3: indici (..., created_at, id) per la paginazione a cursore"""
+    # Sostituiscono gli indici della versione 2, che non includevano l'id
+    # usato come criterio di spareggio nell'ordinamento
+    cursor.execute("DROP INDEX IF EXISTS idx_tasks_user_status_created")
+    cursor.execute("DROP INDEX IF EXISTS idx_tasks_user_created")
+    cursor.execute("DROP INDEX IF EXISTS idx_tasks_status_created")
+    cursor.execute("DROP INDEX IF EXISTS idx_tasks_created")
+
+    cursor.execute('''
+        CREATE INDEX idx_tasks_user_status_created
+        ON tasks (user_id, status, created_at, task_id)
+    ''')
+    cursor.execute('''
+        CREATE INDEX idx_tasks_user_created
+        ON tasks (user_id, created_at, task_id)
+    ''')
+    cursor.execute('''
+        CREATE INDEX idx_tasks_status_created
+        ON tasks (status, created_at, task_id)
+    ''')
+    cursor.execute('''
+        CREATE INDEX idx_tasks_created
+        ON tasks (created_at, task_id)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_users_created
+        ON users (created_at, user_id)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_admin_created
+        ON admin (created_at, admin_id)
+    ''')
+
+
+def _merge_users_into_principals(cursor: sqlite3.Cursor):
+    """Versione 4: tabella unica principals con colonna role al posto di users/admin"""
+    cursor.execute('''
+        CREATE TABLE principals (
+            user_id TEXT PRIMARY KEY,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            token TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            role TEXT NOT NULL DEFAULT 'user' CHECK (role IN ('user', 'admin')),
+            permissions TEXT
+        )
+    ''')
+
+    # Gli admin vengono copiati per primi: un utente standard in conflitto
+    # con un admin (stesso id, username o email, ad esempio dopo una
+    # promozione interrotta a metà) viene scartato e prevale il ruolo admin
+    cursor.execute('''
+        INSERT INTO principals (user_id, username, email, password_hash, token, created_at, role, permissions)
+        SELECT admin_id, username, email, password_hash, token, created_at, 'admin', permissions
+        FROM admin
+    ''')
+    cursor.execute('''
+        INSERT OR IGNORE INTO principals (user_id, username, email, password_hash, token, created_at, role)
+        SELECT user_id, username, email, password_hash, token, created_at, 'user'
+        FROM users
+    ''')
+
+    cursor.execute("DROP TABLE users")
+    cursor.execute("DROP TABLE admin")
+
+    cursor.execute('''
+        CREATE INDEX idx_principals_created
+        ON principals (created_at, user_id)
+    ''')
+
+    # Viste di compatibilità (sola lettura) con la forma delle vecchie tabelle
+    cursor.execute('''
+        CREATE VIEW users AS
+        SELECT user_id, username, email, password_hash, token, created_at
+        FROM principals WHERE role = 'user'
+    ''')
+    cursor.execute('''
+        CREATE VIEW admin AS
+        SELECT user_id AS admin_id, username, email, password_hash, token, created_at, permissions
+        FROM principals WHERE role = 'admin'
+    ''')
+
+def rebuild_counters(cursor: sqlite3.Cursor):
+    """Ricalcola da zero la tabella counters a partire da tasks, principals e tasks_archive"""
+    cursor.execute("DELETE FROM counters")
+    cursor.execute('''
+        INSERT INTO counters (scope, key, value)
+        SELECT 'tasks', '', COUNT(*) FROM tasks
+    ''')
+    cursor.execute('''
+        INSERT INTO counters (scope, key, value)
+        SELECT 'status', status, COUNT(*) FROM tasks GROUP BY status
+    ''')
+    cursor.execute('''
+        INSERT INTO counters (scope, key, value)
+        SELECT 'user', user_id, COUNT(*) FROM tasks GROUP BY user_id
+    ''')
+    cursor.execute('''
+        INSERT INTO counters (scope, key, value)
+        SELECT 'user_status', user_id || '/' || status, COUNT(*)
+        FROM tasks GROUP BY user_id, status
+    ''')
+    cursor.execute('''
+        INSERT INTO counters (scope, key, value)
+        SELECT 'role', role, COUNT(*) FROM principals GROUP BY role
+    ''')
+    # L'archivio esiste dalla versione 9
+    if cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_archive'"
+    ).fetchone():
+        cursor.execute('''
+            INSERT INTO counters (scope, key, value)
+            SELECT 'archived', '', COUNT(*) FROM tasks_archive
+        ''')
+
+
+def _add_counters(cursor: sqlite3.Cursor):
+    """Versione 5: contatori mantenuti dai trigger per le statistiche"""
+    # Una riga per contatore: (scope, key) identifica ad esempio
+    # ('status', 'Done'), ('user', <user_id>) o ('role', 'admin')
+    cursor.execute('''
+        CREATE TABLE counters (
+            scope TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (scope, key)
+        ) WITHOUT ROWID
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER trg_tasks_counters_insert AFTER INSERT ON tasks
+        BEGIN
+            INSERT INTO counters (scope, key, value) VALUES ('tasks', '', 1)
+                ON CONFLICT (scope, key) DO UPDATE SET value = value + 1;
+            INSERT INTO counters (scope, key, value) VALUES ('status', NEW.status, 1)
+                ON CONFLICT (scope, key) DO UPDATE SET value = value + 1;
+            INSERT INTO counters (scope, key, value) VALUES ('user', NEW.user_id, 1)
+                ON CONFLICT (scope, key) DO UPDATE SET value = value + 1;
+            INSERT INTO counters (scope, key, value) VALUES ('user_status', NEW.user_id || '/' || NEW.status, 1)
+                ON CONFLICT (scope, key) DO UPDATE SET value = value + 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER trg_tasks_counters_delete AFTER DELETE ON tasks
+        BEGIN
+            UPDATE counters SET value = value - 1
+            WHERE (scope = 'tasks' AND key = '')
+               OR (scope = 'status' AND key = OLD.status)
+               OR (scope = 'user' AND key = OLD.user_id)
+               OR (scope = 'user_status' AND key = OLD.user_id || '/' || OLD.status);
+        END
+    ''')
+    # Scatta solo se cambia lo stato o il proprietario del task
+    cursor.execute('''
+        CREATE TRIGGER trg_tasks_counters_update AFTER UPDATE OF status, user_id ON tasks
+        WHEN OLD.status IS NOT NEW.status OR OLD.user_id IS NOT NEW.user_id
+        BEGIN
+            UPDATE counters SET value = value - 1
+            WHERE (scope = 'status' AND key = OLD.status)
+               OR (scope = 'user' AND key = OLD.user_id)
+               OR (scope = 'user_status' AND key = OLD.user_id || '/' || OLD.status);
+            INSERT INTO counters (scope, key, value) VALUES ('status', NEW.status, 1)
+                ON CONFLICT (scope, key) DO UPDATE SET value = value + 1;
+            INSERT INTO counters (scope, key, value) VALUES ('user', NEW.user_id, 1)
+                ON CONFLICT (scope, key) DO UPDATE SET value = value + 1;
+            INSERT INTO counters (scope, key, value) VALUES ('user_status', NEW.user_id || '/' || NEW.status, 1)
+                ON CONFLICT (scope, key) DO UPDATE SET value = value + 1;
+        END
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER trg_principals_counters_insert AFTER INSERT ON principals
+        BEGIN
+            INSERT INTO counters (scope, key, value) VALUES ('role', NEW.role, 1)
+                ON CONFLICT (scope, key) DO UPDATE SET value = value + 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER trg_principals_counters_delete AFTER DELETE ON principals
+        BEGIN
+            UPDATE counters SET value = value - 1 WHERE scope = 'role' AND key = OLD.role;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER trg_principals_counters_update AFTER UPDATE OF role ON principals
+        WHEN OLD.role IS NOT NEW.role
+        BEGIN
+            UPDATE counters SET value = value - 1 WHERE scope = 'role' AND key = OLD.role;
+            INSERT INTO counters (scope, key, value) VALUES ('role', NEW.role, 1)
+                ON CONFLICT (scope, key) DO UPDATE SET value = value + 1;
+        END
+    ''')
+
+    rebuild_counters(cursor)
+
+def _iso_to_epoch(value):
+    """Converte un timestamp ISO salvato come testo in epoch (microsecondi)"""
+    if value is None or isinstance(value, int):
+        return value
+    return datetime_to_epoch(datetime.fromisoformat(value))
+
+
+def _convert_timestamps_to_epoch(cursor: sqlite3.Cursor):
+    """Versione 6: timestamp salvati come epoch intero (microsecondi) invece che testo ISO"""
+    # La conversione avviene in Python: julianday() di SQLite perde i
+    # microsecondi e interpreta il testo come UTC anziché ora locale
+    conversions = [
+        ('principals', 'user_id', ('created_at',)),
+        ('tasks', 'task_id', ('created_at', 'updated_at')),
+        ('password_recovery', 'recovery_id', ('created_at',)),
+    ]
+    # Un timestamp illeggibile interrompe la migrazione (lo schema resta
+    # alla versione 5): salvarlo come NULL lo farebbe apparire come "adesso"
+    for table, id_column, columns in conversions:
+        rows = cursor.execute(
+            f"SELECT {id_column}, {', '.join(columns)} FROM {table}"
+        ).fetchall()
+        updates = []
+        for row in rows:
+            converted = []
+            for column, value in zip(columns, row[1:]):
+                try:
+                    converted.append(_iso_to_epoch(value))
+                except (ValueError, TypeError) as e:
+                    raise ValueError(
+                        f"Timestamp non valido in {table}.{column} "
+                        f"({id_column} = {row[0]!r}): {value!r}"
+                    ) from e
+            updates.append(tuple(converted) + (row[0],))
+        assignments = ', '.join(f"{column} = ?" for column in columns)
+        cursor.executemany(f"UPDATE {table} SET {assignments} WHERE {id_column} = ?", updates)
+
+
+def rebuild_search_index(cursor: sqlite3.Cursor):
+    """
+    Ricostruisce tasks_fts dal contenuto attuale di tasks
+    Va eseguita anche dopo un VACUUM: tasks non ha una chiave INTEGER
+    PRIMARY KEY, quindi VACUUM può rinumerare i rowid a cui punta l'indice
+    """
+    cursor.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+
+
+def _add_search_index(cursor: sqlite3.Cursor):
+    """Versione 7: indice full-text FTS5 su titolo e descrizione dei task"""
+    # Tabella a contenuto esterno: il testo resta solo in tasks e l'indice
+    # punta alle righe tramite rowid. Il proprietario è indicizzato per
+    # limitare la ricerca ai task di un utente senza uscire dall'indice;
+    # la vista toglie i trattini dallo UUID così diventa un solo token
+    # invece di una frase di cinque. I prefissi di 2 e 3 caratteri sono
+    # indicizzati per la ricerca per prefisso.
+    cursor.execute('''
+        CREATE VIEW tasks_search_source AS
+        SELECT rowid AS task_rowid, title, description,
+               replace(user_id, '-', '') AS owner
+        FROM tasks
+    ''')
+    cursor.execute('''
+        CREATE VIRTUAL TABLE tasks_fts USING fts5(
+            title, description, owner,
+            content = 'tasks_search_source', content_rowid = 'task_rowid',
+            prefix = '2 3',
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    ''')
+
+    # Con il contenuto esterno la cancellazione deve ricevere i valori
+    # indicizzati, cioè quelli precedenti alla modifica
+    cursor.execute('''
+        CREATE TRIGGER trg_tasks_fts_insert AFTER INSERT ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (rowid, title, description, owner)
+                VALUES (NEW.rowid, NEW.title, NEW.description, replace(NEW.user_id, '-', ''));
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER trg_tasks_fts_delete AFTER DELETE ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description, owner)
+                VALUES ('delete', OLD.rowid, OLD.title, OLD.description, replace(OLD.user_id, '-', ''));
+        END
+    ''')
+    # I cambi di stato (il caso più frequente) non toccano l'indice
+    cursor.execute('''
+        CREATE TRIGGER trg_tasks_fts_update AFTER UPDATE OF title, description, user_id ON tasks
+        WHEN OLD.title IS NOT NEW.title OR OLD.description IS NOT NEW.description
+             OR OLD.user_id IS NOT NEW.user_id
+        BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description, owner)
+                VALUES ('delete', OLD.rowid, OLD.title, OLD.description, replace(OLD.user_id, '-', ''));
+            INSERT INTO tasks_fts (rowid, title, description, owner)
+                VALUES (NEW.rowid, NEW.title, NEW.description, replace(NEW.user_id, '-', ''));
+        END
+    ''')
+
+    rebuild_search_index(cursor)
+
+
+# Istante corrente in epoch (microsecondi) calcolato da SQLite nei trigger
+_SQL_NOW_EPOCH = "CAST((julianday('now') - 2440587.5) * 86400000000 AS INTEGER)"
+
+
+def _add_task_changes(cursor: sqlite3.Cursor):
+    """Versione 8: registro delle modifiche ai task per la sincronizzazione incrementale"""
+    # AUTOINCREMENT: le versioni non vengono mai riusate, nemmeno dopo la
+    # compattazione del registro. user_id è il proprietario al momento della
+    # modifica, così un client può chiedere solo le modifiche ai propri task
+    cursor.execute('''
+        CREATE TABLE task_changes (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_id TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            operation TEXT NOT NULL CHECK (operation IN ('insert', 'update', 'delete')),
+            changed_at INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX idx_task_changes_user ON task_changes (user_id, version)")
+    cursor.execute("CREATE INDEX idx_task_changes_task ON task_changes (task_id, version)")
+
+    # Valori interi della sincronizzazione: 'task_changes_horizon' è l'ultima
+    # versione eliminata dalla compattazione (chi è più indietro deve ricaricare tutto)
+    cursor.execute('''
+        CREATE TABLE sync_state (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+
+    cursor.execute(f'''
+        CREATE TRIGGER trg_tasks_changes_insert AFTER INSERT ON tasks
+        BEGIN
+            INSERT INTO task_changes (task_id, user_id, operation, changed_at)
+                VALUES (NEW.task_id, NEW.user_id, 'insert', {_SQL_NOW_EPOCH});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER trg_tasks_changes_delete AFTER DELETE ON tasks
+        BEGIN
+            INSERT INTO task_changes (task_id, user_id, operation, changed_at)
+                VALUES (OLD.task_id, OLD.user_id, 'delete', {_SQL_NOW_EPOCH});
+        END
+    ''')
+    # Un task che cambia proprietario sparisce per il vecchio utente: la
+    # cancellazione viene registrata prima, con una versione più bassa.
+    # Un UPDATE che lascia invariati i campi visibili non viene registrato
+    cursor.execute(f'''
+        CREATE TRIGGER trg_tasks_changes_update AFTER UPDATE ON tasks
+        WHEN OLD.title IS NOT NEW.title OR OLD.description IS NOT NEW.description
+             OR OLD.status IS NOT NEW.status OR OLD.user_id IS NOT NEW.user_id
+             OR OLD.task_id IS NOT NEW.task_id
+        BEGIN
+            INSERT INTO task_changes (task_id, user_id, operation, changed_at)
+                SELECT OLD.task_id, OLD.user_id, 'delete', {_SQL_NOW_EPOCH}
+                WHERE OLD.user_id IS NOT NEW.user_id OR OLD.task_id IS NOT NEW.task_id;
+            INSERT INTO task_changes (task_id, user_id, operation, changed_at)
+                VALUES (NEW.task_id, NEW.user_id, 'update', {_SQL_NOW_EPOCH});
+        END
+    ''')
+
+
+def compact_task_changes(cursor: sqlite3.Cursor, older_than: int) -> int:
+    """
+    Compatta il registro delle modifiche; restituisce le righe eliminate
+    Per ogni task (e proprietario) basta l'ultima modifica: le precedenti
+    vengono eliminate senza conseguenze per i client. Le modifiche con
+    changed_at < older_than vengono eliminate e l'orizzonte avanza: i client
+    fermi a una versione precedente devono ricaricare tutto.
+    """
+    cursor.execute('''
+        DELETE FROM task_changes
+        WHERE version < (
+            SELECT MAX(newer.version) FROM task_changes AS newer
+            WHERE newer.task_id = task_changes.task_id
+              AND newer.user_id = task_changes.user_id
+        )
+    ''')
+    removed = cursor.rowcount
+
+    horizon = cursor.execute(
+        "SELECT MAX(version) FROM task_changes WHERE changed_at < ?", (older_than,)
+    ).fetchone()[0]
+    if horizon is not None:
+        cursor.execute("DELETE FROM task_changes WHERE version <= ?", (horizon,))
+        removed += cursor.rowcount
+        cursor.execute('''
+            INSERT INTO sync_state (key, value) VALUES ('task_changes_horizon', ?)
+                ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)
+        ''', (horizon,))
+    return removed
+
+
+# Colonne copiate tra tasks e tasks_archive
+ARCHIVE_COLUMNS = "task_id, title, description, status, user_id, created_at, updated_at"
+
+
+def _add_tasks_archive(cursor: sqlite3.Cursor):
+    """Versione 9: archivio dei task completati"""
+    # Stesse colonne di tasks più archived_at; i task archiviati restano
+    # fuori da tasks (e quindi da contatori, ricerca e registro delle modifiche)
+    cursor.execute('''
+        CREATE TABLE tasks_archive (
+            task_id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            description TEXT,
+            status TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            created_at INTEGER,
+            updated_at INTEGER,
+            archived_at INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX idx_tasks_archive_user_created
+        ON tasks_archive (user_id, created_at, task_id)
+    ''')
+    cursor.execute('''
+        CREATE INDEX idx_tasks_archive_created
+        ON tasks_archive (created_at, task_id)
+    ''')
+    # Navigazione dell'archivio, dal task archiviato più di recente
+    cursor.execute('''
+        CREATE INDEX idx_tasks_archive_archived
+        ON tasks_archive (archived_at, task_id)
+    ''')
+    # Indice parziale per il job di archiviazione: contiene solo i task
+    # completati, quindi non rallenta le scritture sugli altri
+    cursor.execute('''
+        CREATE INDEX idx_tasks_done_updated
+        ON tasks (updated_at) WHERE status = 'Done'
+    ''')
+
+    # Lettura unificata per include_archived
+    cursor.execute(f'''
+        CREATE VIEW tasks_with_archive AS
+        SELECT {ARCHIVE_COLUMNS} FROM tasks
+        UNION ALL
+        SELECT {ARCHIVE_COLUMNS} FROM tasks_archive
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER trg_tasks_archive_counters_insert AFTER INSERT ON tasks_archive
+        BEGIN
+            INSERT INTO counters (scope, key, value) VALUES ('archived', '', 1)
+                ON CONFLICT (scope, key) DO UPDATE SET value = value + 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER trg_tasks_archive_counters_delete AFTER DELETE ON tasks_archive
+        BEGIN
+            UPDATE counters SET value = value - 1 WHERE scope = 'archived' AND key = '';
+        END
+    ''')
+
+
+def _add_recovery_expiry(cursor: sqlite3.Cursor):
+    """Versione 10: scadenza dei token di recupero in colonna, con indice"""
+    cursor.execute("ALTER TABLE password_recovery ADD COLUMN expires_at INTEGER")
+    # I token esistenti valevano un'ora dalla creazione; quelli usati (o senza
+    # data) scadono subito, così la pulizia li trova con lo stesso indice
+    cursor.execute('''
+        UPDATE password_recovery
+        SET expires_at = CASE
+            WHEN is_used OR created_at IS NULL THEN COALESCE(created_at, 0)
+            ELSE created_at + 3600 * 1000000
+        END
+    ''')
+    cursor.execute('''
+        CREATE INDEX idx_password_recovery_expires
+        ON password_recovery (expires_at)
+    ''')
+
+
+def _rebuild_table(cursor: sqlite3.Cursor, table: str, create_sql: str):
+    """
+    Ricrea table con la definizione create_sql ({table} è il nome da usare)
+    copiando righe e rowid (a cui punta tasks_fts) e ricreando gli indici
+    SQLite non permette di aggiungere vincoli a una tabella esistente
+    """
+    columns = ', '.join(row[1] for row in cursor.execute(f"PRAGMA table_info({table})").fetchall())
+    indexes = [row[0] for row in cursor.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,)
+    ).fetchall()]
+    cursor.execute(create_sql.format(table=f"{table}_new"))
+    cursor.execute(f"INSERT INTO {table}_new (rowid, {columns}) SELECT rowid, {columns} FROM {table}")
+    cursor.execute(f"DROP TABLE {table}")
+    cursor.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+    for index_sql in indexes:
+        cursor.execute(index_sql)
+
+
+def _add_foreign_keys(cursor: sqlite3.Cursor):
+    """Versione 11: chiavi esterne verso principals con ON DELETE CASCADE"""
+    # Le righe orfane (utenti eliminati senza i loro task) violerebbero il
+    # vincolo: vengono eliminate come avrebbe fatto la cascata, prima di
+    # togliere i trigger, così contatori, ricerca e registro restano coerenti
+    for table in ('tasks', 'tasks_archive', 'password_recovery'):
+        cursor.execute(f'''
+            DELETE FROM {table}
+            WHERE NOT EXISTS (SELECT 1 FROM principals p WHERE p.user_id = {table}.user_id)
+        ''')
+
+    # Viste e trigger fanno riferimento alle tabelle ricreate: vengono tolti
+    # e ricreati nell'ordine originale dopo la ricostruzione
+    saved = cursor.execute('''
+        SELECT type, name, sql FROM sqlite_master
+        WHERE type IN ('view', 'trigger') AND sql IS NOT NULL
+        ORDER BY rowid
+    ''').fetchall()
+    for object_type, name, _sql in saved:
+        cursor.execute(f"DROP {object_type.upper()} {name}")
+
+    _rebuild_table(cursor, 'tasks', '''
+        CREATE TABLE {table} (
+            task_id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            description TEXT,
+            status TEXT NOT NULL DEFAULT 'To Do',
+            user_id TEXT NOT NULL REFERENCES principals (user_id) ON DELETE CASCADE,
+            user_type TEXT NOT NULL DEFAULT 'user',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    _rebuild_table(cursor, 'tasks_archive', '''
+        CREATE TABLE {table} (
+            task_id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            description TEXT,
+            status TEXT NOT NULL,
+            user_id TEXT NOT NULL REFERENCES principals (user_id) ON DELETE CASCADE,
+            created_at INTEGER,
+            updated_at INTEGER,
+            archived_at INTEGER NOT NULL
+        )
+    ''')
+    _rebuild_table(cursor, 'password_recovery', '''
+        CREATE TABLE {table} (
+            recovery_id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL REFERENCES principals (user_id) ON DELETE CASCADE,
+            email TEXT NOT NULL,
+            token TEXT NOT NULL,
+            is_used INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at INTEGER
+        )
+    ''')
+    # La cascata cerca i token per utente (i task hanno già indici su user_id)
+    cursor.execute('''
+        CREATE INDEX idx_password_recovery_user
+        ON password_recovery (user_id)
+    ''')
+
+    for _object_type, _name, sql in saved:
+        cursor.execute(sql)
+
+def _add_principals_version(cursor: sqlite3.Cursor):
+    """Versione 12: versione dell'elenco utenti per le risposte con ETag"""
+    # 'principals_version' in sync_state cresce a ogni inserimento,
+    # eliminazione o modifica dei campi visibili di un utente (non della
+    # password o del token): un client che ha già la versione attuale non
+    # deve rileggere l'elenco
+    bump = '''
+        INSERT INTO sync_state (key, value) VALUES ('principals_version', 1)
+            ON CONFLICT (key) DO UPDATE SET value = value + 1;
+    '''
+    cursor.execute(f'''
+        CREATE TRIGGER trg_principals_version_insert AFTER INSERT ON principals
+        BEGIN {bump} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER trg_principals_version_delete AFTER DELETE ON principals
+        BEGIN {bump} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER trg_principals_version_update AFTER UPDATE ON principals
+        WHEN OLD.user_id IS NOT NEW.user_id OR OLD.username IS NOT NEW.username
+             OR OLD.email IS NOT NEW.email OR OLD.role IS NOT NEW.role
+             OR OLD.created_at IS NOT NEW.created_at
+        BEGIN {bump} END
+    ''')
+
+
+# Elenco ordinato delle migrazioni: (versione, descrizione, funzione)
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Cursor], None]]] = [
+    (1, "Schema di base", _create_base_schema),
+    (2, "Indici su tasks e password_recovery", _add_task_and_token_indexes),
+    (3, "Indici per la paginazione a cursore", _add_keyset_pagination_indexes),
+    (4, "Tabella unica principals con ruolo", _merge_users_into_principals),
+    (5, "Contatori mantenuti dai trigger", _add_counters),
+    (6, "Timestamp come epoch intero", _convert_timestamps_to_epoch),
+    (7, "Indice full-text sui task", _add_search_index),
+    (8, "Registro delle modifiche ai task", _add_task_changes),
+    (9, "Archivio dei task completati", _add_tasks_archive),
+    (10, "Scadenza dei token di recupero", _add_recovery_expiry),
+    (11, "Chiavi esterne con cancellazione a cascata", _add_foreign_keys),
+    (12, "Versione dell'elenco utenti", _add_principals_version),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Restituisce la versione corrente dello schema"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def apply_migrations(conn: sqlite3.Connection) -> List[int]:
+    """
+    Applica in ordine le migrazioni mancanti
+    Ogni migrazione gira nella propria transazione insieme all'aggiornamento
+    di user_version, quindi un errore lascia lo schema alla versione precedente
+    Restituisce le versioni applicate
+    """
+    if get_schema_version(conn) >= LATEST_VERSION:
+        return []
+
+    applied = []
+    for version, _description, migrate in MIGRATIONS:
+        # BEGIN IMMEDIATE serializza le migrazioni tra processi diversi;
+        # la versione va riletta dopo aver ottenuto il lock
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            migrate(conn.cursor())
+            conn.execute(f"PRAGMA user_version = {version:d}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+
+    return applied
@@ -2,13 +2,63 @@
 # Contiene le classi per User, Task e Admin con la logica di dominio
 
 import hashlib
+import sys
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Optional
+from config import Config
+
+
+def datetime_to_epoch(dt: datetime) -> int:
+    """Converte un datetime in epoch intero (microsecondi), come salvato nel database"""
+    return int(dt.replace(microsecond=0).timestamp()) * 1_000_000 + dt.microsecond
+
+
+def epoch_to_datetime(epoch: Optional[int]) -> datetime:
+    """Converte un epoch in microsecondi nel datetime locale corrispondente"""
+    if epoch is None:
+        return datetime.now()
+    # Per date realistiche il float conserva il microsecondo esatto
+    return datetime.fromtimestamp(epoch / 1_000_000)
+
+
+class EpochDateTime:
+    """
+    Attributo datetime caricato dal database come epoch intero
+    from_row salva il valore grezzo nello slot _<nome>_epoch;
+    la conversione in datetime avviene solo al primo accesso
+    e il risultato resta nello slot _<nome>
+    """
+    
+    def __set_name__(self, owner, name):
+        self.value_name = f"_{name}"
+        self.epoch_name = f"_{name}_epoch"
+    
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = getattr(obj, self.value_name, None)
+        if value is None:
+            value = epoch_to_datetime(getattr(obj, self.epoch_name, None))
+            setattr(obj, self.value_name, value)
+        return value
+    
+    def __set__(self, obj, value: datetime):
+        setattr(obj, self.value_name, value)
+
 
 class User:
     """Classe per rappresentare un utente del sistema"""
     
+    __slots__ = ('user_id', 'username', 'email', 'password_hash', 'is_admin', 'token',
+                 '_created_at', '_created_at_epoch')
+    
+    created_at = EpochDateTime()
+    
+    # Ruoli memorizzati nella colonna role della tabella principals
+    ROLE_USER = "user"
+    ROLE_ADMIN = "admin"
+    
     def __init__(self, username: str, email: str, password: str, user_id: str = None):
         self.user_id = user_id or str(uuid.uuid4())
         self.username = username
@@ -18,6 +68,30 @@ class User:
         self.is_admin = False
         self.token = None
     
+    @classmethod
+    def from_row(cls, row) -> 'User':
+        """Crea un User o un Admin da una riga di principals"""
+        is_admin = row['role'] == cls.ROLE_ADMIN
+        user = object.__new__(Admin if is_admin else User)
+        user.user_id = row['user_id']
+        user.username = row['username']
+        user.email = row['email']
+        user.password_hash = row['password_hash']
+        user.is_admin = is_admin
+        user.token = row['token']
+        user._created_at_epoch = row['created_at']
+        return user
+    
+    def to_dict(self) -> dict:
+        """Rappresentazione serializzabile in JSON (senza hash della password e token)"""
+        return {
+            'user_id': self.user_id,
+            'username': self.username,
+            'email': self.email,
+            'role': self.role,
+            'created_at': self.created_at.isoformat()
+        }
+    
     def _hash_password(self, password: str) -> str:
         """Hash della password usando SHA256"""
         return hashlib.sha256(password.encode()).hexdigest()
@@ -30,6 +104,11 @@ class User:
         """Cambia la password dell'utente"""
         self.password_hash = self._hash_password(new_password)
     
+    @property
+    def role(self) -> str:
+        """Ruolo dell'utente derivato da is_admin"""
+        return self.ROLE_ADMIN if self.is_admin else self.ROLE_USER
+    
     def generate_token(self) -> str:
         """Genera un token univoco per la sicurezza"""
         self.token = str(uuid.uuid4())
@@ -49,6 +128,12 @@ class Task:
     
     VALID_STATUSES = [STATUS_TODO, STATUS_DOING, STATUS_DONE]
     
+    __slots__ = ('task_id', 'title', 'description', 'status', 'user_id',
+                 '_created_at', '_created_at_epoch', '_updated_at', '_updated_at_epoch')
+    
+    created_at = EpochDateTime()
+    updated_at = EpochDateTime()
+    
     def __init__(self, title: str, description: str, user_id: str, task_id: str = None, status: str = STATUS_TODO):
         self.task_id = task_id or str(uuid.uuid4())
         self.title = title
@@ -58,6 +143,33 @@ class Task:
         self.created_at = datetime.now()
         self.updated_at = datetime.now()
     
+    @classmethod
+    def from_row(cls, row) -> 'Task':
+        """Crea un Task da una riga della tabella tasks senza passare da __init__"""
+        task = object.__new__(cls)
+        task.task_id = row['task_id']
+        task.title = row['title']
+        task.description = row['description']
+        # Stato e proprietario si ripetono su molte righe: con sys.intern
+        # tutti i task condividono la stessa stringa invece di una copia ciascuno
+        task.status = sys.intern(row['status'])
+        task.user_id = sys.intern(row['user_id'])
+        task._created_at_epoch = row['created_at']
+        task._updated_at_epoch = row['updated_at']
+        return task
+    
+    def to_dict(self) -> dict:
+        """Rappresentazione serializzabile in JSON"""
+        return {
+            'task_id': self.task_id,
+            'title': self.title,
+            'description': self.description,
+            'status': self.status,
+            'user_id': self.user_id,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+    
     def update_status(self, new_status: str):
         """Aggiorna lo stato del task"""
         if new_status in self.VALID_STATUSES:
@@ -81,6 +193,8 @@ class Task:
 class Admin(User):
     """Classe Admin che estende User con privilegi aggiuntivi"""
     
+    __slots__ = ()
+    
     def __init__(self, username: str, email: str, password: str, user_id: str = None):
         super().__init__(username, email, password, user_id)
         self.is_admin = True
@@ -112,23 +226,53 @@ class Admin(User):
 class PasswordRecovery:
     """Classe per gestire il recupero password"""
     
+    __slots__ = ('recovery_id', 'user_id', 'email', 'token', 'is_used',
+                 '_created_at', '_created_at_epoch', '_expires_at', '_expires_at_epoch')
+    
+    created_at = EpochDateTime()
+    expires_at = EpochDateTime()
+    
     def __init__(self, user_id: str, email: str):
         self.recovery_id = str(uuid.uuid4())
         self.user_id = user_id
         self.email = email
         self.token = str(uuid.uuid4())
         self.created_at = datetime.now()
+        self.expires_at = self.created_at + timedelta(hours=Config.TOKEN_EXPIRY_HOURS)
         self.is_used = False
     
+    @classmethod
+    def from_row(cls, row) -> 'PasswordRecovery':
+        """Crea un PasswordRecovery da una riga della tabella password_recovery"""
+        recovery = object.__new__(cls)
+        recovery.recovery_id = row['recovery_id']
+        recovery.user_id = row['user_id']
+        recovery.email = row['email']
+        recovery.token = row['token']
+        recovery.is_used = bool(row['is_used'])
+        recovery._created_at_epoch = row['created_at']
+        recovery._expires_at_epoch = row['expires_at']
+        return recovery
+    
+    def to_dict(self) -> dict:
+        """Rappresentazione serializzabile in JSON (senza token)"""
+        return {
+            'recovery_id': self.recovery_id,
+            'user_id': self.user_id,
+            'email': self.email,
+            'is_used': self.is_used,
+            'created_at': self.created_at.isoformat(),
+            'expires_at': self.expires_at.isoformat()
+        }
+    
     def use_token(self):
-        """Marca il token come utilizzato"""
+        """Marca il token come utilizzato (e quindi scaduto)"""
         self.is_used = True
+        self.expires_at = min(self.expires_at, datetime.now())
     
     def is_valid(self) -> bool:
         """Verifica se il token è ancora valido (non usato e non scaduto)"""
-        # Token valido per 1 ora
-        time_diff = datetime.now() - self.created_at
-        return not self.is_used and time_diff.total_seconds() < 3600
+        return not self.is_used and datetime.now() < self.expires_at
     
     def __str__(self):
         return f"PasswordRecovery(id={self.recovery_id}, user_id={self.user_id}, email={self.email})"
\ No newline at end of file
@@ -22,6 +22,7 @@ from rich.tree import Tree
 from rich.syntax import Syntax
 from rich import box
 from rich.markdown import Markdown
+from rich.markup import escape
 
 # tqdm imports
 #from tqdm import tqdm
@@ -29,8 +30,9 @@ from rich.markdown import Markdown
 # Local imports
 from database import DatabaseManager
 from model import User, Task, Admin, PasswordRecovery
-from utils import validate_email, validate_password_strength, validate_username
+from utils import validate_email, validate_password_strength, validate_username, parse_task_id_input, unique_prefix_length
 from config import Config
+from search import MARK_START, MARK_END
 
 class RichTaskboardCLI:
     """CLI migliorata con Rich per Taskboard"""
@@ -72,6 +74,8 @@ class RichTaskboardCLI:
             except Exception as e:
                 self.console.print(f"[bold red]Errore: {str(e)}[/bold red]")
                 self.console.print_exception()
+        
+        self.db.close()
     
     def show_welcome_screen(self):
         """Mostra schermata di benvenuto animata"""
@@ -164,17 +168,19 @@ class RichTaskboardCLI:
 [bold cyan]5.[/bold cyan] 🗑️  Elimina task
 [bold cyan]6.[/bold cyan] 📊 Statistiche personali
 [bold cyan]7.[/bold cyan] 🔒 Cambia password
+[bold cyan]8.[/bold cyan] 🔍 Cerca task
         """
         
         if self.current_user.is_admin:
             menu_content += """
-[bold red]8.[/bold red] 👥 Visualizza tutti gli utenti
-[bold red]9.[/bold red] 📊 Visualizza tutti i task
-[bold red]10.[/bold red] 👤 Crea nuovo utente
-[bold red]11.[/bold red] 📋 Assegna task
-[bold red]12.[/bold red] 🔧 Gestisci utenti
-[bold red]13.[/bold red] 🗑️ Elimina utente
-[bold red]14.[/bold red] 🔧 Gestisci task utenti
+[bold red]9.[/bold red] 👥 Visualizza tutti gli utenti
+[bold red]10.[/bold red] 📊 Visualizza tutti i task
+[bold red]11.[/bold red] 👤 Crea nuovo utente
+[bold red]12.[/bold red] 📋 Assegna task
+[bold red]13.[/bold red] 🔧 Gestisci utenti
+[bold red]14.[/bold red] 🗑️ Elimina utente
+[bold red]15.[/bold red] 🔧 Gestisci task utenti
+[bold red]16.[/bold red] 🗄️ Archivio task
             """
         
         menu_content += "\n[bold cyan]0.[/bold cyan] 🚪 Logout"
@@ -188,7 +194,7 @@ class RichTaskboardCLI:
         
         self.console.print(menu_panel)
         
-        max_choice = "14" if self.current_user.is_admin else "7"
+        max_choice = "16" if self.current_user.is_admin else "8"
         choices = [str(i) for i in range(int(max_choice) + 1)]
         
         choice = Prompt.ask(
@@ -212,20 +218,24 @@ class RichTaskboardCLI:
             self.show_personal_stats()
         elif choice == "7":
             self.change_password()
-        elif choice == "8" and self.current_user.is_admin:
-            self.show_all_users()
+        elif choice == "8":
+            self.search_tasks()
         elif choice == "9" and self.current_user.is_admin:
-            self.show_all_tasks()
+            self.show_all_users()
         elif choice == "10" and self.current_user.is_admin:
-            self.create_user()
+            self.show_all_tasks()
         elif choice == "11" and self.current_user.is_admin:
-            self.assign_task()
+            self.create_user()
         elif choice == "12" and self.current_user.is_admin:
-            self.manage_users()
+            self.assign_task()
         elif choice == "13" and self.current_user.is_admin:
-            self.delete_user()
+            self.manage_users()
         elif choice == "14" and self.current_user.is_admin:
+            self.delete_user()
+        elif choice == "15" and self.current_user.is_admin:
             self.manage_user_tasks()
+        elif choice == "16" and self.current_user.is_admin:
+            self.show_archive()
         elif choice == "0":
             self.handle_logout()
     
@@ -328,6 +338,39 @@ class RichTaskboardCLI:
         else:
             self.console.print("[bold red]❌ Errore durante la registrazione.[/bold red]")
     
+    def _print_ambiguous_id(self, prefix: str, matches: List[str]):
+        """Elenca gli ID che iniziano con un prefisso ambiguo"""
+        width = unique_prefix_length(matches)
+        candidates = ", ".join(match[:width] for match in matches)
+        self.console.print(f"[bold yellow]⚠️ L'ID '{escape(prefix)}' è ambiguo: {candidates}... inserisci più caratteri.[/bold yellow]")
+    
+    def _resolve_task(self, task_id: str, user_id: str = None) -> Optional[Task]:
+        """
+        Risolve un ID task completo o abbreviato (tra i task di user_id se indicato)
+        Stampa un errore se l'ID non è valido, non esiste o è ambiguo
+        """
+        prefix = parse_task_id_input(task_id)
+        matches = self.db.resolve_task_prefix(prefix, user_id=user_id) if prefix else []
+        if len(matches) > 1:
+            self._print_ambiguous_id(prefix, matches)
+            return None
+        task = self.db.get_task_by_id(matches[0]) if matches else None
+        if not task:
+            self.console.print("[bold red]❌ Task non trovato o non autorizzato.[/bold red]")
+        return task
+    
+    def _resolve_user(self, user_id: str) -> Optional[User]:
+        """Risolve un ID utente completo o abbreviato; stampa un errore se non trovato o ambiguo"""
+        prefix = parse_task_id_input(user_id)
+        matches = self.db.resolve_user_prefix(prefix) if prefix else []
+        if len(matches) > 1:
+            self._print_ambiguous_id(prefix, matches)
+            return None
+        user = self.db.get_user_by_id(matches[0]) if matches else None
+        if not user:
+            self.console.print("[bold red]❌ Utente non trovato.[/bold red]")
+        return user
+    
     def show_user_tasks(self):
         """Mostra i task dell'utente con tabella elegante"""
         tasks = self.db.get_user_tasks(self.current_user.user_id)
@@ -337,8 +380,9 @@ class RichTaskboardCLI:
             return
         
         # Crea tabella
+        id_width = unique_prefix_length([t.task_id for t in tasks])
         table = Table(title=f"📋 I MIEI TASK ({len(tasks)})", box=box.ROUNDED)
-        table.add_column("ID", style="dim", width=8)
+        table.add_column("ID", style="dim", width=id_width)
         table.add_column("Titolo", style="bold")
         table.add_column("Stato", justify="center")
         table.add_column("Descrizione", style="dim")
@@ -360,7 +404,7 @@ class RichTaskboardCLI:
                 table.add_row("", f"[bold {style}]{status}[/bold {style}]", "", "", "")
                 
                 for task in task_list:
-                    task_id_short = task.task_id[:8]
+                    task_id_short = task.task_id[:id_width]
                     title = task.title[:30] + "..." if len(task.title) > 30 else task.title
                     description = task.description[:40] + "..." if task.description and len(task.description) > 40 else task.description or ""
                     created = task.created_at.strftime('%d/%m/%Y')
@@ -414,19 +458,65 @@ class RichTaskboardCLI:
         else:
             self.console.print("[bold red]❌ Errore durante la creazione del task.[/bold red]")
     
+    def search_tasks(self):
+        """Ricerca full-text nei task (tutti i task se admin)"""
+        query = Prompt.ask("[bold cyan]🔍 Cerca (caf* per prefisso)[/bold cyan]").strip()
+        if not query:
+            return
+        
+        owner = None if self.current_user.is_admin else self.current_user.user_id
+        cursor = None
+        page = 1
+        while True:
+            results, cursor = self.db.search_tasks(query, user_id=owner, cursor=cursor)
+            if not results:
+                if page == 1:
+                    self.console.print(f"[yellow]🔍 Nessun task trovato per \"{escape(query)}\".[/yellow]")
+                return
+            
+            id_width = unique_prefix_length([result['task'].task_id for result in results])
+            table = Table(title=f"🔍 RISULTATI PER \"{escape(query)}\" (pagina {page})", box=box.ROUNDED)
+            table.add_column("ID", style="dim", width=id_width)
+            table.add_column("Titolo", style="bold")
+            table.add_column("Stato", justify="center")
+            table.add_column("Frammento", style="dim")
+            
+            status_styles = {
+                Task.STATUS_TODO: "red",
+                Task.STATUS_DOING: "yellow",
+                Task.STATUS_DONE: "green"
+            }
+            for result in results:
+                task = result['task']
+                style = status_styles.get(task.status, "white")
+                # Escape del testo prima di evidenziare i termini trovati
+                snippet = escape(result['snippet']).replace(MARK_START, "[bold yellow]").replace(MARK_END, "[/bold yellow]")
+                table.add_row(
+                    task.task_id[:id_width],
+                    escape(task.title),
+                    f"[{style}]{task.status}[/{style}]",
+                    snippet
+                )
+            
+            self.console.print(table)
+            
+            if not cursor or not Confirm.ask("Mostrare altri risultati?", default=False):
+                return
+            page += 1
+    
     def show_personal_stats(self):
         """Mostra statistiche personali con grafici"""
-        tasks = self.db.get_user_tasks(self.current_user.user_id)
+        counts = self.db.get_task_count_by_status(self.current_user.user_id)
+        total = sum(counts.values())
         
-        if not tasks:
+        if not total:
             self.console.print("[yellow]📊 Nessuna statistica disponibile.[/yellow]")
             return
         
         # Calcola statistiche
-        total = len(tasks)
-        todo = len([t for t in tasks if t.status == Task.STATUS_TODO])
-        doing = len([t for t in tasks if t.status == Task.STATUS_DOING])
-        done = len([t for t in tasks if t.status == Task.STATUS_DONE])
+        todo = counts[Task.STATUS_TODO]
+        doing = counts[Task.STATUS_DOING]
+        done = counts[Task.STATUS_DONE]
         completion_rate = (done / total * 100) if total > 0 else 0
         
         # Crea layout per statistiche
@@ -591,10 +681,9 @@ class RichTaskboardCLI:
         self.show_user_tasks()
         
         task_id = Prompt.ask("[bold cyan]Inserisci l'ID del task da modificare[/bold cyan]")
-        task = self.db.get_task_by_id(task_id)
+        task = self._resolve_task(task_id, self.current_user.user_id)
         
-        if not task or task.user_id != self.current_user.user_id:
-            self.console.print("[bold red]❌ Task non trovato o non autorizzato.[/bold red]")
+        if not task:
             return
         
         # Mostra dettagli task corrente
@@ -627,10 +716,9 @@ class RichTaskboardCLI:
         self.show_user_tasks()
         
         task_id = Prompt.ask("[bold cyan]Inserisci l'ID del task[/bold cyan]")
-        task = self.db.get_task_by_id(task_id)
+        task = self._resolve_task(task_id, self.current_user.user_id)
         
-        if not task or task.user_id != self.current_user.user_id:
-            self.console.print("[bold red]❌ Task non trovato o non autorizzato.[/bold red]")
+        if not task:
             return
         
         # Mostra stati disponibili
@@ -671,10 +759,9 @@ class RichTaskboardCLI:
         self.show_user_tasks()
         
         task_id = Prompt.ask("[bold cyan]Inserisci l'ID del task da eliminare[/bold cyan]")
-        task = self.db.get_task_by_id(task_id)
+        task = self._resolve_task(task_id, self.current_user.user_id)
         
-        if not task or task.user_id != self.current_user.user_id:
-            self.console.print("[bold red]❌ Task non trovato o non autorizzato.[/bold red]")
+        if not task:
             return
         
         # Mostra dettagli task
@@ -686,7 +773,7 @@ class RichTaskboardCLI:
         self.console.print(task_panel)
         
         if Confirm.ask("[bold red]Sei sicuro di voler eliminare questo task?[/bold red]"):
-            if self.db.delete_task(task_id):
+            if self.db.delete_task(task.task_id):
                 self.console.print("[bold green]✅ Task eliminato con successo![/bold green]")
             else:
                 self.console.print("[bold red]❌ Errore durante l'eliminazione.[/bold red]")
@@ -723,15 +810,16 @@ class RichTaskboardCLI:
             return
         
         # Crea tabella utenti
+        id_width = unique_prefix_length([u.user_id for u in users])
         table = Table(title="👥 TUTTI GLI UTENTI", box=box.ROUNDED)
-        table.add_column("ID", style="dim", width=8)
+        table.add_column("ID", style="dim", width=id_width)
         table.add_column("Username", style="bold")
         table.add_column("Email", style="cyan")
         table.add_column("Tipo", justify="center")
         table.add_column("Registrato", style="dim", justify="center")
         
         for user in users:
-            user_id_short = user.user_id[:8]
+            user_id_short = user.user_id[:id_width]
             user_type = "[bold red]ADMIN[/bold red]" if user.is_admin else "[bold blue]USER[/bold blue]"
             registered = user.created_at.strftime('%d/%m/%Y') if hasattr(user, 'created_at') else "N/A"
             
@@ -746,45 +834,133 @@ class RichTaskboardCLI:
         self.console.print(table)
     
     def show_all_tasks(self):
-        """Mostra tutti i task (admin)"""
-        tasks_with_users = self.db.get_all_tasks_with_users()
-        
-        if not tasks_with_users:
-            self.console.print("[bold yellow]📊 Nessun task trovato.[/bold yellow]")
-            return
+        """Mostra tutti i task (admin), una pagina alla volta"""
+        cursor = None
+        page = 1
         
-        # Crea tabella task con proprietari
-        table = Table(title=f"📊 TUTTI I TASK ({len(tasks_with_users)})", box=box.ROUNDED)
-        table.add_column("ID", style="dim", width=8)
-        table.add_column("Titolo", style="bold")
-        table.add_column("Proprietario", style="cyan")
-        table.add_column("Stato", justify="center")
-        table.add_column("Creato", style="dim", justify="center")
-        
-        for task_data in tasks_with_users:
-            task_id_short = task_data['task_id'][:8]
-            title = task_data['title'][:30] + "..." if len(task_data['title']) > 30 else task_data['title']
-            owner = task_data['username']
-            status = task_data['status']
-            created = task_data['created_at'][:10] if task_data['created_at'] else "N/A"
+        while True:
+            tasks_with_users, cursor = self.db.get_all_tasks_with_users_page(cursor)
+            
+            if not tasks_with_users and page == 1:
+                self.console.print("[bold yellow]📊 Nessun task trovato.[/bold yellow]")
+                return
+            
+            # Crea tabella task con proprietari
+            id_width = unique_prefix_length([task_data['task'].task_id for task_data in tasks_with_users])
+            table = Table(title=f"📊 TUTTI I TASK (pagina {page})", box=box.ROUNDED)
+            table.add_column("ID", style="dim", width=id_width)
+            table.add_column("Titolo", style="bold")
+            table.add_column("Proprietario", style="cyan")
+            table.add_column("Stato", justify="center")
+            table.add_column("Creato", style="dim", justify="center")
             
-            # Colore stato
-            if status == Task.STATUS_TODO:
-                status_text = f"[red]{status}[/red]"
-            elif status == Task.STATUS_DOING:
-                status_text = f"[yellow]{status}[/yellow]"
+            for task_data in tasks_with_users:
+                task = task_data['task']
+                task_id_short = task.task_id[:id_width]
+                title = task.title[:30] + "..." if len(task.title) > 30 else task.title
+                owner = task_data['owner_username'] or "N/A"
+                status = task.status
+                created = task.created_at.strftime('%d/%m/%Y') if task.created_at else "N/A"
+                
+                # Colore stato
+                if status == Task.STATUS_TODO:
+                    status_text = f"[red]{status}[/red]"
+                elif status == Task.STATUS_DOING:
+                    status_text = f"[yellow]{status}[/yellow]"
+                else:
+                    status_text = f"[green]{status}[/green]"
+                
+                table.add_row(
+                    task_id_short,
+                    title,
+                    owner,
+                    status_text,
+                    created
+                )
+            
+            self.console.print(table)
+            
+            if not cursor or not Confirm.ask("[bold cyan]Mostrare la pagina successiva?[/bold cyan]"):
+                break
+            page += 1
+    
+    def show_archive(self):
+        """Archivio dei task completati (admin): navigazione, ripristino e archiviazione"""
+        cursor = None
+        next_cursor = None
+        page = 1
+        
+        while True:
+            archived, next_cursor = self.db.get_archived_tasks_page(cursor=cursor)
+            
+            if archived:
+                id_width = unique_prefix_length([item['task'].task_id for item in archived])
+                table = Table(title=f"🗄️ ARCHIVIO (pagina {page})", box=box.ROUNDED)
+                table.add_column("ID", style="dim", width=id_width)
+                table.add_column("Titolo", style="bold")
+                table.add_column("Proprietario", style="cyan")
+                table.add_column("Creato", style="dim", justify="center")
+                table.add_column("Archiviato", style="dim", justify="center")
+                
+                for item in archived:
+                    task = item['task']
+                    title = task.title[:30] + "..." if len(task.title) > 30 else task.title
+                    table.add_row(
+                        task.task_id[:id_width],
+                        escape(title),
+                        escape(item['owner_username'] or "N/A"),
+                        task.created_at.strftime('%d/%m/%Y'),
+                        item['archived_at'].strftime('%d/%m/%Y')
+                    )
+                
+                self.console.print(table)
             else:
-                status_text = f"[green]{status}[/green]"
+                self.console.print("[bold yellow]🗄️ Nessun task archiviato.[/bold yellow]")
             
-            table.add_row(
-                task_id_short,
-                title,
-                owner,
-                status_text,
-                created
-            )
-        
-        self.console.print(table)
+            actions = "[bold cyan]1.[/bold cyan] Ripristina un task\n[bold cyan]2.[/bold cyan] Archivia ora i task completati"
+            choices = ["0", "1", "2"]
+            if next_cursor:
+                actions += "\n[bold cyan]3.[/bold cyan] Pagina successiva"
+                choices.append("3")
+            actions += "\n[bold cyan]0.[/bold cyan] Indietro"
+            self.console.print(Panel(actions, title="🔧 Azioni Archivio", box=box.ROUNDED))
+            
+            choice = Prompt.ask("[bold magenta]Seleziona azione[/bold magenta]", choices=choices, default="0")
+            
+            if choice == "1":
+                self._restore_archived_task()
+            elif choice == "2":
+                with Progress(
+                    SpinnerColumn(),
+                    TextColumn("[progress.description]{task.description}"),
+                    transient=True,
+                ) as progress:
+                    progress.add_task("Archiviazione in corso...", total=None)
+                    count = self.db.archive_done_tasks()
+                self.console.print(f"[bold green]✅ {count} task archiviati (completati da più di {Config.ARCHIVE_AFTER_DAYS} giorni).[/bold green]")
+            elif choice == "3":
+                cursor = next_cursor
+                page += 1
+                continue
+            else:
+                return
+            # Dopo una modifica l'archivio riparte dalla prima pagina
+            cursor = None
+            page = 1
+    
+    def _restore_archived_task(self):
+        """Riporta tra i task attivi un task archiviato, indicato per ID (anche abbreviato)"""
+        task_id = Prompt.ask("[bold cyan]Inserisci l'ID del task da ripristinare[/bold cyan]")
+        prefix = parse_task_id_input(task_id)
+        matches = self.db.resolve_task_prefix(prefix, archived=True) if prefix else []
+        if len(matches) > 1:
+            self._print_ambiguous_id(prefix, matches)
+        elif not matches:
+            self.console.print("[bold red]❌ Task archiviato non trovato.[/bold red]")
+        elif self.db.restore_archived_task(matches[0]):
+            self.console.print("[bold green]✅ Task ripristinato![/bold green]")
+        else:
+            self.console.print("[bold red]❌ Errore durante il ripristino.[/bold red]")
     
     def create_user(self):
         """Crea un nuovo utente (admin)"""
@@ -868,10 +1044,9 @@ class RichTaskboardCLI:
         
         # Seleziona utente
         user_id = Prompt.ask("[bold cyan]Inserisci l'ID dell'utente a cui assegnare il task[/bold cyan]")
-        user = self.db.get_user_by_id(user_id)
+        user = self._resolve_user(user_id)
         
         if not user:
-            self.console.print("[bold red]❌ Utente non trovato.[/bold red]")
             return
         
         # Pannello assegnazione
@@ -890,7 +1065,7 @@ class RichTaskboardCLI:
             return
         
         # Crea task assegnato all'utente specificato
-        task = Task(title, description, user_id)
+        task = Task(title, description, user.user_id)
         
         # Animazione assegnazione
         with Progress(
@@ -917,10 +1092,9 @@ class RichTaskboardCLI:
         self.show_all_users()
         
         user_id = Prompt.ask("[bold cyan]Inserisci l'ID dell'utente da gestire[/bold cyan]")
-        user = self.db.get_user_by_id(user_id)
+        user = self._resolve_user(user_id)
         
         if not user:
-            self.console.print("[bold red]❌ Utente non trovato.[/bold red]")
             return
         
         # Menu gestione utente
@@ -970,27 +1144,26 @@ class RichTaskboardCLI:
         self.show_all_users()
         
         user_id = Prompt.ask("[bold cyan]Inserisci l'ID dell'utente da eliminare[/bold cyan]")
-        user = self.db.get_user_by_id(user_id)
+        user = self._resolve_user(user_id)
         
         if not user:
-            self.console.print("[bold red]❌ Utente non trovato.[/bold red]")
             return
         
         if user.user_id == self.current_user.user_id:
             self.console.print("[bold red]❌ Non puoi eliminare te stesso.[/bold red]")
             return
         
-        user_tasks = self.db.get_user_tasks(user_id)
+        task_count = sum(self.db.get_task_count_by_status(user.user_id).values())
         
         # Pannello conferma eliminazione
         delete_panel = Panel(
-            f"[bold red]⚠️ ATTENZIONE ⚠️[/bold red]\n\nStai per eliminare:\n[bold]Utente:[/bold] {user.username}\n[bold]Task associati:[/bold] {len(user_tasks)}",
+            f"[bold red]⚠️ ATTENZIONE ⚠️[/bold red]\n\nStai per eliminare:\n[bold]Utente:[/bold] {user.username}\n[bold]Task associati:[/bold] {task_count}",
             title="🗑️ Conferma Eliminazione",
             box=box.DOUBLE
         )
         self.console.print(delete_panel)
         
-        if Confirm.ask(f"[bold red]Eliminare {user.username} e tutti i suoi {len(user_tasks)} task?[/bold red]"):
+        if Confirm.ask(f"[bold red]Eliminare {user.username} e tutti i suoi {task_count} task?[/bold red]"):
             # Animazione eliminazione
             with Progress(
                 SpinnerColumn(),
@@ -999,7 +1172,7 @@ class RichTaskboardCLI:
             ) as progress:
                 task = progress.add_task("Eliminazione in corso...", total=None)
                 time.sleep(1)
-                success = self.db.delete_user_and_tasks(user_id)
+                success = self.db.delete_user_and_tasks(user.user_id)
             
             if success:
                 self.console.print(f"[bold green]✅ Utente {user.username} eliminato![/bold green]")
@@ -1018,26 +1191,26 @@ class RichTaskboardCLI:
         self.show_all_users()
         
         user_id = Prompt.ask("[bold cyan]Inserisci l'ID dell'utente[/bold cyan]")
-        user = self.db.get_user_by_id(user_id)
+        user = self._resolve_user(user_id)
         
         if not user:
-            self.console.print("[bold red]❌ Utente non trovato.[/bold red]")
             return
         
-        tasks = self.db.get_user_tasks(user_id)
+        tasks = self.db.get_user_tasks(user.user_id)
         if not tasks:
             self.console.print(f"[bold yellow]📋 {user.username} non ha task.[/bold yellow]")
             return
         
         # Mostra task dell'utente
+        id_width = unique_prefix_length([t.task_id for t in tasks])
         table = Table(title=f"📋 TASK DI {user.username}", box=box.ROUNDED)
-        table.add_column("ID", style="dim", width=8)
+        table.add_column("ID", style="dim", width=id_width)
         table.add_column("Titolo", style="bold")
         table.add_column("Stato", justify="center")
         table.add_column("Descrizione", style="dim")
         
         for task in tasks:
-            task_id_short = task.task_id[:8]
+            task_id_short = task.task_id[:id_width]
             title = task.title[:30] + "..." if len(task.title) > 30 else task.title
             description = task.description[:40] + "..." if task.description and len(task.description) > 40 else task.description or ""
             
@@ -1068,9 +1241,9 @@ class RichTaskboardCLI:
         
         if choice == "1":
             task_id = Prompt.ask("[bold cyan]Inserisci l'ID del task da modificare[/bold cyan]")
-            task = self.db.get_task_by_id(task_id)
+            task = self._resolve_task(task_id, user.user_id)
             
-            if task and task.user_id == user_id:
+            if task:
                 # Mostra dettagli task corrente
                 task_panel = Panel(
                     f"[bold]Titolo:[/bold] {task.title}\n[bold]Descrizione:[/bold] {task.description}",
@@ -1090,14 +1263,12 @@ class RichTaskboardCLI:
                         self.console.print("[bold red]❌ Errore durante l'aggiornamento.[/bold red]")
                 else:
                     self.console.print("[bold yellow]ℹ️ Nessuna modifica effettuata.[/bold yellow]")
-            else:
-                self.console.print("[bold red]❌ Task non trovato.[/bold red]")
         
         elif choice == "2":
             task_id = Prompt.ask("[bold cyan]Inserisci l'ID del task[/bold cyan]")
-            task = self.db.get_task_by_id(task_id)
+            task = self._resolve_task(task_id, user.user_id)
             
-            if task and task.user_id == user_id:
+            if task:
                 # Mostra stati disponibili
                 status_panel = Panel(
                     "[bold cyan]1.[/bold cyan] 📝 To Do\n[bold cyan]2.[/bold cyan] ⚡ Doing\n[bold cyan]3.[/bold cyan] ✅ Done",
@@ -1118,21 +1289,17 @@ class RichTaskboardCLI:
                     self.console.print("[bold green]✅ Stato task aggiornato![/bold green]")
                 else:
                     self.console.print("[bold red]❌ Errore durante l'aggiornamento.[/bold red]")
-            else:
-                self.console.print("[bold red]❌ Task non trovato.[/bold red]")
         
         elif choice == "3":
             task_id = Prompt.ask("[bold cyan]Inserisci l'ID del task da eliminare[/bold cyan]")
-            task = self.db.get_task_by_id(task_id)
+            task = self._resolve_task(task_id, user.user_id)
             
-            if task and task.user_id == user_id:
+            if task:
                 if Confirm.ask("[bold red]Eliminare questo task?[/bold red]"):
-                    if self.db.delete_task(task_id):
+                    if self.db.delete_task(task.task_id):
                         self.console.print("[bold green]✅ Task eliminato![/bold green]")
                     else:
                         self.console.print("[bold red]❌ Errore durante l'eliminazione.[/bold red]")
-            else:
-                self.console.print("[bold red]❌ Task non trovato.[/bold red]")
 
 def main():
     """Funzione principale per avviare la CLI migliorata"""
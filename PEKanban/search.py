@@ -0,0 +1,160 @@
+# search.py - Ricerca full-text sui task (indice FTS5 tasks_fts)
+# Costruisce le espressioni MATCH a partire dal testo dell'utente e ordina
+# per rilevanza i candidati restituiti dall'indice. Anche l'app principale
+# (search.py nella radice) usa questo modulo e ridefinisce solo la colonna
+# del proprietario: le correzioni al ranking valgono per entrambe
+
+import re
+import unicodedata
+from typing import List, Optional, Tuple
+
+# Caratteri che delimitano i termini evidenziati negli snippet; chi mostra
+# il risultato fa l'escape del testo e poi li sostituisce con il markup voluto
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+# Parametri BM25 e peso di un'occorrenza nel titolo rispetto alla descrizione
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_WEIGHT = 4.0
+
+# Lunghezza minima di un termine cercato per prefisso ("caf*")
+MIN_PREFIX_LENGTH = 2
+
+# Stessi caratteri di token del tokenizer unicode61 (lettere e cifre),
+# seguiti da un eventuale '*' che richiede la ricerca per prefisso
+_TERM_RE = re.compile(r'([^\W_]+)(\*?)')
+_TOKEN_RE = re.compile(r'[^\W_]+')
+# Per il testo ASCII (il caso comune) basta sostituire la punteggiatura con spazi
+_ASCII_SEPARATORS = str.maketrans({chr(i): ' ' for i in range(128) if not chr(i).isalnum()})
+
+
+def fold(text: Optional[str]) -> str:
+    """Minuscole e senza diacritici, come il tokenizer 'unicode61 remove_diacritics 2'"""
+    if not text:
+        return ''
+    text = text.lower()
+    if text.isascii():
+        return text
+    return ''.join(ch for ch in unicodedata.normalize('NFKD', text)
+                   if not unicodedata.combining(ch))
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Termini di un testo, come li indicizza FTS5"""
+    text = fold(text)
+    if text.isascii():
+        return text.translate(_ASCII_SEPARATORS).split()
+    return _TOKEN_RE.findall(text)
+
+
+class SearchQuery:
+    """
+    Query di ricerca già validata
+    I termini vengono estratti dal testo dell'utente e messi tra virgolette,
+    quindi la sintassi FTS5 (operatori, colonne, NEAR) non è mai
+    interpretata. Tutti i termini sono obbligatori; un termine seguito da
+    '*' è cercato per prefisso. I prefissi di 2 e 3 caratteri sono
+    indicizzati, quelli più lunghi costano in proporzione alle occorrenze
+    dei termini che li completano.
+    """
+
+    def __init__(self, text: str):
+        # (termine, per prefisso)
+        self.terms = [(term, bool(star) and len(term) >= MIN_PREFIX_LENGTH)
+                      for term, star in _TERM_RE.findall(fold(text))]
+
+    def __bool__(self) -> bool:
+        return bool(self.terms)
+
+    # Colonna dell'indice con il proprietario del task
+    OWNER_COLUMN = 'owner'
+
+    @staticmethod
+    def owner_term(user_id) -> str:
+        """Valore indicizzato per user_id: lo UUID senza trattini (vedi migrazione 7)"""
+        return fold(str(user_id)).replace('-', '').replace('"', '""')
+
+    def match_expression(self, user_id=None) -> str:
+        """Espressione MATCH sulle colonne title e description, eventualmente limitata a un utente"""
+        parts = [f'"{term}"*' if prefix else f'"{term}"' for term, prefix in self.terms]
+        expression = '{title description} : (' + ' '.join(parts) + ')'
+        if user_id is not None:
+            expression = f'{self.OWNER_COLUMN} : "{self.owner_term(user_id)}" AND {expression}'
+        return expression
+
+    def _count(self, tokens: List[str], term: str, prefix: bool) -> int:
+        if prefix:
+            return sum(1 for token in tokens if token.startswith(term))
+        return tokens.count(term)
+
+    def _matches(self, token: str) -> bool:
+        token = fold(token)
+        return any(token.startswith(term) if prefix else token == term
+                   for term, prefix in self.terms)
+
+    def snippet(self, title: str, description: str, tokens: int) -> str:
+        """
+        Frammento di al massimo tokens parole attorno alla prima corrispondenza
+        Preferisce la descrizione (il titolo viene già mostrato per intero);
+        i termini trovati sono racchiusi tra MARK_START e MARK_END
+        """
+        for text in (description, title):
+            if not text:
+                continue
+            spans = [m.span() for m in _TOKEN_RE.finditer(text)]
+            hits = {i for i, (start, end) in enumerate(spans) if self._matches(text[start:end])}
+            if not hits:
+                continue
+            first = max(0, min(min(hits) - tokens // 4, len(spans) - tokens))
+            window = spans[first:first + tokens]
+            parts = ['…' if first > 0 else '']
+            position = window[0][0]
+            for i, (start, end) in enumerate(window, first):
+                if i in hits:
+                    parts += [text[position:start], MARK_START, text[start:end], MARK_END]
+                    position = end
+            parts.append(text[position:window[-1][1]])
+            if first + tokens < len(spans):
+                parts.append('…')
+            return ''.join(parts)
+        return ''
+
+    def rank(self, candidates: List[Tuple[int, str, str]]) -> List[Tuple[float, int]]:
+        """
+        Ordina i candidati (rowid, titolo, descrizione) per rilevanza
+        Punteggio BM25 per campo senza IDF: tutti i termini compaiono in ogni
+        candidato, quindi conta solo la frequenza normalizzata sulla lunghezza.
+        Restituisce [(punteggio, rowid)] dal più rilevante; a parità vince il più recente.
+        """
+        if not candidates:
+            return []
+        docs = [(rowid, tokenize(title), tokenize(description))
+                for rowid, title, description in candidates]
+        avg_title = sum(len(d[1]) for d in docs) / len(docs) or 1
+        avg_description = sum(len(d[2]) for d in docs) / len(docs) or 1
+
+        scored = []
+        for rowid, title, description in docs:
+            title_norm = BM25_K1 * (1 - BM25_B + BM25_B * len(title) / avg_title)
+            description_norm = BM25_K1 * (1 - BM25_B + BM25_B * len(description) / avg_description)
+            score = 0.0
+            for term, prefix in self.terms:
+                in_title = self._count(title, term, prefix)
+                in_description = self._count(description, term, prefix)
+                score += TITLE_WEIGHT * in_title / (in_title + title_norm)
+                score += in_description / (in_description + description_norm)
+            # Arrotondato: il punteggio finisce nel cursore e deve restare confrontabile
+            scored.append((round(score, 6), rowid))
+
+        scored.sort(key=lambda item: (-item[0], -item[1]))
+        return scored
+
+
+def page_after(scored: List[Tuple[float, int]], after: Optional[Tuple[float, int]]) -> List[Tuple[float, int]]:
+    """Risultati successivi alla chiave (punteggio, rowid) di un cursore"""
+    if after is None:
+        return scored
+    score, rowid = after
+    return [item for item in scored
+            if item[0] < score or (item[0] == score and item[1] < rowid)]
@@ -98,6 +98,36 @@ function makeRequest(url, options = {}) {
         });
 }
 
+// Live updates (Server-Sent Events)
+// handlers maps an event type to a function receiving the decoded data.
+// On 'resync' the server has dropped events for this page, so it reloads.
+function openEventStream(url, handlers) {
+    if (!window.EventSource) {
+        return null;
+    }
+    
+    const source = new EventSource(url);
+    Object.keys(handlers).forEach(type => {
+        source.addEventListener(type, event => handlers[type](JSON.parse(event.data)));
+    });
+    source.addEventListener('resync', () => {
+        source.close();
+        location.reload();
+    });
+    return source;
+}
+
+// ISO timestamp -> dd/mm/yyyy, as rendered by the templates
+function formatDate(isoString) {
+    return `${isoString.slice(8, 10)}/${isoString.slice(5, 7)}/${isoString.slice(0, 4)}`;
+}
+
+// Text truncated like the templates ("..." after maxLength characters)
+function truncateText(text, maxLength) {
+    text = text || '';
+    return text.length > maxLength ? text.slice(0, maxLength) + '...' : text;
+}
+
 // Form Validation
 function validateForm(formElement) {
     const inputs = formElement.querySelectorAll('input[required], textarea[required], select[required]');
@@ -355,23 +385,13 @@ window.TaskboardApp = {
     showLoading,
     confirmAction,
     makeRequest,
+    openEventStream,
+    formatDate,
+    truncateText,
     validateForm,
     copyToClipboard,
     Storage,
     Theme
 };
 
-// Service Worker registration (for PWA functionality)
-if ('serviceWorker' in navigator) {
-    window.addEventListener('load', function() {
-        navigator.serviceWorker.register('/sw.js')
-            .then(function(registration) {
-                console.log('ServiceWorker registration successful');
-            })
-            .catch(function(err) {
-                console.log('ServiceWorker registration failed');
-            });
-    });
-}
-
 console.log('Taskboard App initialized successfully!');
\ No newline at end of file
@@ -0,0 +1,118 @@
+# user_cache.py - Cache LRU/TTL dei record di principals
+# Usata da DatabaseManager per le ricerche di utenti per id, username ed email
+# (login e rotte admin); le scritture sugli utenti la invalidano esplicitamente
+
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+
+
+class UserCache:
+    """
+    Cache limitata delle righe di principals
+    Ogni voce è indicizzata per user_id, con indici secondari per username
+    ed email, così invalidare un id rimuove tutte le sue chiavi. Vengono
+    conservate le righe del database e non gli oggetti User: chi modifica
+    l'utente restituito non altera la cache. Il TTL limita quanto a lungo
+    resta visibile una modifica fatta da un altro processo.
+    """
+
+    # Colonne di principals usabili come chiave di ricerca
+    LOOKUP_FIELDS = ('user_id', 'username', 'email')
+
+    def __init__(self, max_size: int = None, ttl: float = None):
+        self.max_size = max_size if max_size is not None else Config.USER_CACHE_SIZE
+        self.ttl = ttl if ttl is not None else Config.USER_CACHE_TTL
+        # user_id -> (riga, scadenza), dal meno al più recentemente usato
+        self._entries = OrderedDict()
+        self._by_username = {}
+        self._by_email = {}
+        self._lock = threading.Lock()
+        # Incrementata a ogni invalidazione: una riga letta prima di
+        # un'invalidazione non deve rientrare in cache
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(self, field: str, value: str):
+        """Restituisce la riga in cache per user_id/username/email, o None"""
+        with self._lock:
+            if field == 'user_id':
+                user_id = value
+            elif field == 'username':
+                user_id = self._by_username.get(value)
+            else:
+                user_id = self._by_email.get(value)
+
+            entry = self._entries.get(user_id) if user_id is not None else None
+            if entry is None:
+                self.misses += 1
+                return None
+            row, expires_at = entry
+            if expires_at < time.monotonic():
+                self._remove(user_id)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return row
+
+    def put(self, row, generation: int = None):
+        """
+        Inserisce o aggiorna la riga di un principal
+        generation è il valore letto prima della query: se nel frattempo
+        c'è stata un'invalidazione la riga potrebbe essere vecchia e viene scartata
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            user_id = row['user_id']
+            self._remove(user_id)
+            self._entries[user_id] = (row, time.monotonic() + self.ttl)
+            self._by_username[row['username']] = user_id
+            self._by_email[row['email']] = user_id
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, user_id: str):
+        """Rimuove un principal (tutte le sue chiavi) dalla cache"""
+        with self._lock:
+            self.generation += 1
+            self._remove(user_id)
+
+    def clear(self):
+        """Svuota la cache"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._by_username.clear()
+            self._by_email.clear()
+
+    def _remove(self, user_id: str):
+        entry = self._entries.pop(user_id, None)
+        if entry is None:
+            return
+        row = entry[0]
+        if self._by_username.get(row['username']) == user_id:
+            del self._by_username[row['username']]
+        if self._by_email.get(row['email']) == user_id:
+            del self._by_email[row['email']]
+
+    def stats(self) -> dict:
+        """Contatori di utilizzo della cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -6,6 +6,7 @@ import hashlib
 import uuid
 from datetime import datetime
 from typing import Optional, List
+from config import Config
 
 def validate_email(email: str) -> bool:
     """Valida il formato di un indirizzo email"""
@@ -157,7 +158,8 @@ def create_backup_filename(base_name: str) -> str:
 def parse_task_id_input(input_str: str) -> Optional[str]:
     """
     Analizza l'input dell'ID task e restituisce un ID valido
-    Accetta sia ID completi che parziali (primi 8 caratteri)
+    Accetta sia ID completi che prefissi di almeno Config.ID_PREFIX_MIN_LENGTH
+    caratteri; lo stesso formato vale per gli ID utente
     """
     if not input_str:
         return None
@@ -165,16 +167,29 @@ def parse_task_id_input(input_str: str) -> Optional[str]:
     # Rimuove spazi e converte in minuscolo
     clean_input = input_str.strip().lower()
     
-    # Se è un UUID completo (36 caratteri con trattini)
-    if len(clean_input) == 36 and clean_input.count('-') == 4:
-        return clean_input
-    
-    # Se è un ID parziale (8 caratteri)
-    if len(clean_input) == 8 and clean_input.replace('-', '').isalnum():
+    # Un UUID completo ha 36 caratteri; un prefisso solo cifre esadecimali e trattini
+    if Config.ID_PREFIX_MIN_LENGTH <= len(clean_input) <= 36 and re.fullmatch(r'[0-9a-f-]+', clean_input):
         return clean_input
     
     return None
 
+def unique_prefix_length(ids: List[str], min_length: int = None) -> int:
+    """
+    Lunghezza minima dei prefissi che distingue tutti gli ID di una lista
+    (mai meno di min_length, default Config.SHORT_ID_LENGTH): basta
+    confrontare gli ID adiacenti in ordine alfabetico
+    """
+    length = min_length if min_length is not None else Config.SHORT_ID_LENGTH
+    ordered = sorted(set(ids))
+    for previous, current in zip(ordered, ordered[1:]):
+        common = 0
+        for a, b in zip(previous, current):
+            if a != b:
+                break
+            common += 1
+        length = max(length, common + 1)
+    return length
+
 def format_task_status_display(status: str) -> str:
     """Formatta lo stato del task per la visualizzazione"""
     status_map = {
@@ -4,6 +4,8 @@
 import os
 from typing import List, Optional
 from model import User, Task, Admin
+from utils import parse_task_id_input, unique_prefix_length
+from config import Config
 
 class TaskboardView:
     """Classe per gestire l'interfaccia utente CLI"""
@@ -122,9 +124,12 @@ class TaskboardView:
         print(f"\n[T] {title}")
         self.print_separator()
         
+        # Prefisso più corto che distingue i task mostrati
+        id_width = unique_prefix_length([t.task_id for t in tasks])
+        
         # Header della tabella
-        print(f"{'ID':<8} {'Titolo':<25} {'Stato':<15} {'Utente':<15}")
-        print("-" * 70)
+        print(f"{'ID':<{id_width}} {'Titolo':<25} {'Stato':<15} {'Utente':<15}")
+        print("-" * (62 + id_width))
         
         # Raggruppa task per stato
         todo_tasks = [t for t in tasks if t.status == Task.STATUS_TODO]
@@ -136,10 +141,10 @@ class TaskboardView:
             if task_list:
                 print(f"\n{status}:")
                 for task in task_list:
-                    task_id_short = task.task_id[:8]
+                    task_id_short = task.task_id[:id_width]
                     title_short = task.title[:23] + "..." if len(task.title) > 23 else task.title
                     user_id_short = task.user_id[:13] + "..." if len(task.user_id) > 13 else task.user_id
-                    print(f"{task_id_short:<8} {title_short:<25} {task.status:<15} {user_id_short:<15}")
+                    print(f"{task_id_short:<{id_width}} {title_short:<25} {task.status:<15} {user_id_short:<15}")
     
     def display_task_details(self, task: Task):
         """Visualizza i dettagli completi di un task"""
@@ -163,21 +168,42 @@ class TaskboardView:
         
         print("\n[U] UTENTI REGISTRATI")
         self.print_separator()
-        print(f"{'ID':<10} {'Username':<20} {'Email':<25} {'Tipo':<10}")
-        print("-" * 70)
+        id_width = unique_prefix_length([u.user_id for u in users])
+        print(f"{'ID':<{id_width + 2}} {'Username':<20} {'Email':<25} {'Tipo':<10}")
+        print("-" * (60 + id_width))
         
         for user in users:
-            user_id_short = user.user_id[:8]
+            user_id_short = user.user_id[:id_width]
             user_type = "ADMIN" if user.is_admin else "USER"
-            print(f"{user_id_short:<10} {user.username:<20} {user.email:<25} {user_type:<10}")
+            print(f"{user_id_short:<{id_width + 2}} {user.username:<20} {user.email:<25} {user_type:<10}")
     
     def get_task_id(self, prompt: str = "Inserisci l'ID del task") -> str:
-        """Richiede l'ID di un task"""
-        return input(f"{prompt}: ").strip()
+        """Richiede l'ID di un task, completo o abbreviato; stringa vuota se non valido"""
+        return self._get_id(prompt)
     
     def get_user_id(self, prompt: str = "Inserisci l'ID dell'utente") -> str:
-        """Richiede l'ID di un utente"""
-        return input(f"{prompt}: ").strip()
+        """Richiede l'ID di un utente, completo o abbreviato; stringa vuota se non valido"""
+        return self._get_id(prompt)
+    
+    def _get_id(self, prompt: str) -> str:
+        """Legge un ID e lo normalizza; segnala l'input non valido"""
+        entered = input(f"{prompt}: ").strip()
+        parsed = parse_task_id_input(entered)
+        if parsed is None:
+            if entered:
+                self.show_error_message(
+                    f"ID non valido: inserisci almeno {Config.ID_PREFIX_MIN_LENGTH} caratteri dell'ID mostrato."
+                )
+            return ""
+        return parsed
+    
+    def show_ambiguous_id(self, prefix: str, matches: List[str]):
+        """Segnala un ID abbreviato che corrisponde a più elementi"""
+        id_width = unique_prefix_length(matches)
+        candidates = ", ".join(match[:id_width] for match in matches)
+        self.show_error_message(
+            f"L'ID '{prefix}' è ambiguo ({candidates}...): inserisci più caratteri."
+        )
     
     def get_new_password(self) -> str:
         """Richiede una nuova password"""
@@ -225,9 +251,11 @@ class TaskboardView:
         print(f"\n[T] {title}")
         self.print_separator()
         
+        id_width = unique_prefix_length([item['task'].task_id for item in tasks_with_users])
+        
         # Header della tabella
-        print(f"{'ID':<8} {'Titolo':<25} {'Stato':<15} {'Proprietario':<20} {'Tipo':<8}")
-        print("-" * 85)
+        print(f"{'ID':<{id_width}} {'Titolo':<25} {'Stato':<15} {'Proprietario':<20} {'Tipo':<8}")
+        print("-" * (77 + id_width))
         
         # Raggruppa task per stato
         todo_tasks = [t for t in tasks_with_users if t['task'].status == Task.STATUS_TODO]
@@ -240,8 +268,8 @@ class TaskboardView:
                 print(f"\n{status}:")
                 for item in task_list:
                     task = item['task']
-                    task_id_short = task.task_id[:8]
+                    task_id_short = task.task_id[:id_width]
                     title_short = task.title[:23] + "..." if len(task.title) > 23 else task.title
                     owner_name = item['owner_username'][:18] + "..." if len(item['owner_username']) > 18 else item['owner_username']
                     owner_type = "ADMIN" if item['owner_is_admin'] else "USER"
-                    print(f"{task_id_short:<8} {title_short:<25} {task.status:<15} {owner_name:<20} {owner_type:<8}")
\ No newline at end of file
+                    print(f"{task_id_short:<{id_width}} {title_short:<25} {task.status:<15} {owner_name:<20} {owner_type:<8}")
\ No newline at end of file
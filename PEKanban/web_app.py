@@ -1,18 +1,106 @@
 # web_app.py - Applicazione Flask Web per Taskboard
 # Versione web dell'applicazione con interfaccia drag&drop
 
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, g
+from markupsafe import Markup, escape
+import atexit
 import os
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
 from database import DatabaseManager
 from model import User, Task, Admin
 from utils import validate_email, validate_password_strength, validate_username
 from config import Config
+from search import MARK_START, MARK_END
+from events import EventBroker
+from assets import AssetManifest
 
 app = Flask(__name__)
 app.secret_key = 'taskboard_secret_key_2025'  # In produzione usare una chiave più sicura
 
 # Inizializza il database
 db = DatabaseManager()
+# Alla chiusura del server scrive gli aggiornamenti differiti e chiude il pool
+atexit.register(db.close)
+
+# Eventi in tempo reale per /events (il thread parte al primo client);
+# atexit esegue in ordine inverso, quindi si ferma prima del database
+event_broker = EventBroker(db)
+atexit.register(event_broker.stop)
+
+@app.teardown_appcontext
+def release_db_connection(exception=None):
+    """Restituisce al pool la connessione usata dalla richiesta"""
+    db.release_connection()
+
+# Le richieste che modificano dati sono un'unità di lavoro: una sola
+# transazione sulla connessione di scrittura, aperta prima della vista e
+# chiusa con commit dopo la risposta (rollback su errore). Controlli e
+# scritture della vista non possono essere separati da altre richieste
+UNIT_OF_WORK_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+def without_unit_of_work(view):
+    """
+    Esclude una vista dall'unità di lavoro: lavori a lotti con commit
+    intermedi, o viste che non scrivono e non devono attendere il lock
+    di scrittura (il login, che usa anche la cache degli utenti)
+    """
+    view.unit_of_work = False
+    return view
+
+@app.before_request
+def begin_unit_of_work():
+    """Apre l'unità di lavoro della richiesta (g.unit_of_work)"""
+    view = app.view_functions.get(request.endpoint)
+    if request.method in UNIT_OF_WORK_METHODS and getattr(view, 'unit_of_work', True):
+        db.begin_unit_of_work()
+        g.unit_of_work = True
+
+@app.after_request
+def commit_unit_of_work(response):
+    """Commit prima di inviare la risposta: se fallisce il client riceve un errore"""
+    if g.pop('unit_of_work', False):
+        db.end_unit_of_work(commit=response.status_code < 500)
+    return response
+
+@app.teardown_request
+def rollback_unit_of_work(exception=None):
+    """Rollback dell'unità rimasta aperta (eccezione prima della risposta)"""
+    if g.pop('unit_of_work', False):
+        db.end_unit_of_work(commit=False)
+
+# Risorse statiche con fingerprint: i template usano asset_url('css/style.css')
+assets = AssetManifest(app.static_folder)
+
+@app.template_global()
+def asset_url(filename: str) -> str:
+    """URL con fingerprint di un file di static/ (cambia con il contenuto)"""
+    return url_for('asset', name=assets.get(filename).url_name)
+
+@app.route('/assets/<path:name>')
+def asset(name):
+    """
+    Risorsa con fingerprint: cache immutabile e variante compressa scelta
+    in base ad Accept-Encoding. Un fingerprint superato dà 404: il file
+    attuale ha un altro URL
+    """
+    found = assets.find(name)
+    if found is None:
+        return 'Risorsa non trovata', 404
+    
+    encoding, content = found.select(lambda candidate: request.accept_encodings[candidate] > 0)
+    response = app.response_class(content, mimetype=found.mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = f'public, max-age={Config.ASSETS_MAX_AGE}, immutable'
+    response.set_etag(f"{found.digest}-{encoding or 'identity'}")
+    return response.make_conditional(request)
+
+@app.template_filter('highlight')
+def highlight_snippet(snippet: str) -> Markup:
+    """Converte i delimitatori dei termini trovati in <mark>, dopo l'escape del testo"""
+    return Markup(str(escape(snippet)).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>'))
 
 @app.route('/')
 def index():
@@ -22,6 +110,7 @@ def index():
     return redirect(url_for('dashboard'))
 
 @app.route('/login', methods=['GET', 'POST'])
+@without_unit_of_work
 def login():
     """Pagina di login"""
     if request.method == 'POST':
@@ -111,6 +200,13 @@ def logout():
     flash('Logout effettuato con successo.', 'success')
     return redirect(url_for('login'))
 
+# Parametro dell'URL con il cursore di ogni colonna della dashboard
+DASHBOARD_CURSOR_PARAMS = {
+    Task.STATUS_TODO: 'todo_cursor',
+    Task.STATUS_DOING: 'doing_cursor',
+    Task.STATUS_DONE: 'done_cursor'
+}
+
 @app.route('/dashboard')
 def dashboard():
     """Dashboard principale con kanban board"""
@@ -119,26 +215,60 @@ def dashboard():
     
     user_id = session['user_id']
     is_admin = session.get('is_admin', False)
+    cursors = {status: request.args.get(param) or None for status, param in DASHBOARD_CURSOR_PARAMS.items()}
+    # Letta prima dei task: /events invia le modifiche successive
+    events_version = db.get_change_version()
+    
+    # Ogni colonna è una pagina a sé dei task (dell'utente o di tutti se
+    # admin) in quello stato, letta dall'indice (stato, created_at)
+    tasks = {}
+    columns = {}
+    try:
+        for status, cursor in cursors.items():
+            if is_admin:
+                tasks[status], next_cursor = db.get_all_tasks_page(cursor, status=status)
+            else:
+                tasks[status], next_cursor = db.get_user_tasks_page(user_id, cursor, status=status)
+            # I link di una colonna conservano la pagina mostrata nelle altre
+            others = {DASHBOARD_CURSOR_PARAMS[other]: value
+                      for other, value in cursors.items() if other != status and value}
+            columns[status] = {
+                'first_page': cursor is None,
+                'first_url': url_for('dashboard', **others) if cursor else None,
+                'next_url': url_for('dashboard', **others, **{DASHBOARD_CURSOR_PARAMS[status]: next_cursor})
+                            if next_cursor else None
+            }
+    except ValueError:
+        return redirect(url_for('dashboard'))
     
-    # Recupera task dell'utente o tutti i task se admin
-    if is_admin:
-        tasks = db.get_all_tasks()
-        users = db.get_all_users()
-    else:
-        tasks = db.get_user_tasks(user_id)
-        users = []
+    return render_template('dashboard.html', 
+                         todo_tasks=tasks[Task.STATUS_TODO],
+                         doing_tasks=tasks[Task.STATUS_DOING],
+                         done_tasks=tasks[Task.STATUS_DONE],
+                         columns=columns,
+                         is_admin=is_admin,
+                         events_version=events_version)
+
+@app.route('/search')
+def search():
+    """Ricerca full-text nei task (tutti i task se admin)"""
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
     
-    # Raggruppa task per stato
-    todo_tasks = [t for t in tasks if t.status == Task.STATUS_TODO]
-    doing_tasks = [t for t in tasks if t.status == Task.STATUS_DOING]
-    done_tasks = [t for t in tasks if t.status == Task.STATUS_DONE]
+    query = request.args.get('q', '').strip()
+    cursor = request.args.get('cursor') or None
+    owner = None if session.get('is_admin', False) else session['user_id']
     
-    return render_template('dashboard.html', 
-                         todo_tasks=todo_tasks,
-                         doing_tasks=doing_tasks,
-                         done_tasks=done_tasks,
-                         users=users,
-                         is_admin=is_admin)
+    try:
+        results, next_cursor = db.search_tasks(query, user_id=owner, cursor=cursor)
+    except ValueError:
+        return redirect(url_for('search', q=query))
+    
+    return render_template('search.html',
+                         query=query,
+                         results=results,
+                         cursor=cursor,
+                         next_cursor=next_cursor)
 
 @app.route('/add_task', methods=['POST'])
 def add_task():
@@ -163,7 +293,8 @@ def add_task():
                 'id': task.task_id,
                 'title': task.title,
                 'description': task.description,
-                'status': task.status
+                'status': task.status,
+                'created_at': task.created_at.isoformat()
             }
         })
     else:
@@ -196,14 +327,12 @@ def update_task_status():
     if not is_admin and task.user_id != user_id:
         return jsonify({'success': False, 'message': 'Non autorizzato'})
     
-    # Aggiorna stato
-    if task.update_status(new_status):
-        if db.update_task(task):
-            return jsonify({'success': True, 'message': 'Stato aggiornato con successo!'})
-        else:
-            return jsonify({'success': False, 'message': 'Errore durante l\'aggiornamento'})
+    # Aggiorna stato (con write-behind attivo la scrittura è raggruppata con le
+    # altre in attesa; durable=True risponde solo dopo il commit)
+    if db.queue_task_update(task.task_id, durable=True, status=new_status):
+        return jsonify({'success': True, 'message': 'Stato aggiornato con successo!'})
     else:
-        return jsonify({'success': False, 'message': 'Stato non valido'})
+        return jsonify({'success': False, 'message': 'Errore durante l\'aggiornamento'})
 
 @app.route('/edit_task/<task_id>', methods=['GET', 'POST'])
 def edit_task(task_id):
@@ -274,11 +403,16 @@ def admin_panel():
         flash('Accesso negato. Privilegi amministrativi richiesti.', 'error')
         return redirect(url_for('dashboard'))
     
-    users = db.get_all_users()
-    tasks_with_users = db.get_all_tasks_with_users()
+    # La pagina contiene solo le statistiche e la prima pagina degli utenti:
+    # le tabelle dei task e dell'archivio si caricano da /api/v1 quando
+    # vengono aperte, con paginazione, filtri e ordinamento lato server.
+    # La versione va letta prima dei dati: /events invia le modifiche successive
+    events_version = db.get_change_version()
+    users, next_users_cursor = db.get_all_users_page()
     stats = db.get_database_stats()
     
-    return render_template('admin.html', users=users, tasks_with_users=tasks_with_users, stats=stats)
+    return render_template('admin.html', users=users, next_users_cursor=next_users_cursor,
+                         stats=stats, events_version=events_version)
 
 @app.route('/admin/create_user', methods=['POST'])
 def admin_create_user():
@@ -417,9 +551,9 @@ def admin_delete_user():
     if user.user_id == session['user_id']:
         return jsonify({'success': False, 'message': 'Non puoi eliminare te stesso'})
     
-    user_tasks = db.get_user_tasks(user_id)
-    if db.delete_user_and_tasks(user_id):
-        return jsonify({'success': True, 'message': f'Utente {user.username} e {len(user_tasks)} task eliminati!'})
+    deleted = db.delete_users([user.user_id])
+    if deleted:
+        return jsonify({'success': True, 'message': f'Utente {user.username} e {deleted[user.user_id]} task eliminati!'})
     else:
         return jsonify({'success': False, 'message': 'Errore durante l\'eliminazione'})
 
@@ -432,17 +566,22 @@ def admin_assign_task():
     title = request.form.get('title', '').strip()
     description = request.form.get('description', '').strip()
     assigned_user_id = request.form.get('assigned_user_id', '').strip()
+    # In alternativa all'id, lo username (il pannello non elenca tutti gli utenti)
+    assigned_username = request.form.get('assigned_username', '').strip()
     
-    if not title or not assigned_user_id:
+    if not title or not (assigned_user_id or assigned_username):
         return jsonify({'success': False, 'message': 'Titolo e utente assegnato sono obbligatori'})
     
     # Verifica che l'utente assegnato esista
-    assigned_user = db.get_user_by_id(assigned_user_id)
+    if assigned_user_id:
+        assigned_user = db.get_user_by_id(assigned_user_id)
+    else:
+        assigned_user = db.get_user_by_username(assigned_username)
     if not assigned_user:
         return jsonify({'success': False, 'message': 'Utente assegnato non trovato'})
     
     # Crea il task assegnato all'utente specificato
-    task = Task(title, description, assigned_user_id)
+    task = Task(title, description, assigned_user.user_id)
     
     if db.create_task(task):
         return jsonify({
@@ -459,6 +598,41 @@ def admin_assign_task():
     else:
         return jsonify({'success': False, 'message': 'Errore durante l\'assegnazione del task'})
 
+@app.route('/admin/cleanup_tokens', methods=['POST'])
+@without_unit_of_work
+def admin_cleanup_tokens():
+    """Elimina subito i token di recupero scaduti o già usati"""
+    if 'user_id' not in session or not session.get('is_admin', False):
+        return jsonify({'success': False, 'message': 'Accesso negato'})
+    
+    count = db.cleanup_old_recovery_tokens()
+    return jsonify({'success': True, 'message': f'{count} token eliminati', 'removed': count})
+
+@app.route('/admin/archive_tasks', methods=['POST'])
+@without_unit_of_work
+def admin_archive_tasks():
+    """Archivia subito i task completati da più di Config.ARCHIVE_AFTER_DAYS giorni"""
+    if 'user_id' not in session or not session.get('is_admin', False):
+        return jsonify({'success': False, 'message': 'Accesso negato'})
+    
+    count = db.archive_done_tasks()
+    return jsonify({'success': True, 'message': f'{count} task archiviati', 'archived': count})
+
+@app.route('/admin/restore_task', methods=['POST'])
+def admin_restore_task():
+    """Riporta un task archiviato tra i task attivi"""
+    if 'user_id' not in session or not session.get('is_admin', False):
+        return jsonify({'success': False, 'message': 'Accesso negato'})
+    
+    task_id = request.form.get('task_id')
+    if not task_id:
+        return jsonify({'success': False, 'message': 'ID task mancante'})
+    
+    if db.restore_archived_task(task_id):
+        return jsonify({'success': True, 'message': 'Task ripristinato con successo!'})
+    else:
+        return jsonify({'success': False, 'message': 'Task archiviato non trovato'})
+
 @app.route('/profile')
 def profile():
     """Profilo utente"""
@@ -472,16 +646,242 @@ def profile():
         flash('Utente non trovato.', 'error')
         return redirect(url_for('logout'))
     
-    user_tasks = db.get_user_tasks(user_id)
+    counts = db.get_task_count_by_status(user_id)
     task_stats = {
-        'total': len(user_tasks),
-        'todo': len([t for t in user_tasks if t.status == Task.STATUS_TODO]),
-        'doing': len([t for t in user_tasks if t.status == Task.STATUS_DOING]),
-        'done': len([t for t in user_tasks if t.status == Task.STATUS_DONE])
+        'total': sum(counts.values()),
+        'todo': counts[Task.STATUS_TODO],
+        'doing': counts[Task.STATUS_DOING],
+        'done': counts[Task.STATUS_DONE]
     }
     
     return render_template('profile.html', user=user, task_stats=task_stats)
 
+# API JSON versionata (sola lettura)
+def _api_error(message: str, status: int):
+    """Risposta di errore dell'API"""
+    return jsonify({'success': False, 'message': message}), status
+
+def _api_list_response(etag, build_payload):
+    """
+    Risposta JSON di una lista con ETag
+    Se il client ha già la versione etag (If-None-Match) risponde 304 senza
+    chiamare build_payload, quindi senza leggere le righe. Con etag None
+    (versione non disponibile) la risposta è sempre completa.
+    """
+    if etag is not None and request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        response = jsonify(build_payload())
+    if etag is not None:
+        response.set_etag(etag)
+    # Il client deve sempre riconvalidare; la risposta dipende dalla sessione
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def _api_date_arg(name: str, next_day: bool = False) -> Optional[datetime]:
+    """Data YYYY-MM-DD di un parametro (il giorno dopo con next_day); ValueError se non valida"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    day = datetime.strptime(value, '%Y-%m-%d')
+    return day + timedelta(days=1) if next_day else day
+
+def _api_descending() -> bool:
+    """Verso dell'ordinamento dal parametro order ('desc', default, o 'asc')"""
+    order = request.args.get('order', 'desc')
+    if order not in ('asc', 'desc'):
+        raise ValueError(f"Ordinamento non valido: {order}")
+    return order == 'desc'
+
+def _api_owner_id(default: Optional[str]) -> Tuple[Optional[str], bool]:
+    """
+    Proprietario filtrato da un admin: owner (username) o user_id
+    Restituisce (user_id, trovato); senza filtro (default, True)
+    """
+    username = request.args.get('owner', '').strip()
+    if username:
+        user = db.get_user_by_username(username)
+        return (user.user_id, True) if user else (None, False)
+    return request.args.get('user_id') or default, True
+
+def _owner_fields(item: dict) -> dict:
+    """Campi JSON del proprietario di un task"""
+    return {
+        'owner_username': item['owner_username'],
+        'owner_email': item.get('owner_email'),
+        'owner_is_admin': item.get('owner_is_admin', False)
+    }
+
+@app.route('/api/v1/tasks')
+def api_tasks():
+    """
+    Pagina dei task dell'utente (di tutti gli utenti, con i proprietari, se admin)
+    Parametri: cursor, page_size, status, created_from e created_to
+    (YYYY-MM-DD, inclusi), order (desc o asc), include_archived=1 e, solo
+    per gli admin, owner (username) o user_id
+    """
+    if 'user_id' not in session:
+        return _api_error('Non autenticato', 401)
+    
+    is_admin = session.get('is_admin', False)
+    owner, found = _api_owner_id(None) if is_admin else (session['user_id'], True)
+    if not found:
+        return _api_error('Utente non trovato', 404)
+    cursor = request.args.get('cursor') or None
+    page_size = request.args.get('page_size', type=int)
+    status = request.args.get('status') or None
+    include_archived = request.args.get('include_archived') == '1'
+    if page_size is not None and page_size < 1:
+        return _api_error('page_size non valido', 400)
+    if status is not None and not Config.is_valid_task_status(status):
+        return _api_error('Stato non valido', 400)
+    try:
+        created_from = _api_date_arg('created_from')
+        created_to = _api_date_arg('created_to', next_day=True)
+        descending = _api_descending()
+    except ValueError:
+        return _api_error('Filtri non validi', 400)
+    filters = {'status': status, 'include_archived': include_archived, 'created_from': created_from,
+               'created_to': created_to, 'descending': descending}
+    
+    # Le versioni vanno lette prima dei task: una modifica avvenuta nel
+    # mezzo produce al più una risposta nuova in più, mai righe vecchie con
+    # un ETag nuovo. L'ETag contiene il proprietario perché la stessa URL
+    # vale per utenti diversi; per gli admin anche la versione degli utenti,
+    # da cui vengono i dati dei proprietari
+    if owner is None:
+        version = db.get_change_version()
+    else:
+        version = db.get_user_data_version(owner)
+    etag = None if version is None else f"v1-tasks-{owner or 'all'}-{version}"
+    if is_admin and etag is not None:
+        users_version = db.get_users_version()
+        etag = None if users_version is None else f"{etag}-{users_version}"
+    
+    def build_payload():
+        if is_admin:
+            items, next_cursor = db.get_all_tasks_with_users_page(cursor, page_size, user_id=owner, **filters)
+            tasks = [dict(item['task'].to_dict(), **_owner_fields(item)) for item in items]
+        else:
+            items, next_cursor = db.get_user_tasks_page(owner, cursor, page_size, **filters)
+            tasks = [task.to_dict() for task in items]
+        return {
+            'tasks': tasks,
+            'next_cursor': next_cursor,
+            'version': version
+        }
+    
+    try:
+        return _api_list_response(etag, build_payload)
+    except ValueError:
+        return _api_error('Cursore non valido', 400)
+
+@app.route('/api/v1/users')
+def api_users():
+    """
+    Pagina degli utenti (solo admin)
+    Parametri: cursor, page_size, role (user o admin), sort (created_at o
+    username), order (desc o asc)
+    """
+    if 'user_id' not in session:
+        return _api_error('Non autenticato', 401)
+    if not session.get('is_admin', False):
+        return _api_error('Accesso negato', 403)
+    
+    cursor = request.args.get('cursor') or None
+    page_size = request.args.get('page_size', type=int)
+    role = request.args.get('role') or None
+    sort = request.args.get('sort', 'created_at')
+    if page_size is not None and page_size < 1:
+        return _api_error('page_size non valido', 400)
+    if role not in (None, User.ROLE_USER, User.ROLE_ADMIN) or sort not in ('created_at', 'username'):
+        return _api_error('Filtri non validi', 400)
+    try:
+        descending = _api_descending()
+    except ValueError:
+        return _api_error('Filtri non validi', 400)
+    version = db.get_users_version()
+    etag = None if version is None else f"v1-users-{version}"
+    
+    def build_payload():
+        users, next_cursor = db.get_all_users_page(cursor, page_size, role, sort, descending)
+        return {
+            'users': [user.to_dict() for user in users],
+            'next_cursor': next_cursor,
+            'version': version
+        }
+    
+    try:
+        return _api_list_response(etag, build_payload)
+    except ValueError:
+        return _api_error('Cursore non valido', 400)
+
+@app.route('/api/v1/archive')
+def api_archive():
+    """
+    Pagina dei task archiviati, per data di archiviazione (solo admin)
+    Parametri: cursor, page_size, owner (username) o user_id, order (desc o asc)
+    """
+    if 'user_id' not in session:
+        return _api_error('Non autenticato', 401)
+    if not session.get('is_admin', False):
+        return _api_error('Accesso negato', 403)
+    
+    owner, found = _api_owner_id(None)
+    if not found:
+        return _api_error('Utente non trovato', 404)
+    cursor = request.args.get('cursor') or None
+    page_size = request.args.get('page_size', type=int)
+    if page_size is not None and page_size < 1:
+        return _api_error('page_size non valido', 400)
+    try:
+        descending = _api_descending()
+    except ValueError:
+        return _api_error('Filtri non validi', 400)
+    
+    # Archiviazione e ripristino sono modifiche ai task attivi nel registro;
+    # i task archiviati spariscono solo con il loro utente (versione utenti)
+    version = db.get_change_version()
+    users_version = db.get_users_version()
+    etag = None if users_version is None else f"v1-archive-{version}-{users_version}"
+    
+    def build_payload():
+        items, next_cursor = db.get_archived_tasks_page(owner, cursor, page_size, descending)
+        return {
+            'tasks': [dict(item['task'].to_dict(), archived_at=item['archived_at'].isoformat(),
+                           **_owner_fields(item)) for item in items],
+            'next_cursor': next_cursor,
+            'version': version
+        }
+    
+    try:
+        return _api_list_response(etag, build_payload)
+    except ValueError:
+        return _api_error('Cursore non valido', 400)
+
+@app.route('/events')
+def events():
+    """
+    Stream Server-Sent Events con le modifiche ai task dell'utente (a tutti
+    i task e all'elenco utenti se admin). since è la versione dei dati della
+    pagina: le modifiche avvenute dopo vengono inviate subito.
+    """
+    if 'user_id' not in session:
+        return _api_error('Non autenticato', 401)
+    
+    # Alla riconnessione il browser rimanda l'id dell'ultimo evento ricevuto
+    since = request.headers.get('Last-Event-ID', type=int)
+    if since is None:
+        since = request.args.get('since', type=int)
+    subscriber = event_broker.subscribe(session['user_id'], session.get('is_admin', False), since)
+    
+    response = app.response_class(subscriber.stream(), mimetype='text/event-stream')
+    response.call_on_close(subscriber.unsubscribe)
+    response.headers['Cache-Control'] = 'no-cache'
+    # Un proxy (es. nginx) non deve accumulare gli eventi
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.errorhandler(404)
 def not_found(error):
     """Gestione errore 404"""
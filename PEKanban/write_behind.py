@@ -0,0 +1,114 @@
+# write_behind.py - Coda write-behind con group commit per gli aggiornamenti dei task
+# Gli aggiornamenti in attesa vengono fusi per task e scritti tutti insieme
+# in una sola transazione ogni pochi millisecondi o ogni N operazioni
+
+import threading
+import time
+from concurrent.futures import Future
+from config import Config
+
+
+class WriteBehindQueue:
+    """
+    Accoda aggiornamenti di campi dei task e li scrive in blocco
+    Più aggiornamenti dello stesso task prima di un flush diventano un'unica
+    UPDATE (vince il valore più recente di ogni campo). Ogni submit restituisce
+    un Future risolto dopo il commit del flush che lo contiene: attenderlo
+    equivale a una conferma di scrittura durevole.
+    """
+
+    def __init__(self, db, interval: float = None, max_ops: int = None):
+        self.db = db
+        self.interval = interval if interval is not None else Config.WRITE_BEHIND_INTERVAL
+        self.max_ops = max_ops or Config.WRITE_BEHIND_MAX_OPS
+
+        # task_id -> (campi da scrivere, future in attesa del commit)
+        self._pending = {}
+        self._ops = 0
+        self._first_op_at = None
+        self._condition = threading.Condition()
+        # Serializza i flush: un flush manuale attende quello in corso nel thread
+        self._flush_lock = threading.Lock()
+        self._stopped = False
+
+        self._thread = threading.Thread(target=self._run, name="db-write-behind", daemon=True)
+        self._thread.start()
+
+    def submit(self, task_id: str, fields: dict) -> Future:
+        """Accoda l'aggiornamento di alcuni campi di un task"""
+        future = Future()
+        with self._condition:
+            if self._stopped:
+                raise RuntimeError("La coda write-behind è stata fermata")
+            pending_fields, futures = self._pending.setdefault(task_id, ({}, []))
+            pending_fields.update(fields)
+            futures.append(future)
+            self._ops += 1
+            if self._first_op_at is None:
+                self._first_op_at = time.monotonic()
+            if self._ops >= self.max_ops or self._ops == 1:
+                self._condition.notify()
+        return future
+
+    def pending_count(self) -> int:
+        """Numero di task con aggiornamenti non ancora scritti"""
+        with self._condition:
+            return len(self._pending)
+
+    def _run(self):
+        """Thread di flush: scrive quando scade l'intervallo o si raggiungono max_ops"""
+        while True:
+            with self._condition:
+                while not self._stopped and not self._pending:
+                    self._condition.wait()
+                if self._stopped:
+                    break
+                # Un flush manuale può svuotare la coda durante l'attesa
+                while not self._stopped and self._pending and self._ops < self.max_ops:
+                    remaining = self._first_op_at + self.interval - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+            self.flush()
+        self.flush()
+        self.db.release_connection()
+
+    def flush(self) -> int:
+        """Scrive subito tutti gli aggiornamenti in attesa; restituisce quanti task ha scritto"""
+        with self._flush_lock:
+            with self._condition:
+                batch, self._pending = self._pending, {}
+                self._ops = 0
+                self._first_op_at = None
+            if not batch:
+                return 0
+
+            try:
+                with self.db.writer() as conn:
+                    try:
+                        conn.execute("BEGIN IMMEDIATE")
+                        updated = self.db._apply_task_field_updates(
+                            conn.cursor(), {task_id: fields for task_id, (fields, _) in batch.items()}
+                        )
+                        conn.commit()
+                    except Exception:
+                        conn.rollback()
+                        raise
+            except Exception:
+                # Qualsiasi errore, non solo di SQLite, deve risolvere i future
+                # in attesa senza fermare il thread di flush
+                updated = set()
+
+            for task_id, (_, futures) in batch.items():
+                for future in futures:
+                    future.set_result(task_id in updated)
+            return len(updated)
+
+    def stop(self):
+        """Ferma il thread dopo aver scritto gli aggiornamenti rimasti"""
+        with self._condition:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join()
@@ -6,6 +6,15 @@ Contiene costanti e impostazioni globali
 # Configurazione Database
 DATABASE_PATH = "taskboard.db"
 DATABASE_TIMEOUT = 30.0
+DATABASE_POOL_SIZE = 4
+DATABASE_STATEMENT_CACHE_SIZE = 32  # Copre tutte le query del DatabaseManager
+BULK_CHUNK_SIZE = 500  # Parametri massimi per singola query IN (...)
+
+# Configurazione Ricerca full-text
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100  # Limite massimo richiesto per una pagina di risultati
+SEARCH_MAX_CANDIDATES = 300  # Corrispondenze più recenti ordinate per rilevanza
+SEARCH_SNIPPET_TOKENS = 12  # Parole per frammento di testo nei risultati
 
 # Configurazione Sicurezza
 PASSWORD_MIN_LENGTH = 4
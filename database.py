@@ -6,9 +6,90 @@ Implementa il pattern Repository per l'accesso ai dati
 
 import sqlite3
 import os
-from typing import List, Optional
+import threading
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
 from datetime import datetime
 from model.model import User, Task
+from config import (DATABASE_TIMEOUT, DATABASE_POOL_SIZE, DATABASE_STATEMENT_CACHE_SIZE, BULK_CHUNK_SIZE,
+                    SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE, SEARCH_MAX_CANDIDATES, SEARCH_SNIPPET_TOKENS)
+from search import SearchQuery, page_after, encode_cursor, decode_cursor
+
+
+def _is_begin(sql: str) -> bool:
+    """Vero per un'istruzione BEGIN (apertura esplicita di una transazione)"""
+    return sql.lstrip()[:5].upper() == "BEGIN"
+
+
+class UnitCursor:
+    """Cursore di una UnitConnection: ignora BEGIN, il resto è invariato"""
+    
+    def __init__(self, cursor: sqlite3.Cursor):
+        self._cursor = cursor
+    
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+    
+    def __iter__(self):
+        return iter(self._cursor)
+    
+    def execute(self, sql: str, *args):
+        if not _is_begin(sql):
+            self._cursor.execute(sql, *args)
+        return self
+
+
+class UnitConnection:
+    """
+    Connessione restituita da get_connection() dentro un'unità di lavoro
+    Ogni blocco "with conn:" di un metodo è un savepoint della transazione
+    dell'unità: BEGIN viene ignorato, commit() conferma il savepoint e
+    rollback() (o un'eccezione) annulla solo le scritture del metodo.
+    Il commit vero avviene in end_unit_of_work()
+    """
+    
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+        self._savepoints: List[str] = []
+    
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+    
+    def __enter__(self):
+        name = f"unit_{len(self._savepoints) + 1}"
+        self.connection.execute(f"SAVEPOINT {name}")
+        self._savepoints.append(name)
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        name = self._savepoints.pop()
+        try:
+            if exc_type is not None:
+                self.connection.execute(f"ROLLBACK TO {name}")
+            self.connection.execute(f"RELEASE {name}")
+        except sqlite3.OperationalError:
+            # Savepoint già annullato da SQLite insieme alla transazione
+            if exc_type is None:
+                raise
+        return False
+    
+    def execute(self, sql: str, *args):
+        if _is_begin(sql):
+            return self.connection.cursor()
+        return self.connection.execute(sql, *args)
+    
+    def cursor(self) -> UnitCursor:
+        return UnitCursor(self.connection.cursor())
+    
+    def commit(self) -> None:
+        if self._savepoints:
+            name = self._savepoints[-1]
+            self.connection.execute(f"RELEASE {name}")
+            self.connection.execute(f"SAVEPOINT {name}")
+    
+    def rollback(self) -> None:
+        if self._savepoints:
+            self.connection.execute(f"ROLLBACK TO {self._savepoints[-1]}")
 
 
 class DatabaseManager:
@@ -17,19 +98,27 @@ class DatabaseManager:
     Implementa il pattern Repository per User e Task
     """
     
-    def __init__(self, db_path: str = "taskboard.db"):
+    def __init__(self, db_path: str = "taskboard.db", persistent: bool = True):
         """
         Inizializza il database manager
         Args:
             db_path: Percorso del file database SQLite
+            persistent: Se True ogni thread riusa una connessione a lunga
+                vita (con cache degli statement); se False viene aperta
+                una connessione nuova per ogni operazione
         """
         self.db_path = db_path
+        self.persistent = persistent
+        self._local = threading.local()
+        self._idle: List[sqlite3.Connection] = []
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
         self.init_database()
     
     def init_database(self) -> None:
         """Inizializza il database creando le tabelle se non esistono"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.get_connection() as conn:
                 cursor = conn.cursor()
                 
                 # Crea tabella users
@@ -60,20 +149,257 @@ class DatabaseManager:
                 cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_username ON users(username)')
                 cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_user_id ON tasks(user_id)')
                 cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status)')
-                
+
+                # Crea tabella counters (conteggi mantenuti dai trigger)
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'counters'")
+                counters_exist = cursor.fetchone() is not None
+                self._create_counters(cursor)
+                if not counters_exist:
+                    self._rebuild_counters(cursor)
+
+                # Crea l'indice full-text e lo popola con i task già presenti
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'")
+                search_index_exists = cursor.fetchone() is not None
+                self._create_search_index(cursor)
+                if not search_index_exists:
+                    self._rebuild_search_index(cursor)
+
                 conn.commit()
                 print("Database inizializzato con successo!")
                 
         except sqlite3.Error as e:
             print(f"Errore durante l'inizializzazione del database: {e}")
             raise
+
+    def _create_counters(self, cursor: sqlite3.Cursor) -> None:
+        """
+        Crea la tabella counters e i trigger che la aggiornano
+        Ogni riga è un contatore identificato da (scope, key), ad esempio
+        ('status', 'Done') o ('user_status', '<user_id>/Done')
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS counters (
+                scope TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (scope, key)
+            ) WITHOUT ROWID
+        ''')
+
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_tasks_counters_insert AFTER INSERT ON tasks
+            BEGIN
+                INSERT INTO counters (scope, key, value) VALUES ('tasks', '', 1)
+                    ON CONFLICT (scope, key) DO UPDATE SET value = value + 1;
+                INSERT INTO counters (scope, key, value) VALUES ('status', NEW.status, 1)
+                    ON CONFLICT (scope, key) DO UPDATE SET value = value + 1;
+                INSERT INTO counters (scope, key, value) VALUES ('user', NEW.user_id, 1)
+                    ON CONFLICT (scope, key) DO UPDATE SET value = value + 1;
+                INSERT INTO counters (scope, key, value) VALUES ('user_status', NEW.user_id || '/' || NEW.status, 1)
+                    ON CONFLICT (scope, key) DO UPDATE SET value = value + 1;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_tasks_counters_delete AFTER DELETE ON tasks
+            BEGIN
+                UPDATE counters SET value = value - 1
+                WHERE (scope = 'tasks' AND key = '')
+                   OR (scope = 'status' AND key = OLD.status)
+                   OR (scope = 'user' AND key = OLD.user_id)
+                   OR (scope = 'user_status' AND key = OLD.user_id || '/' || OLD.status);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_tasks_counters_update AFTER UPDATE OF status, user_id ON tasks
+            WHEN OLD.status IS NOT NEW.status OR OLD.user_id IS NOT NEW.user_id
+            BEGIN
+                UPDATE counters SET value = value - 1
+                WHERE (scope = 'status' AND key = OLD.status)
+                   OR (scope = 'user' AND key = OLD.user_id)
+                   OR (scope = 'user_status' AND key = OLD.user_id || '/' || OLD.status);
+                INSERT INTO counters (scope, key, value) VALUES ('status', NEW.status, 1)
+                    ON CONFLICT (scope, key) DO UPDATE SET value = value + 1;
+                INSERT INTO counters (scope, key, value) VALUES ('user', NEW.user_id, 1)
+                    ON CONFLICT (scope, key) DO UPDATE SET value = value + 1;
+                INSERT INTO counters (scope, key, value) VALUES ('user_status', NEW.user_id || '/' || NEW.status, 1)
+                    ON CONFLICT (scope, key) DO UPDATE SET value = value + 1;
+            END
+        ''')
+
+    def _rebuild_counters(self, cursor: sqlite3.Cursor) -> None:
+        """Ricalcola da zero la tabella counters a partire da tasks"""
+        cursor.execute("DELETE FROM counters")
+        cursor.execute('''
+            INSERT INTO counters (scope, key, value)
+            SELECT 'tasks', '', COUNT(*) FROM tasks
+        ''')
+        cursor.execute('''
+            INSERT INTO counters (scope, key, value)
+            SELECT 'status', status, COUNT(*) FROM tasks GROUP BY status
+        ''')
+        cursor.execute('''
+            INSERT INTO counters (scope, key, value)
+            SELECT 'user', user_id, COUNT(*) FROM tasks GROUP BY user_id
+        ''')
+        cursor.execute('''
+            INSERT INTO counters (scope, key, value)
+            SELECT 'user_status', user_id || '/' || status, COUNT(*)
+            FROM tasks GROUP BY user_id, status
+        ''')
+
+    def _create_search_index(self, cursor: sqlite3.Cursor) -> None:
+        """
+        Crea l'indice full-text FTS5 su titolo e descrizione dei task
+        Tabella a contenuto esterno: il testo resta solo in tasks e i trigger
+        tengono allineato l'indice. user_id è indicizzato per limitare la
+        ricerca ai task di un utente senza uscire dall'indice
+        """
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+                title, description, user_id,
+                content = 'tasks', content_rowid = 'task_id',
+                prefix = '2 3',
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+        ''')
+
+        # Con il contenuto esterno la cancellazione deve ricevere i valori
+        # indicizzati, cioè quelli precedenti alla modifica
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_insert AFTER INSERT ON tasks
+            BEGIN
+                INSERT INTO tasks_fts (rowid, title, description, user_id)
+                    VALUES (NEW.task_id, NEW.title, NEW.description, NEW.user_id);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_delete AFTER DELETE ON tasks
+            BEGIN
+                INSERT INTO tasks_fts (tasks_fts, rowid, title, description, user_id)
+                    VALUES ('delete', OLD.task_id, OLD.title, OLD.description, OLD.user_id);
+            END
+        ''')
+        # I cambi di stato (il caso più frequente) non toccano l'indice
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_update AFTER UPDATE OF title, description, user_id ON tasks
+            WHEN OLD.title IS NOT NEW.title OR OLD.description IS NOT NEW.description
+                 OR OLD.user_id IS NOT NEW.user_id
+            BEGIN
+                INSERT INTO tasks_fts (tasks_fts, rowid, title, description, user_id)
+                    VALUES ('delete', OLD.task_id, OLD.title, OLD.description, OLD.user_id);
+                INSERT INTO tasks_fts (rowid, title, description, user_id)
+                    VALUES (NEW.task_id, NEW.title, NEW.description, NEW.user_id);
+            END
+        ''')
+
+    def _rebuild_search_index(self, cursor: sqlite3.Cursor) -> None:
+        """Ricostruisce tasks_fts dal contenuto attuale di tasks"""
+        cursor.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+
+    def _open_connection(self) -> sqlite3.Connection:
+        """Apre una nuova connessione configurata"""
+        # check_same_thread=False: una connessione rilasciata da un thread
+        # può essere riusata da un altro (mai da due contemporaneamente)
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=DATABASE_TIMEOUT,
+            cached_statements=DATABASE_STATEMENT_CACHE_SIZE,
+            check_same_thread=not self.persistent
+        )
+        conn.row_factory = sqlite3.Row  # Permette l'accesso per nome colonna
+        return conn
     
     def get_connection(self) -> sqlite3.Connection:
-        """Restituisce una connessione al database"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Permette l'accesso per nome colonna
+        """
+        Restituisce una connessione al database
+        In modalità persistente la connessione del thread corrente viene
+        creata una sola volta e riusata, insieme ai suoi statement preparati.
+        Dentro un'unità di lavoro restituisce la sua UnitConnection
+        """
+        unit = getattr(self._local, 'unit', None)
+        if unit is not None:
+            return unit
+        if not self.persistent:
+            return self._open_connection()
+        
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            with self._connections_lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self._open_connection()
+                with self._connections_lock:
+                    self._connections.append(conn)
+            self._local.conn = conn
         return conn
     
+    def begin_unit_of_work(self) -> None:
+        """
+        Apre un'unità di lavoro per il thread corrente (ad esempio una
+        richiesta web): fino a end_unit_of_work() tutte le operazioni usano
+        la stessa connessione in una sola transazione, con il lock di
+        scrittura preso subito (BEGIN IMMEDIATE), quindi un controllo seguito
+        da una scrittura non può essere superato da un'altra richiesta
+        """
+        if getattr(self._local, 'unit', None) is not None:
+            raise RuntimeError("Unità di lavoro già aperta in questo thread")
+        conn = self.get_connection()
+        conn.execute("BEGIN IMMEDIATE")
+        self._local.unit = UnitConnection(conn)
+    
+    def end_unit_of_work(self, commit: bool = True) -> None:
+        """
+        Chiude l'unità di lavoro del thread corrente
+        Args:
+            commit: True per confermare le scritture, False per annullarle
+        """
+        unit = getattr(self._local, 'unit', None)
+        if unit is None:
+            return
+        self._local.unit = None
+        conn = unit.connection
+        try:
+            if commit:
+                conn.commit()
+            else:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            if not self.persistent:
+                conn.close()
+    
+    @contextmanager
+    def unit_of_work(self):
+        """Context manager per begin_unit_of_work/end_unit_of_work (rollback su eccezione)"""
+        self.begin_unit_of_work()
+        try:
+            yield
+        except BaseException:
+            self.end_unit_of_work(commit=False)
+            raise
+        self.end_unit_of_work()
+    
+    def release_connection(self) -> None:
+        """
+        Restituisce la connessione del thread corrente al pool
+        Da chiamare a fine richiesta nei server che usano un thread per richiesta
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        
+        with self._connections_lock:
+            if len(self._idle) < DATABASE_POOL_SIZE:
+                self._idle.append(conn)
+                return
+            self._connections.remove(conn)
+        conn.close()
+    
     # ==================== OPERAZIONI CRUD PER USER ====================
     
     def create_user(self, user: User) -> bool:
@@ -118,11 +444,7 @@ class DatabaseManager:
                 row = cursor.fetchone()
                 
                 if row:
-                    return User(
-                        user_id=row['user_id'],
-                        username=row['username'],
-                        password_hash=row['password_hash']
-                    )
+                    return User.from_row(row)
                 return None
                 
         except sqlite3.Error as e:
@@ -144,11 +466,7 @@ class DatabaseManager:
                 row = cursor.fetchone()
                 
                 if row:
-                    return User(
-                        user_id=row['user_id'],
-                        username=row['username'],
-                        password_hash=row['password_hash']
-                    )
+                    return User.from_row(row)
                 return None
                 
         except sqlite3.Error as e:
@@ -167,11 +485,7 @@ class DatabaseManager:
                 cursor.execute('SELECT * FROM users ORDER BY username')
                 rows = cursor.fetchall()
                 
-                return [User(
-                    user_id=row['user_id'],
-                    username=row['username'],
-                    password_hash=row['password_hash']
-                ) for row in rows]
+                return [User.from_row(row) for row in rows]
                 
         except sqlite3.Error as e:
             print(f"Errore durante il recupero degli utenti: {e}")
@@ -262,13 +576,7 @@ class DatabaseManager:
                 row = cursor.fetchone()
                 
                 if row:
-                    return Task(
-                        task_id=row['task_id'],
-                        title=row['title'],
-                        description=row['description'],
-                        status=row['status'],
-                        user_id=row['user_id']
-                    )
+                    return Task.from_row(row)
                 return None
                 
         except sqlite3.Error as e:
@@ -293,13 +601,7 @@ class DatabaseManager:
                 ''', (user_id,))
                 rows = cursor.fetchall()
                 
-                return [Task(
-                    task_id=row['task_id'],
-                    title=row['title'],
-                    description=row['description'],
-                    status=row['status'],
-                    user_id=row['user_id']
-                ) for row in rows]
+                return [Task.from_row(row) for row in rows]
                 
         except sqlite3.Error as e:
             print(f"Errore durante il recupero dei task: {e}")
@@ -324,13 +626,7 @@ class DatabaseManager:
                 ''', (user_id, status))
                 rows = cursor.fetchall()
                 
-                return [Task(
-                    task_id=row['task_id'],
-                    title=row['title'],
-                    description=row['description'],
-                    status=row['status'],
-                    user_id=row['user_id']
-                ) for row in rows]
+                return [Task.from_row(row) for row in rows]
                 
         except sqlite3.Error as e:
             print(f"Errore durante il recupero dei task per stato: {e}")
@@ -380,30 +676,264 @@ class DatabaseManager:
             print(f"Errore durante l'eliminazione del task: {e}")
             return False
     
+    # ==================== OPERAZIONI MASSIVE SUI TASK ====================
+    
+    def _existing_task_ids(self, cursor: sqlite3.Cursor, task_ids: List[int]) -> set:
+        """
+        Restituisce gli ID (tra quelli dati) presenti nella tabella tasks
+        Args:
+            cursor: Cursore della transazione corrente
+            task_ids: ID da verificare
+        Returns:
+            set: ID esistenti
+        """
+        existing = set()
+        unique_ids = list(dict.fromkeys(task_ids))
+        for i in range(0, len(unique_ids), BULK_CHUNK_SIZE):
+            chunk = unique_ids[i:i + BULK_CHUNK_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(f'SELECT task_id FROM tasks WHERE task_id IN ({placeholders})', chunk)
+            existing.update(row[0] for row in cursor.fetchall())
+        return existing
+    
+    def create_tasks_bulk(self, tasks: List[Task]) -> List[bool]:
+        """
+        Crea più task in un'unica transazione (un solo commit)
+        Args:
+            tasks: Oggetti Task da inserire; a quelli inseriti viene assegnato il task_id
+        Returns:
+            Lista di esiti, uno per task (False se il titolo manca)
+        """
+        if not tasks:
+            return []
+        
+        results = [bool(task.title) for task in tasks]
+        to_insert = [task for task, ok in zip(tasks, results) if ok]
+        
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+                cursor.executemany('''
+                    INSERT INTO tasks (title, description, status, user_id, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', [(task.title, task.description, task.status, task.user_id,
+                       task.created_at, task.updated_at) for task in to_insert])
+                
+                # Con AUTOINCREMENT e il lock di scrittura gli ID sono consecutivi
+                last_id = cursor.execute('SELECT last_insert_rowid()').fetchone()[0]
+                first_id = last_id - len(to_insert) + 1
+                for offset, task in enumerate(to_insert):
+                    task.task_id = first_id + offset
+                
+                conn.commit()
+                return results
+                
+        except sqlite3.Error as e:
+            print(f"Errore durante la creazione massiva dei task: {e}")
+            return [False] * len(tasks)
+    
+    def update_tasks_bulk(self, tasks: List[Task]) -> List[bool]:
+        """
+        Aggiorna più task in un'unica transazione (un solo commit)
+        Args:
+            tasks: Oggetti Task con i dati aggiornati (incluso user_id,
+                per le riassegnazioni)
+        Returns:
+            Lista di esiti, uno per task (False se il task non esiste)
+        """
+        if not tasks:
+            return []
+        
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+                existing = self._existing_task_ids(cursor, [task.task_id for task in tasks])
+                
+                now = datetime.now()
+                cursor.executemany('''
+                    UPDATE tasks 
+                    SET title = ?, description = ?, status = ?, user_id = ?, updated_at = ?
+                    WHERE task_id = ?
+                ''', [(task.title, task.description, task.status, task.user_id,
+                       now, task.task_id) for task in tasks if task.task_id in existing])
+                
+                conn.commit()
+                return [task.task_id in existing for task in tasks]
+                
+        except sqlite3.Error as e:
+            print(f"Errore durante l'aggiornamento massivo dei task: {e}")
+            return [False] * len(tasks)
+    
+    def move_tasks_bulk(self, task_ids: List[int], new_status: str) -> List[bool]:
+        """
+        Sposta più task nello stesso stato in un'unica transazione
+        Args:
+            task_ids: ID dei task da spostare
+            new_status: Nuovo stato
+        Returns:
+            Lista di esiti, uno per ID
+        """
+        if not task_ids:
+            return []
+        if new_status not in Task.VALID_STATUSES:
+            return [False] * len(task_ids)
+        
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+                existing = self._existing_task_ids(cursor, task_ids)
+                
+                now = datetime.now()
+                cursor.executemany(
+                    'UPDATE tasks SET status = ?, updated_at = ? WHERE task_id = ?',
+                    [(new_status, now, task_id) for task_id in existing]
+                )
+                
+                conn.commit()
+                return [task_id in existing for task_id in task_ids]
+                
+        except sqlite3.Error as e:
+            print(f"Errore durante lo spostamento massivo dei task: {e}")
+            return [False] * len(task_ids)
+    
+    def delete_tasks_bulk(self, task_ids: List[int]) -> List[bool]:
+        """
+        Elimina più task in un'unica transazione
+        Args:
+            task_ids: ID dei task da eliminare
+        Returns:
+            Lista di esiti, uno per ID (un ID ripetuto conta una sola volta)
+        """
+        if not task_ids:
+            return []
+        
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+                existing = self._existing_task_ids(cursor, task_ids)
+                
+                cursor.executemany(
+                    'DELETE FROM tasks WHERE task_id = ?',
+                    [(task_id,) for task_id in existing]
+                )
+                conn.commit()
+                
+                results = []
+                for task_id in task_ids:
+                    results.append(task_id in existing)
+                    existing.discard(task_id)
+                return results
+                
+        except sqlite3.Error as e:
+            print(f"Errore durante l'eliminazione massiva dei task: {e}")
+            return [False] * len(task_ids)
+    
+    # ==================== RICERCA FULL-TEXT ====================
+    
+    def search_tasks(self, query: str, user_id: int = None, limit: int = None,
+                     cursor: str = None) -> Tuple[List[dict], Optional[str]]:
+        """
+        Cerca i task per titolo e descrizione, ordinati per rilevanza
+        Vengono valutate solo le SEARCH_MAX_CANDIDATES corrispondenze più
+        recenti, così il costo non dipende da quanto è comune un termine
+        Args:
+            query: Testo da cercare (tutti i termini obbligatori, "caf*" per prefisso)
+            user_id: Se indicato limita la ricerca ai task dell'utente
+            limit: Numero massimo di risultati (default SEARCH_PAGE_SIZE,
+                al più SEARCH_MAX_PAGE_SIZE)
+            cursor: Cursore restituito dalla pagina precedente
+        Returns:
+            tuple: (risultati, cursore della pagina successiva o None); ogni
+                risultato è un dict con 'task', 'score' e 'snippet'
+        Raises:
+            ValueError: Se il cursore non è valido
+        """
+        limit = max(1, min(limit or SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE))
+        after = decode_cursor(cursor) if cursor else None
+        search_query = SearchQuery(query or '')
+        if not search_query:
+            return [], None
+        match = search_query.match_expression(user_id)
+        
+        try:
+            with self.get_connection() as conn:
+                cursor_db = conn.cursor()
+                cursor_db.execute('''
+                    SELECT t.task_id, t.title, t.description
+                    FROM tasks t
+                    JOIN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?
+                          ORDER BY rowid DESC LIMIT ?) f ON t.task_id = f.rowid
+                ''', (match, SEARCH_MAX_CANDIDATES))
+                candidates = [tuple(row) for row in cursor_db.fetchall()]
+                
+                scored = page_after(search_query.rank(candidates), after)
+                page = scored[:limit]
+                if not page:
+                    return [], None
+                
+                # Righe complete solo per la pagina richiesta
+                placeholders = ','.join('?' * len(page))
+                cursor_db.execute(
+                    f"SELECT * FROM tasks WHERE task_id IN ({placeholders})",
+                    [task_id for _, task_id in page]
+                )
+                rows = {row['task_id']: row for row in cursor_db.fetchall()}
+                
+        except sqlite3.Error as e:
+            print(f"Errore durante la ricerca dei task: {e}")
+            return [], None
+        
+        results = [{
+            'task': Task.from_row(rows[task_id]),
+            'score': score,
+            'snippet': search_query.snippet(rows[task_id]['title'], rows[task_id]['description'],
+                                            SEARCH_SNIPPET_TOKENS)
+        } for score, task_id in page if task_id in rows]
+        
+        next_cursor = encode_cursor(*page[-1]) if len(scored) > limit else None
+        return results, next_cursor
+    
+    def rebuild_search_index(self) -> bool:
+        """
+        Ricostruisce l'indice full-text dai dati della tabella tasks (riparazione)
+        Returns:
+            bool: True se la ricostruzione è riuscita
+        """
+        try:
+            with self.get_connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                self._rebuild_search_index(conn.cursor())
+                return True
+                
+        except sqlite3.Error as e:
+            print(f"Errore durante la ricostruzione dell'indice di ricerca: {e}")
+            return False
+    
     # ==================== METODI UTILITY ====================
     
     def get_task_count_by_status(self, user_id: int) -> dict:
         """
-        Restituisce il conteggio dei task per stato
+        Restituisce il conteggio dei task per stato (letto dalla tabella counters)
         Args:
             user_id: ID dell'utente
         Returns:
             dict: Dizionario con il conteggio per ogni stato
         """
+        counts = {Task.STATUS_TODO: 0, Task.STATUS_DOING: 0, Task.STATUS_DONE: 0}
+        prefix = f"{user_id}/"
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
-                    SELECT status, COUNT(*) as count
-                    FROM tasks 
-                    WHERE user_id = ?
-                    GROUP BY status
-                ''', (user_id,))
-                rows = cursor.fetchall()
-                
-                counts = {Task.STATUS_TODO: 0, Task.STATUS_DOING: 0, Task.STATUS_DONE: 0}
-                for row in rows:
-                    counts[row['status']] = row['count']
+                    SELECT key, value FROM counters
+                    WHERE scope = 'user_status' AND key >= ? AND key < ?
+                ''', (prefix, f"{user_id}0"))
+                for row in cursor.fetchall():
+                    counts[row['key'][len(prefix):]] = row['value']
                 
                 return counts
                 
@@ -411,10 +941,34 @@ class DatabaseManager:
             print(f"Errore durante il conteggio dei task: {e}")
             return {Task.STATUS_TODO: 0, Task.STATUS_DOING: 0, Task.STATUS_DONE: 0}
     
+    def rebuild_counters(self) -> bool:
+        """
+        Ricalcola i contatori dai dati della tabella tasks (riparazione)
+        Returns:
+            bool: True se il ricalcolo è riuscito
+        """
+        try:
+            with self.get_connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                self._rebuild_counters(conn.cursor())
+                return True
+                
+        except sqlite3.Error as e:
+            print(f"Errore durante il ricalcolo dei contatori: {e}")
+            return False
+    
     def close_connection(self) -> None:
-        """Chiude la connessione al database (se necessario)"""
-        # SQLite gestisce automaticamente le connessioni con il context manager
-        pass
+        """Chiude tutte le connessioni persistenti aperte dal manager"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+            self._idle = []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                print(f"Errore durante la chiusura della connessione: {e}")
+        # Le connessioni dei thread vengono riaperte al prossimo utilizzo
+        self._local = threading.local()
     
     def reset_database(self) -> bool:
         """
@@ -423,6 +977,7 @@ class DatabaseManager:
             bool: True se il reset è riuscito
         """
         try:
+            self.close_connection()
             if os.path.exists(self.db_path):
                 os.remove(self.db_path)
             self.init_database()
@@ -24,6 +24,7 @@ def main():
         
         # Avvia l'applicazione
         controller.run()
+        db_manager.close_connection()
         
     except KeyboardInterrupt:
         print("\n\nApplicazione interrotta dall'utente.")
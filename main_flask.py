@@ -3,7 +3,7 @@ MAIN FLASK - Applicazione web Taskboard con Flask
 Bonus 1: Interfaccia web minimale con login, lista task, aggiunta, modifica, cancellazione
 """
 
-from flask import Flask, render_template, request, redirect, url_for, session, flash
+from flask import Flask, render_template, request, redirect, url_for, session, flash, g
 from database import DatabaseManager
 from model.model import User, Task
 import os
@@ -14,6 +14,36 @@ app.secret_key = 'taskboard_secret_key_2025'  # In produzione usare una chiave p
 # Inizializza il database
 db_manager = DatabaseManager("taskboard.db")
 
+@app.teardown_appcontext
+def release_db_connection(exception=None):
+    """Restituisce al pool la connessione usata dalla richiesta"""
+    db_manager.release_connection()
+
+# Le richieste che modificano dati sono un'unità di lavoro: una connessione
+# e una transazione, aperta prima della vista e confermata dopo la risposta
+# (annullata su errore), così controlli e scritture restano atomici
+UNIT_OF_WORK_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+@app.before_request
+def begin_unit_of_work():
+    """Apre l'unità di lavoro della richiesta (g.unit_of_work)"""
+    if request.method in UNIT_OF_WORK_METHODS:
+        db_manager.begin_unit_of_work()
+        g.unit_of_work = True
+
+@app.after_request
+def commit_unit_of_work(response):
+    """Commit prima di inviare la risposta: se fallisce il client riceve un errore"""
+    if g.pop('unit_of_work', False):
+        db_manager.end_unit_of_work(commit=response.status_code < 500)
+    return response
+
+@app.teardown_request
+def rollback_unit_of_work(exception=None):
+    """Rollback dell'unità rimasta aperta (eccezione prima della risposta)"""
+    if g.pop('unit_of_work', False):
+        db_manager.end_unit_of_work(commit=False)
+
 @app.route('/')
 def index():
     """Pagina principale - reindirizza al login se non autenticato"""
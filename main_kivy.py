@@ -696,6 +696,10 @@ class TaskboardApp(App):
         edit_screen = self.root.get_screen('edit_task')
         if self.current_task:
             edit_screen.set_task(self.current_task)
+    
+    def on_stop(self):
+        """Chiamato alla chiusura dell'app"""
+        self.db.close_connection()
 
 
 if __name__ == '__main__':
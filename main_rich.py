@@ -29,6 +29,7 @@ def main():
         
         # Avvia l'applicazione Rich
         controller.run()
+        db_manager.close_connection()
         
     except KeyboardInterrupt:
         print("\n\nApplicazione interrotta dall'utente.")
@@ -7,6 +7,14 @@ Implementa la logica di business e le regole di validazione
 from datetime import datetime
 from typing import Optional, List
 import hashlib
+import sys
+
+
+def _parse_timestamp(value) -> datetime:
+    """Converte un timestamp letto dal database in datetime (ora attuale se mancante)"""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value or datetime.now()
 
 
 class User:
@@ -15,12 +23,32 @@ class User:
     Gestisce i dati dell'utente e l'autenticazione
     """
     
+    __slots__ = ('user_id', 'username', 'password_hash', 'created_at')
+    
     def __init__(self, user_id: Optional[int] = None, username: str = "", password_hash: str = ""):
         self.user_id = user_id
         self.username = username
         self.password_hash = password_hash
         self.created_at = datetime.now()
     
+    @classmethod
+    def from_row(cls, row) -> 'User':
+        """Crea un User da una riga della tabella users senza passare da __init__"""
+        user = object.__new__(cls)
+        user.user_id = row['user_id']
+        user.username = row['username']
+        user.password_hash = row['password_hash']
+        user.created_at = _parse_timestamp(row['created_at'])
+        return user
+    
+    def to_dict(self) -> dict:
+        """Rappresentazione serializzabile in JSON (senza hash della password)"""
+        return {
+            'user_id': self.user_id,
+            'username': self.username,
+            'created_at': self.created_at.isoformat()
+        }
+    
     def set_password(self, password: str) -> None:
         """Imposta la password hashata usando SHA-256"""
         self.password_hash = hashlib.sha256(password.encode()).hexdigest()
@@ -46,6 +74,8 @@ class Task:
     
     VALID_STATUSES = [STATUS_TODO, STATUS_DOING, STATUS_DONE]
     
+    __slots__ = ('task_id', 'title', 'description', 'status', 'user_id', 'created_at', 'updated_at')
+    
     def __init__(self, task_id: Optional[int] = None, title: str = "", 
                  description: str = "", status: str = STATUS_TODO, user_id: int = 0):
         self.task_id = task_id
@@ -56,6 +86,32 @@ class Task:
         self.created_at = datetime.now()
         self.updated_at = datetime.now()
     
+    @classmethod
+    def from_row(cls, row) -> 'Task':
+        """Crea un Task da una riga della tabella tasks senza passare da __init__"""
+        task = object.__new__(cls)
+        task.task_id = row['task_id']
+        task.title = row['title']
+        task.description = row['description']
+        # Lo stato si ripete su molte righe: sys.intern evita una copia per task
+        task.status = sys.intern(row['status'])
+        task.user_id = row['user_id']
+        task.created_at = _parse_timestamp(row['created_at'])
+        task.updated_at = _parse_timestamp(row['updated_at'])
+        return task
+    
+    def to_dict(self) -> dict:
+        """Rappresentazione serializzabile in JSON"""
+        return {
+            'task_id': self.task_id,
+            'title': self.title,
+            'description': self.description,
+            'status': self.status,
+            'user_id': self.user_id,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+    
     def update_status(self, new_status: str) -> bool:
         """Aggiorna lo stato del task se valido"""
         if new_status in self.VALID_STATUSES:
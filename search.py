@@ -0,0 +1,37 @@
+"""
+SEARCH - Ricerca full-text sui task (indice FTS5 tasks_fts)
+Analisi del testo, ranking e snippet sono quelli di PEKanban/search.py:
+qui cambiano solo la colonna del proprietario (user_id intero) e i cursori
+"""
+
+import base64
+import json
+from typing import Tuple
+from PEKanban.search import MARK_START, MARK_END, fold, tokenize, page_after
+from PEKanban.search import SearchQuery as _SearchQuery
+
+
+class SearchQuery(_SearchQuery):
+    """Query di ricerca validata; l'indice contiene lo user_id intero nella colonna user_id"""
+
+    OWNER_COLUMN = 'user_id'
+
+    @staticmethod
+    def owner_term(user_id) -> str:
+        return str(int(user_id))
+
+
+def encode_cursor(score: float, rowid: int) -> str:
+    """Codifica la chiave (punteggio, rowid) dell'ultimo risultato in un cursore opaco"""
+    payload = json.dumps([score, rowid], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """Decodifica un cursore; solleva ValueError se non è valido"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        score, rowid = json.loads(base64.urlsafe_b64decode(padded))
+        return float(score), int(rowid)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Cursore di ricerca non valido") from e